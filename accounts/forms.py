@@ -1,15 +1,23 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.core.validators import RegexValidator
 from .models import Profile
 
+# GCash and bank account numbers end up in the payout CSV files: digits only, with an optional leading +
+account_number_validator = RegexValidator(r"^\+?[0-9]+\Z", "Enter digits only, optionally starting with +.")
+
 class CustomUserCreationForm(UserCreationForm):
     email = forms.EmailField(required=True, label="Email Address")
     full_name = forms.CharField(max_length=100, required=True, label="Full Name")
-    gcash_number = forms.CharField(max_length=20, required=True, label="GCash Number")
+    gcash_number = forms.CharField(
+        max_length=20, required=True, label="GCash Number", validators=[account_number_validator]
+    )
     gcash_name = forms.CharField(max_length=100, required=True, label="GCash Name")
     bank_name = forms.CharField(max_length=100, required=True, label="Bank Name")
-    bank_number = forms.CharField(max_length=30, required=True, label="Bank Number")
+    bank_number = forms.CharField(
+        max_length=30, required=True, label="Bank Number", validators=[account_number_validator]
+    )
 
     class Meta:
         model = User
@@ -0,0 +1,44 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.db import migrations
+from django.utils import timezone
+
+
+def backfill_user_sessions(apps, schema_editor):
+    """
+    Map the sessions that were live before UserSession existed, so the next
+    login still logs their device out. Each unexpired session is decoded once.
+    """
+    Session = apps.get_model("sessions", "Session")
+    UserSession = apps.get_model("accounts", "UserSession")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    user_ids = set(User.objects.values_list("pk", flat=True))
+    tracked = set(UserSession.objects.values_list("session_id", flat=True))
+
+    batch = []
+    sessions = Session.objects.filter(expire_date__gt=timezone.now()).values_list("session_key", "session_data")
+    for session_key, session_data in sessions.iterator(chunk_size=2000):
+        if session_key in tracked:
+            continue
+        try:
+            user_id = int(store.decode(session_data).get(SESSION_KEY))
+        except (TypeError, ValueError):
+            continue  # anonymous or unreadable session
+        if user_id in user_ids:
+            batch.append(UserSession(session_id=session_key, user_id=user_id))
+    UserSession.objects.bulk_create(batch, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_usersession'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_sessions, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -11,3 +12,12 @@ class Profile(models.Model):
 
     def __str__(self):
         return f"{self.user.username}'s profile"
+
+
+class UserSession(models.Model):
+    """Maps a user to their session keys so old sessions can be dropped without decoding every session."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user_sessions")
+    session = models.OneToOneField(Session, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f"{self.user.username} | {self.session_id}"
@@ -0,0 +1,21 @@
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.dispatch import receiver
+from .models import UserSession
+
+
+@receiver(user_logged_in)
+def track_user_session(sender, request, user, **kwargs):
+    """Remember which session belongs to the user that just logged in."""
+    if request.session.session_key is None:
+        # login() flushed a session that belonged to another user; the fresh
+        # one has no key until it is saved, so save it now to record it
+        request.session.save()
+    UserSession.objects.update_or_create(session_id=request.session.session_key, defaults={"user": user})
+
+
+@receiver(user_logged_out)
+def forget_user_session(sender, request, user, **kwargs):
+    """Drop the mapping for the session being logged out."""
+    session_key = request.session.session_key
+    if session_key:
+        UserSession.objects.filter(session_id=session_key).delete()
@@ -1,3 +1,78 @@
-from django.test import TestCase
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from accounts.models import UserSession
+
+
+class SingleSessionLoginTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="worker", password="test12345")
+
+    def _login(self, client, username="worker", password="test12345"):
+        return client.post(reverse("login"), {"username": username, "password": password})
+
+    def test_new_login_invalidates_previous_session(self):
+        first, second = Client(), Client()
+        self._login(first)
+        self.assertEqual(first.get(reverse("user_menu")).status_code, 200)
+
+        self._login(second)
+        self.assertEqual(second.get(reverse("user_menu")).status_code, 200)
+        # The first device is logged out
+        self.assertEqual(first.get(reverse("user_menu")).status_code, 302)
+        self.assertEqual(UserSession.objects.filter(user=self.user).count(), 1)
+
+    def test_login_over_another_users_session_is_tracked(self):
+        client = Client()
+        other = User.objects.create_user(username="previous", password="test12345")
+        client.force_login(other)
+        User.objects.filter(pk=other.pk).update(is_active=False)
+
+        self._login(client)
+        session_key = client.cookies["sessionid"].value
+        self.assertTrue(UserSession.objects.filter(user=self.user, session_id=session_key).exists())
+
+        # A later login revokes that session
+        self._login(Client())
+        self.assertEqual(client.get(reverse("user_menu")).status_code, 302)
+
+    def test_sessions_from_before_deploy_are_backfilled(self):
+        migration = import_module("accounts.migrations.0007_backfill_usersessions")
+        first = Client()
+        self._login(first)
+        UserSession.objects.all().delete()  # as if it logged in before UserSession existed
+
+        migration.backfill_user_sessions(apps, None)
+        self.assertEqual(
+            list(UserSession.objects.values_list("user_id", "session_id")),
+            [(self.user.id, first.cookies["sessionid"].value)],
+        )
+        self._login(Client())
+        self.assertEqual(first.get(reverse("user_menu")).status_code, 302)
+
+    def test_logout_forgets_session(self):
+        client = Client()
+        self._login(client)
+        self.assertEqual(UserSession.objects.filter(user=self.user).count(), 1)
+        client.post(reverse("logout"))
+        self.assertFalse(UserSession.objects.filter(user=self.user).exists())
+
+    def test_login_cost_does_not_depend_on_other_sessions(self):
+        def count_login_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self._login(Client())
+            return len(ctx.captured_queries)
+
+        self._login(Client())
+        baseline = count_login_queries()
+        for i in range(20):
+            User.objects.create_user(username=f"other_{i}", password="test12345")
+            self._login(Client(), username=f"other_{i}")
+        self.assertGreaterEqual(Session.objects.count(), 21)
+        self.assertEqual(count_login_queries(), baseline)
@@ -5,7 +5,6 @@ from django.contrib import messages
 from .forms import CustomUserCreationForm
 
 from django.contrib.sessions.models import Session
-from django.utils import timezone
 from django.templatetags.static import static
 
 
@@ -22,12 +21,8 @@ def login_view(request):
         if form.is_valid():
             user = form.get_user()
 
-            # Invalidate previous sessions
-            user_sessions = Session.objects.filter(expire_date__gte=timezone.now())
-            for session in user_sessions:
-                data = session.get_decoded()
-                if data.get('_auth_user_id') == str(user.id):
-                    session.delete()
+            # Invalidate previous sessions (indexed lookup through UserSession)
+            Session.objects.filter(usersession__user=user).delete()
 
             auth_login(request, user)
 
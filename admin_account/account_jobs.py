@@ -0,0 +1,185 @@
+# admin_account/account_jobs.py
+"""
+Chunked, resumable account deactivation and deletion.
+
+``start_job`` deactivates the account at once and records an ``AccountJob``.
+``run_job`` then works through the job's steps. Each step closes or deletes at
+most ``settings.ACCOUNT_JOB_CHUNK`` rows per short write transaction and
+records its progress in the same transaction. Between chunks it pauses for
+``ACCOUNT_JOB_PAUSE`` seconds, so clock-ins waiting on the SQLite writer lock
+get a turn. A deletion removes the ``User`` row last, once nothing else is left.
+
+Every step reads what is left from the database, so an interrupted job can be
+run again (``manage.py resume_account_jobs``) and carries on where it stopped.
+A running job touches ``updated_at`` with every chunk; only jobs whose
+heartbeat is older than ``ACCOUNT_JOB_STALE_AFTER`` seconds count as
+interrupted, and ``claim`` makes sure only one runner picks a job up.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from accounts.models import Profile
+from payroll_main.db import write_transaction
+from user_account.models import ArchivedTimeLog, PunchEvent, TimeLog
+from . import caching, rollup
+from .models import AccountJob, DailyHours, WeeklyHours, WeeklyPayroll, WorkAssignment
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, "ACCOUNT_JOB_CHUNK", 200)
+PAUSE = getattr(settings, "ACCOUNT_JOB_PAUSE", 0.05)
+STALE_AFTER = timedelta(seconds=getattr(settings, "ACCOUNT_JOB_STALE_AFTER", 60))
+
+CLOSE_OPEN_LOGS = "open time logs"
+
+
+def _steps(kind, user_id):
+    """``(name, queryset)`` pairs, worked through in order."""
+    if kind == AccountJob.DEACTIVATE:
+        return [(CLOSE_OPEN_LOGS, TimeLog.objects.filter(user_id=user_id, time_out__isnull=True))]
+    # Children before parents, so no single delete cascades into a large set
+    return [
+        ("time logs", TimeLog.objects.filter(user_id=user_id)),
+        ("archived time logs", ArchivedTimeLog.objects.filter(user_id=user_id)),
+        ("kiosk punches", PunchEvent.objects.filter(user_id=user_id)),
+        ("daily hours", DailyHours.objects.filter(user_id=user_id)),
+        ("weekly hours", WeeklyHours.objects.filter(user_id=user_id)),
+        ("payroll", WeeklyPayroll.objects.filter(user_id=user_id)),
+        ("assignments", WorkAssignment.objects.filter(user_id=user_id)),
+        ("profile", Profile.objects.filter(user_id=user_id)),
+    ]
+
+
+def _remaining(kind, user_id):
+    return sum(rows.count() for _, rows in _steps(kind, user_id))
+
+
+def start_job(user, kind):
+    """
+    Deactivate ``user`` and return their job of ``kind``. An unfinished job is
+    reused, and a pending deactivation becomes a deletion when one is asked for.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        user.is_active = False
+        job = AccountJob.objects.filter(user=user).exclude(status=AccountJob.DONE).first()
+        if job is None:
+            job = AccountJob.objects.create(
+                user=user, username=user.username, kind=kind, total=_remaining(kind, user.pk)
+            )
+        elif kind == AccountJob.DELETE and job.kind == AccountJob.DEACTIVATE:
+            job.kind = kind
+            job.total = job.processed + _remaining(kind, user.pk)
+            job.save(update_fields=["kind", "total", "updated_at"])
+    caching.bump([("user", user.pk)])
+    return job
+
+
+def resumable_jobs():
+    """Unfinished jobs nobody is working on: pending, failed, or running without a recent heartbeat."""
+    stale = Q(status=AccountJob.RUNNING, updated_at__lt=timezone.now() - STALE_AFTER)
+    return AccountJob.objects.filter(Q(status__in=[AccountJob.PENDING, AccountJob.FAILED]) | stale)
+
+
+def claim(job):
+    """
+    Take ``job`` over for this runner. Only succeeds if nobody else touched it
+    since it was read, so two resumers never run the same job.
+    """
+    now = timezone.now()
+    claimed = AccountJob.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at).update(
+        status=AccountJob.RUNNING, error="", updated_at=now
+    )
+    if claimed:
+        job.status, job.updated_at = AccountJob.RUNNING, now
+    return bool(claimed)
+
+
+def launch(job):
+    """
+    Run ``job`` once the current transaction commits: in a background thread,
+    or in this thread when ``ACCOUNT_JOBS_IN_BACKGROUND`` is off.
+    """
+    if not getattr(settings, "ACCOUNT_JOBS_IN_BACKGROUND", True):
+        transaction.on_commit(lambda: run_job(job))
+        return
+    thread = threading.Thread(target=_run_in_thread, args=(job.pk,), name=f"account-job-{job.pk}", daemon=True)
+    transaction.on_commit(thread.start)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(AccountJob.objects.get(pk=job_id))
+    except Exception:
+        pass  # logged and recorded on the job by run_job
+    finally:
+        connection.close()
+
+
+def run_job(job, chunk_size=CHUNK_SIZE, pause=PAUSE):
+    """Work through ``job`` chunk by chunk and return it, refreshed."""
+    AccountJob.objects.filter(pk=job.pk).update(status=AccountJob.RUNNING, error="", updated_at=timezone.now())
+    try:
+        for step, rows in _steps(job.kind, job.user_id):
+            while _run_chunk(job.pk, step, rows, chunk_size) is not None:
+                time.sleep(pause)
+        _finish(job)
+    except Exception as exc:
+        logger.exception("Account job %s failed", job.pk)
+        AccountJob.objects.filter(pk=job.pk).update(
+            status=AccountJob.FAILED, error=str(exc), updated_at=timezone.now()
+        )
+        raise
+    job.refresh_from_db()
+    return job
+
+
+@write_transaction
+def _run_chunk(job_id, step, rows, chunk_size):
+    """
+    Close or delete the next chunk of ``rows``. Returns the number of rows
+    actually changed (rows cascaded into by a delete are not counted), or
+    None once the step has nothing left.
+    """
+    ids = list(rows.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+    if not ids:
+        return None
+    if step == CLOSE_OPEN_LOGS:
+        changed = _close_logs(ids)
+    else:
+        _, deleted = rows.model.objects.filter(pk__in=ids).delete()
+        changed = deleted.get(rows.model._meta.label, 0)
+    # Also the job's heartbeat
+    AccountJob.objects.filter(pk=job_id).update(
+        step=step, processed=F("processed") + changed, updated_at=timezone.now()
+    )
+    return changed
+
+
+def _close_logs(ids):
+    # Bulk update skips TimeLog.save() and signals, so feed the closed logs to the hours rollup and cache here
+    closed_at = timezone.now()
+    open_logs = TimeLog.objects.filter(id__in=ids, time_out__isnull=True)
+    closing = list(open_logs.values_list("user_id", "time_in"))
+    closed = open_logs.update(time_out=closed_at)
+    rollup.record_logs([(user_id, time_in, closed_at) for user_id, time_in in closing])
+    caching.bump_logs(closing)
+    return closed
+
+
+@write_transaction
+def _finish(job):
+    if job.kind == AccountJob.DELETE:
+        # Last, and cheap: everything that pointed at the user is gone by now
+        User.objects.filter(pk=job.user_id).delete()
+    now = timezone.now()
+    AccountJob.objects.filter(pk=job.pk).update(status=AccountJob.DONE, step="", finished_at=now, updated_at=now)
@@ -0,0 +1,216 @@
+# admin_account/benchmarks.py
+"""
+Synthetic data generator and view benchmark runner.
+
+Used by ``manage.py benchmark_views``; the generator is also handy in tests.
+"""
+import random
+from io import StringIO
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from user_account.models import TimeLog, TimeLogWorkType
+from .models import WorkAssignment, WorkType
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = "bench-password"
+
+# A private cache for the run: the default file cache is shared with the live server,
+# which must never see (or lose entries to) the synthetic rows
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "xjgpayroll-benchmarks",
+    }
+}
+
+
+@dataclass
+class DataSize:
+    label: str
+    users: int
+    work_types: int
+    years: float
+
+
+SIZES = {
+    "small": DataSize("small", users=10, work_types=5, years=0.25),
+    "medium": DataSize("medium", users=50, work_types=10, years=1),
+    "large": DataSize("large", users=200, work_types=20, years=3),
+}
+
+
+def seed_data(size, seed=42, end=None):
+    """
+    Create ``size.users`` workers, ``size.work_types`` work types and
+    ``size.years`` of TimeLog history with realistic shift patterns, all
+    through ``bulk_create``. Returns the admin user used for admin views.
+    """
+    rng = random.Random(seed)
+    end = end or timezone.localdate()
+    local_tz = timezone.get_current_timezone()
+    password = make_password(BENCHMARK_PASSWORD)
+
+    admin = User.objects.create(username="bench_admin", password=password, is_superuser=True, is_staff=True)
+    work_types = WorkType.objects.bulk_create(
+        [WorkType(name=f"Work Type {i + 1:02d}") for i in range(size.work_types)]
+    )
+    users = User.objects.bulk_create(
+        [User(username=f"bench_user_{i:05d}", password=password) for i in range(size.users)]
+    )
+    assignments = WorkAssignment.objects.bulk_create([WorkAssignment(user=user) for user in users])
+
+    # Two or three work types per worker
+    through = WorkAssignment.work_types.through
+    assigned = {}
+    links = []
+    for assignment in assignments:
+        picks = rng.sample(work_types, k=min(len(work_types), rng.randint(2, 3)))
+        assigned[assignment.user_id] = (assignment, picks)
+        links.extend(through(workassignment_id=assignment.id, worktype_id=wt.id) for wt in picks)
+    through.objects.bulk_create(links)
+
+    days = int(size.years * 365)
+    start = end - timedelta(days=days)
+    logs = []
+    for user in users:
+        assignment, picks = assigned[user.id]
+        for offset in range(days + 1):
+            day = start + timedelta(days=offset)
+            # Six-day work week with ~10% absences
+            if day.weekday() == 6 or rng.random() < 0.1:
+                continue
+            shift_start = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=7, minutes=rng.randint(0, 120)
+            )
+            # Most days are a single shift; some are split into two work types
+            shifts = 2 if rng.random() < 0.2 else 1
+            for shift in range(shifts):
+                work_type = rng.choice(picks)
+                duration = timedelta(minutes=rng.randint(180, 540) // shifts)
+                time_in = timezone.make_aware(shift_start, local_tz)
+                time_out = time_in + duration
+                if day == end and shift == shifts - 1:
+                    time_out = None  # today's last shift is still open
+                logs.append(TimeLog(
+                    user=user,
+                    task=assignment,
+                    work_type=work_type,
+                    work_type_names=work_type.name,
+                    time_in=time_in,
+                    time_out=time_out,
+                ))
+                shift_start += duration + timedelta(minutes=30)
+
+    logs = TimeLog.objects.bulk_create(logs, batch_size=2000)
+    TimeLogWorkType.objects.bulk_create(
+        [
+            TimeLogWorkType(log_id=log.id, user_id=log.user_id, work_type_id=log.work_type_id, name=log.work_type_names)
+            for log in logs
+        ],
+        batch_size=2000,
+    )
+    # bulk_create skips TimeLog.save(), so build the hours rollup in one go
+    call_command("rebuild_hours_rollup", stdout=StringIO())
+    return admin
+
+
+def view_targets(admin, end=None):
+    """(name, url, login user) for every benchmarked view, using the first seeded worker."""
+    end = end or timezone.localdate()
+    worker = User.objects.filter(username__startswith="bench_user_").order_by("username").first()
+    last_week = end - timedelta(days=end.weekday() + 7)
+    return [
+        ("task_list", reverse("task_list"), admin),
+        ("manage_users", reverse("manage_users"), admin),
+        ("admin_user_detail", reverse("admin_user_detail", args=[worker.id]), admin),
+        ("user_week_list", reverse("user_week_list", args=[worker.id]), admin),
+        ("user_weekly_summary", reverse("user_weekly_summary", args=[worker.id, last_week.isoformat()]), admin),
+        ("timelog_list", reverse("timelog_list"), worker),
+        ("timelog_create", reverse("timelog_create"), worker),
+    ]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure_view(client, url, repeat):
+    """
+    Median/p95 latency (ms), query count and peak traced memory (KiB) for one
+    URL. The cache is cleared before every measured request, so cached views
+    are measured doing their real work rather than returning a cache hit.
+    """
+    client.get(url)  # warm up (imports, templates)
+
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+    queries = len(ctx.captured_queries)
+
+    # Separate pass for memory, so tracing overhead does not skew the timings
+    cache.clear()
+    tracemalloc.start()
+    client.get(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(_percentile(timings, 95), 2),
+        "queries": queries,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+def run_benchmarks(size, repeat=10, seed=42):
+    """Seed ``size`` into the current (empty) database and measure every view, on a private cache."""
+    cache.clear()
+    admin = seed_data(size, seed=seed)
+    results = {"logs": TimeLog.objects.count(), "views": {}}
+    for name, url, login_user in view_targets(admin):
+        client = Client()
+        client.force_login(login_user)
+        results["views"][name] = measure_view(client, url, repeat)
+    return results
+
+
+def compare(baseline, current, tolerance=0.25):
+    """Return human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for label, size_result in current["sizes"].items():
+        base_views = baseline.get("sizes", {}).get(label, {}).get("views", {})
+        for view, now_stats in size_result["views"].items():
+            base = base_views.get(view)
+            if not base:
+                continue
+            if now_stats["queries"] > base["queries"]:
+                regressions.append(f"{label}/{view}: queries {base['queries']} -> {now_stats['queries']}")
+            if now_stats["median_ms"] > base["median_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{label}/{view}: median {base['median_ms']}ms -> {now_stats['median_ms']}ms"
+                )
+    return regressions
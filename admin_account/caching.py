@@ -0,0 +1,119 @@
+# admin_account/caching.py
+"""
+Versioned cache entries for the dashboard pages.
+
+Every cached value is keyed by the current version of the scopes it depends
+on: ``("user", user_id)``, ``("week", "<user_id>:<week_start>")`` or
+``("worktype", "all")``. Model signals (see signals.py) bump those versions,
+which orphans every dependent entry at once; orphans simply expire.
+
+Versions are ``time.time_ns()`` tokens rather than counters. A version key
+the cache evicted comes back with a newer token, never an old value, so
+entries stored under the lost version stay unreachable. Version keys live
+for ``DASHBOARD_CACHE_VERSION_TIMEOUT`` seconds, and no entry is stored for
+longer than its version keys have left.
+
+Hit and miss counts are kept per namespace for this process and exposed
+through ``cache_stats()`` and the ``cache_stats`` admin view.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_TIMEOUT = getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60 * 60)
+VERSION_TIMEOUT = getattr(settings, "DASHBOARD_CACHE_VERSION_TIMEOUT", 24 * 60 * 60)
+
+_stats = Counter()
+
+
+def _version_key(scope, ident):
+    return f"cachever:{scope}:{ident}"
+
+
+def week_scope(user_id, week_start):
+    return ("week", f"{user_id}:{week_start:%Y-%m-%d}")
+
+
+def versions(scopes):
+    """Current version token of each ``(scope, ident)`` pair, creating missing ones."""
+    keys = [_version_key(*scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            token = time.time_ns()
+            cache.add(key, token, VERSION_TIMEOUT)
+            found[key] = cache.get(key, token)
+    return [found[key] for key in keys]
+
+
+def bump(scopes):
+    """Invalidate every entry depending on any of ``scopes``."""
+    keys = {_version_key(*scope) for scope in scopes}
+    if not keys:
+        return
+    current = cache.get_many(keys)
+    now = time.time_ns()
+    # Strictly newer than what is stored, even if the clock stepped back
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, VERSION_TIMEOUT)
+
+
+def _entry_timeout(timeout, tokens):
+    """``timeout``, shortened so the entry expires no later than its version keys."""
+    now = time.time_ns()
+    for token in tokens:
+        timeout = min(timeout, VERSION_TIMEOUT - (now - token) // 1_000_000_000)
+    return max(timeout, 1)
+
+
+def bump_logs(rows):
+    """Invalidate the user and week scopes touched by ``(user_id, time_in)`` rows (bulk update paths)."""
+    from .rollup import bucket_for
+
+    scopes = []
+    for user_id, time_in in rows:
+        scopes.append(("user", user_id))
+        if time_in:
+            scopes.append(week_scope(user_id, bucket_for(time_in)[1]))
+    bump(scopes)
+
+
+def _key(namespace, parts, scopes, tokens):
+    labels = [f"{scope}={ident}@{token}" for (scope, ident), token in zip(scopes, tokens)]
+    return ":".join([namespace, *[str(part) for part in parts], *labels])
+
+
+def cache_key(namespace, parts=(), scopes=()):
+    return _key(namespace, parts, scopes, versions(scopes))
+
+
+def cached(namespace, compute, parts=(), scopes=(), timeout=DEFAULT_TIMEOUT):
+    """Return the cached value for ``namespace``/``parts`` at the current scope versions, or compute it."""
+    tokens = versions(scopes)
+    key = _key(namespace, parts, scopes, tokens)
+    value = cache.get(key)
+    if value is None:
+        _stats[namespace, "misses"] += 1
+        value = compute()
+        cache.set(key, value, _entry_timeout(timeout, tokens))
+    else:
+        _stats[namespace, "hits"] += 1
+    return value
+
+
+def cache_stats():
+    """``{namespace: {"hits", "misses", "hit_ratio"}}`` for this process."""
+    stats = {}
+    for namespace in sorted({namespace for namespace, _ in _stats}):
+        hits, misses = _stats[namespace, "hits"], _stats[namespace, "misses"]
+        stats[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_stats():
+    _stats.clear()
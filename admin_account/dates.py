@@ -0,0 +1,19 @@
+# admin_account/dates.py
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+
+def local_day_bounds(first_day, last_day=None):
+    """
+    Return aware ``(start, end)`` datetimes covering ``first_day`` through
+    ``last_day`` (inclusive) in the site time zone.
+
+    Filter with ``time_in__gte=start, time_in__lt=end`` instead of
+    ``time_in__date=...`` so SQLite can use an index on ``time_in``.
+    """
+    last_day = last_day or first_day
+    local_tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first_day, datetime.min.time()), local_tz)
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), datetime.min.time()), local_tz)
+    return start, end
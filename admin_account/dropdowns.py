@@ -0,0 +1,51 @@
+# admin_account/dropdowns.py
+"""
+Cached option lists for the "work type" filter dropdowns.
+
+Options are read with a DISTINCT (UNION) query on ``TimeLogWorkType.name``
+and ``ArchivedTimeLogWorkType.name`` (served from indexes) and cached per
+scope: one list for everyone (task_list) and one per user (timelog_list,
+admin_user_detail).
+"""
+from django.core.cache import cache
+
+from . import caching
+
+NAMESPACE = "worktype_options"
+WORKTYPE_SCOPE = ("worktype", "all")
+
+
+def _cache_key(user_id):
+    return caching.cache_key(NAMESPACE, [user_id or "all"], [WORKTYPE_SCOPE])
+
+
+def _compute(user_id):
+    from user_account.models import ArchivedTimeLogWorkType, TimeLogWorkType  # user_account.models imports this module
+
+    tags, archived_tags = TimeLogWorkType.objects.all(), ArchivedTimeLogWorkType.objects.all()
+    if user_id:
+        tags, archived_tags = tags.filter(user_id=user_id), archived_tags.filter(user_id=user_id)
+    # UNION (not ALL) drops the names both tables share
+    return list(
+        tags.values_list("name", flat=True).union(archived_tags.values_list("name", flat=True)).order_by("name")
+    )
+
+
+def work_type_options(user_id=None):
+    """Sorted work type names for the filter dropdown, for one user or everyone."""
+    return caching.cached(NAMESPACE, lambda: _compute(user_id), [user_id or "all"], [WORKTYPE_SCOPE])
+
+
+def note_work_type_name(user_id, name):
+    """Drop cached option lists that do not know about ``name`` yet (called when a log is created)."""
+    if not name:
+        return
+    for key in (_cache_key(None), _cache_key(user_id)):
+        options = cache.get(key)
+        if options is not None and name not in options:
+            cache.delete(key)
+
+
+def invalidate_work_type_options():
+    """Invalidate every scope at once, e.g. after a WorkType is renamed or archived."""
+    caching.bump([WORKTYPE_SCOPE])
@@ -0,0 +1,148 @@
+# admin_account/exports.py
+import csv
+from datetime import datetime
+
+from django.db.models import Exists, OuterRef, Q
+from django.utils.timezone import localtime
+
+from user_account.archive import cold_logs
+from user_account.models import ArchivedTimeLog, TimeLog
+from .dates import local_day_bounds
+from .models import WeeklyPayroll, WorkType
+
+CHUNK_SIZE = 2000
+# Leading characters that make spreadsheet apps read a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for streaming csv rows."""
+
+    def write(self, value):
+        return value
+
+
+def csv_safe(value):
+    """Quote a text cell that a spreadsheet would otherwise evaluate as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
+
+
+def filter_timelogs(params, logs=None):
+    """
+    The task_list filters, shared by task_list and the CSV export: ``date_filter``
+    (single day) or ``date_from``/``date_to``, ``work_type_filter``,
+    ``status_filter`` and ``user``. Applied to TimeLog, or to ``logs``.
+
+    Ongoing logs whose assignment no longer has an active work type are hidden.
+    """
+    archived = logs is not None and logs.model is ArchivedTimeLog
+    if logs is None:
+        logs = TimeLog.objects.all()
+
+    date_filter = params.get("date_filter")
+    if date_filter and _parse_date(date_filter) is None:
+        return logs.none()
+    date_from = _parse_date(params.get("date_from") or date_filter)
+    date_to = _parse_date(params.get("date_to") or date_filter)
+    if date_from:
+        logs = logs.filter(time_in__gte=local_day_bounds(date_from)[0])
+    if date_to:
+        logs = logs.filter(time_in__lt=local_day_bounds(date_to)[1])
+
+    work_type_filter = params.get("work_type_filter")
+    if work_type_filter:
+        logs = logs.filter(work_type_tags__name=work_type_filter)
+
+    status_filter = params.get("status_filter")
+    if status_filter == "ongoing":
+        logs = logs.filter(time_out__isnull=True)
+    elif status_filter == "done":
+        logs = logs.filter(time_out__isnull=False)
+
+    user_id = params.get("user")
+    if user_id:
+        logs = logs.filter(user_id=user_id) if user_id.isdigit() else logs.none()
+
+    if not archived:
+        # Archived logs are all closed
+        logs = logs.filter(
+            Q(time_out__isnull=False)
+            | Q(task__isnull=True)
+            | Exists(WorkType.objects.filter(assignments=OuterRef("task"), is_active=True))
+        )
+
+    return logs
+
+
+def filter_archived_timelogs(params):
+    """The same filters on the archive, or None when the requested range does not reach it."""
+    date_from = _parse_date(params.get("date_from") or params.get("date_filter"))
+    archived_logs = cold_logs(local_day_bounds(date_from)[0] if date_from else None)
+    if archived_logs is None or params.get("status_filter") == "ongoing":
+        return None
+    return filter_timelogs(params, archived_logs)
+
+
+def timelog_rows(logs, archived_logs=None):
+    """Yield CSV lines for ``logs`` (plus ``archived_logs``), reading them in chunks with ``values_list``."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(["id", "user", "work_types", "date", "time_in", "time_out", "hours", "status"])
+
+    columns = ("id", "user__username", "work_type_names", "time_in", "time_out")
+    rows = logs.values_list(*columns)
+    if archived_logs is not None:
+        rows = rows.union(archived_logs.values_list(*columns), all=True)
+    rows = rows.order_by("time_in", "id")
+    for log_id, username, work_types, time_in, time_out in rows.iterator(chunk_size=CHUNK_SIZE):
+        local_in = localtime(time_in) if time_in else None
+        local_out = localtime(time_out) if time_out else None
+        hours = round((time_out - time_in).total_seconds() / 3600, 2) if time_in and time_out else ""
+        yield writer.writerow([
+            log_id,
+            csv_safe(username),
+            csv_safe(work_types or ""),
+            local_in.date().isoformat() if local_in else "",
+            local_in.strftime("%Y-%m-%d %H:%M:%S") if local_in else "",
+            local_out.strftime("%Y-%m-%d %H:%M:%S") if local_out else "",
+            hours,
+            "Done" if time_out else "Ongoing",
+        ])
+
+
+def filter_payrolls(params):
+    """Filter WeeklyPayroll by ``date_from``/``date_to`` (on week_start) and ``user``."""
+    payrolls = WeeklyPayroll.objects.all()
+
+    date_from = _parse_date(params.get("date_from"))
+    date_to = _parse_date(params.get("date_to"))
+    if date_from:
+        payrolls = payrolls.filter(week_start__gte=date_from)
+    if date_to:
+        payrolls = payrolls.filter(week_start__lte=date_to)
+
+    user_id = params.get("user")
+    if user_id:
+        payrolls = payrolls.filter(user_id=user_id) if user_id.isdigit() else payrolls.none()
+
+    return payrolls
+
+
+def payroll_rows(payrolls):
+    """Yield CSV lines for ``payrolls``, reading them in chunks with ``values_list``."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(["user", "week_start", "rate", "total_hours", "total_pay"])
+
+    rows = payrolls.order_by("week_start", "user_id").values_list(
+        "user__username", "week_start", "rate", "total_hours", "total_pay"
+    )
+    for username, week_start, rate, total_hours, total_pay in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow([csv_safe(username), week_start.isoformat(), rate, total_hours, total_pay])
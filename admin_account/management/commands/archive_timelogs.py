@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from user_account import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed time logs from paid weeks older than the archive horizon into "
+        "the archive table, one committed chunk at a time. Safe to interrupt and rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=archive.ARCHIVE_AFTER_DAYS,
+            help="Keep logs from the last N days (rounded back to a Monday) in the hot table.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=archive.CHUNK_SIZE, help="Logs scanned per transaction.")
+        parser.add_argument(
+            "--after-id", type=int, default=0,
+            help="Resume after this log id (the last id printed by an interrupted run).",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["chunk_size"] < 1:
+            raise CommandError("--days must be >= 0 and --chunk-size >= 1.")
+
+        def progress(scanned, archived, last_id):
+            self.stdout.write(f"  scanned {scanned}, archived {archived} (last id {last_id})")
+
+        week_start, _ = archive.horizon(options["days"])
+        self.stdout.write(f"Archiving paid logs from before {week_start:%Y-%m-%d}...")
+        scanned, archived, _ = archive.archive_logs(
+            days=options["days"],
+            chunk_size=options["chunk_size"],
+            after_id=options["after_id"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} of {scanned} old closed logs; unpaid weeks stay in the hot table."
+        ))
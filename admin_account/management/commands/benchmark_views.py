@@ -0,0 +1,80 @@
+import json
+import platform
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from admin_account.benchmarks import SIZES, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic users/work types/time logs into a throwaway database and "
+        "report median/p95 latency, query count and peak memory for each view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="small,medium",
+            help=f"Comma-separated data sizes to run ({', '.join(SIZES)}).",
+        )
+        parser.add_argument("--repeat", type=int, default=10, help="Requests per view and size.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the data generator.")
+        parser.add_argument("--output", help="Write the results to this JSON file (a new baseline).")
+        parser.add_argument("--compare", help="Compare against a baseline JSON file written earlier.")
+
+    def handle(self, *args, **options):
+        labels = [label.strip() for label in options["sizes"].split(",") if label.strip()]
+        unknown = [label for label in labels if label not in SIZES]
+        if unknown:
+            raise CommandError(f"Unknown size(s): {', '.join(unknown)}.")
+
+        results = {
+            "generated_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "repeat": options["repeat"],
+            "sizes": {},
+        }
+
+        # Throwaway test database, never the real db.sqlite3
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for label in labels:
+                size = SIZES[label]
+                self.stdout.write(
+                    f"Seeding {label}: {size.users} users, {size.work_types} work types, {size.years} years..."
+                )
+                call_command("flush", interactive=False, verbosity=0)
+                size_result = run_benchmarks(size, repeat=options["repeat"], seed=options["seed"])
+                results["sizes"][label] = size_result
+                self._report(label, size_result)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['output']}"))
+
+        if options["compare"]:
+            baseline = json.loads(Path(options["compare"]).read_text())
+            regressions = compare(baseline, results)
+            for line in regressions:
+                self.stdout.write(self.style.WARNING(f"REGRESSION {line}"))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def _report(self, label, size_result):
+        self.stdout.write(f"{label} ({size_result['logs']} logs)")
+        self.stdout.write(f"  {'view':<22}{'median ms':>11}{'p95 ms':>10}{'queries':>9}{'peak KiB':>10}")
+        for view, stats in size_result["views"].items():
+            self.stdout.write(
+                f"  {view:<22}{stats['median_ms']:>11}{stats['p95_ms']:>10}"
+                f"{stats['queries']:>9}{stats['peak_kib']:>10}"
+            )
@@ -0,0 +1,143 @@
+import http.client
+import secrets
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from admin_account.models import WorkAssignment, WorkType
+from user_account.models import TimeLog
+
+User = get_user_model()
+
+PREFIX = "storm_"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire a clock-in storm (every worker timing in at once) at one or more running "
+        "servers sharing this database, and report throughput and p50/p99 latency. "
+        "Example: start `gunicorn payroll_main.wsgi --threads 8 -b :8000` and "
+        "`uvicorn payroll_main.asgi:application --port 8001`, then run with "
+        "--target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001. "
+        "Use a copy of the database: storm users are created and removed again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", action="append", required=True,
+            help="NAME=BASE_URL of a running server; repeat to compare servers.",
+        )
+        parser.add_argument("--workers", type=int, default=200, help="Workers clocking in (one request each).")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument("--keep", action="store_true", help="Keep the storm users afterwards.")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, sep, url = target.partition("=")
+            if not sep or not url.startswith("http"):
+                raise CommandError(f"--target must look like name=http://host:port, got {target!r}.")
+            targets.append((name, url.rstrip("/")))
+
+        work_type, created, assignments = self._seed(options["workers"])
+        cookies = self._sessions(assignments)
+        try:
+            for name, url in targets:
+                # Every run starts with nobody clocked in
+                TimeLog.objects.filter(user__username__startswith=PREFIX).delete()
+                result = storm(url, assignments, cookies, work_type.id, options["concurrency"])
+                result["opened"] = TimeLog.objects.filter(
+                    user__username__startswith=PREFIX, time_out__isnull=True
+                ).count()
+                self._report(name, result)
+        finally:
+            if not options["keep"]:
+                User.objects.filter(username__startswith=PREFIX).delete()
+                # A "Storm Test" type that existed before this run is left alone
+                if created:
+                    work_type.delete()
+
+    def _seed(self, workers):
+        work_type, created = WorkType.objects.get_or_create(name="Storm Test")
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=f"{PREFIX}{i:05d}", password=password) for i in range(workers)],
+            ignore_conflicts=True,
+        )
+        users = list(User.objects.filter(username__startswith=PREFIX).order_by("username")[:workers])
+        assignments = []
+        for user in users:
+            assignment = WorkAssignment.objects.filter(user=user).first()
+            if assignment is None:
+                assignment = WorkAssignment.objects.create(user=user)
+                assignment.work_types.add(work_type)
+            assignment.user = user
+            assignments.append(assignment)
+        return work_type, created, assignments
+
+    def _sessions(self, assignments):
+        """A logged-in session cookie per worker, without going through the password hasher."""
+        cookies = {}
+        for assignment in assignments:
+            user = assignment.user
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            csrf = secrets.token_hex(16)  # 32 characters, the length of an unmasked CSRF secret
+            cookies[assignment.id] = (
+                f"{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={csrf}",
+                csrf,
+            )
+        return cookies
+
+    def _report(self, name, result):
+        self.stdout.write(
+            f"{name:>6}: {result['requests']} clock-ins in {result['elapsed']:.2f}s "
+            f"= {result['throughput']:.1f} req/s | p50 {result['p50_ms']:.1f}ms "
+            f"p99 {result['p99_ms']:.1f}ms | errors {result['errors']} | open logs {result['opened']}"
+        )
+
+
+def storm(base_url, assignments, cookies, work_type_id, concurrency):
+    """POST one clock-in per assignment to ``base_url`` with ``concurrency`` requests in flight."""
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+
+    def clock_in(assignment):
+        cookie, csrf = cookies[assignment.id]
+        path = parts.path + reverse("timelog_timein", args=[assignment.id, work_type_id])
+        conn = connection_class(parts.netloc, timeout=60)
+        started = time.perf_counter()
+        try:
+            conn.request("POST", path, headers={"Cookie": cookie, "X-CSRFToken": csrf, "Content-Length": "0"})
+            status = conn.getresponse().status
+        except OSError:
+            status = None
+        finally:
+            conn.close()
+        return status, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(clock_in, assignments))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "requests": len(results),
+        "elapsed": elapsed,
+        "throughput": len(results) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, round(0.99 * len(latencies)) - 1)],
+        "errors": sum(1 for status, _ in results if status != 302),
+    }
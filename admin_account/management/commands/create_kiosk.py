@@ -0,0 +1,42 @@
+import secrets
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user_account.models import Kiosk
+
+
+class Command(BaseCommand):
+    help = (
+        "Register a clock-in kiosk (or rotate its secret) and print the secret it "
+        "must use to sign punch batches for the kiosk_punch_sync endpoint. The secret "
+        "is shown once, when it is issued, and is never logged: copy it to the kiosk "
+        "then. A lost secret cannot be shown again; issue a new one with --rotate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", help="Unique kiosk name, sent as \"kiosk\" in every batch.")
+        parser.add_argument("--rotate", action="store_true", help="Issue a new secret for an existing kiosk.")
+        parser.add_argument("--deactivate", action="store_true", help="Refuse further batches from this kiosk.")
+
+    def handle(self, *args, **options):
+        if options["deactivate"]:
+            if not Kiosk.objects.filter(name=options["name"]).update(is_active=False):
+                raise CommandError(f"No kiosk named {options['name']}.")
+            self.stdout.write(f"Kiosk {options['name']} deactivated.")
+            return
+
+        kiosk, created = Kiosk.objects.get_or_create(
+            name=options["name"], defaults={"secret": secrets.token_hex(32)}
+        )
+        if not created and not options["rotate"]:
+            self.stdout.write(
+                f"Kiosk {kiosk.name} already exists; its secret is not shown again. "
+                "Use --rotate to issue a new one."
+            )
+            return
+        if not created:
+            kiosk.secret = secrets.token_hex(32)
+            kiosk.is_active = True
+            kiosk.save(update_fields=["secret", "is_active"])
+        # Written to the terminal only, this once
+        self.stdout.write(f"Kiosk {kiosk.name} ({'created' if created else 'rotated'}) secret: {kiosk.secret}")
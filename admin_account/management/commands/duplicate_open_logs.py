@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+from django.utils import timezone
+
+from payroll_main.db import write_transaction
+from user_account.models import TimeLog
+
+
+class Command(BaseCommand):
+    help = (
+        "List users with more than one open time log (they block the one-open-log "
+        "constraint migration). With --close, every open log but the newest is closed "
+        "at the time the next one was opened, and a note recording the change is added "
+        "to it. Review the list before closing: closed logs count towards payroll."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--close", action="store_true",
+            help="Close the older duplicates instead of only listing them.",
+        )
+
+    def handle(self, *args, **options):
+        users = list(
+            TimeLog.objects.filter(time_out__isnull=True)
+            .values("user_id").annotate(open_logs=Count("id")).filter(open_logs__gt=1)
+            .values_list("user_id", flat=True)
+        )
+        if not users:
+            self.stdout.write(self.style.SUCCESS("No user has more than one open time log."))
+            return
+
+        closed = 0
+        for user_id in users:
+            open_logs = list(
+                TimeLog.objects.filter(user_id=user_id, time_out__isnull=True)
+                .select_related("user")
+                .order_by(F("time_in").asc(nulls_first=True), "id")
+            )
+            self.stdout.write(f"{open_logs[0].user.username} (user {user_id}):")
+            for log in open_logs:
+                self.stdout.write(f"  log {log.id}: in {_when(log.time_in)}, {log.work_type_names or 'no type'}")
+            if options["close"]:
+                for log, next_log in zip(open_logs, open_logs[1:]):
+                    _close(log, next_log)
+                    closed += 1
+                    self.stdout.write(f"  closed log {log.id} at {_when(log.time_out)}")
+
+        if options["close"]:
+            self.stdout.write(self.style.SUCCESS(f"Closed {closed} duplicate open log(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(users)} user(s) have duplicate open logs; rerun with --close to close all but the newest."
+            ))
+
+
+def _when(value):
+    return f"{timezone.localtime(value):%Y-%m-%d %H:%M}" if value else "unknown time"
+
+
+@write_transaction
+def _close(log, next_log):
+    # TimeLog.save() adds the closed log to the hours rollup and refreshes the caches
+    log.time_out = next_log.time_in or log.time_in
+    note = (
+        f"Closed by duplicate_open_logs on {timezone.localtime():%Y-%m-%d %H:%M}: "
+        f"was still open when log {next_log.id} was opened."
+    )
+    log.notes = f"{log.notes}\n{note}" if log.notes else note
+    log.save()
@@ -0,0 +1,39 @@
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_account.payouts import CHANNELS, PayoutError, closed_week, payout_rows
+
+
+class Command(BaseCommand):
+    help = "Write GCash and bank disbursement files for a closed pay week."
+
+    def add_arguments(self, parser):
+        parser.add_argument("week", help="Any day of the pay week (YYYY-MM-DD); payroll must have been run for it.")
+        parser.add_argument("--dir", default=".", help="Directory to write the batch files to.")
+
+    def handle(self, *args, **options):
+        try:
+            week_start = datetime.strptime(options["week"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"week must be a date in YYYY-MM-DD format, got {options['week']!r}.")
+        try:
+            week_start = closed_week(week_start)
+        except PayoutError as exc:
+            raise CommandError(str(exc))
+
+        out_dir = Path(options["dir"])
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        for channel in CHANNELS:
+            started = time.perf_counter()
+            path = out_dir / f"payout_{channel}_{week_start:%Y%m%d}.csv"
+            with path.open("w", newline="", encoding="utf-8") as f:
+                for line in payout_rows(week_start, channel):
+                    f.write(line)
+                    control = line
+            self.stdout.write(self.style.SUCCESS(
+                f"{channel}: {control.strip()} -> {path} ({time.perf_counter() - started:.2f}s)"
+            ))
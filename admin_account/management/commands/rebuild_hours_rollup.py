@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from admin_account import caching
+from admin_account.models import DailyHours, WeeklyHours
+from admin_account.rollup import compute_from_logs
+from user_account.models import ArchivedTimeLog, TimeLog
+
+
+class Command(BaseCommand):
+    help = "Verify the daily/weekly hours rollup against raw time logs and rebuild it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only check/rebuild this user id.")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report mismatches; exit with an error if any are found.",
+        )
+
+    def _stored(self, model, date_field, user_id):
+        rows = model.objects.all()
+        if user_id:
+            rows = rows.filter(user_id=user_id)
+        return {
+            (uid, date): [hours, count]
+            for uid, date, hours, count in rows.values_list("user_id", date_field, "total_hours", "log_count")
+            if count or hours
+        }
+
+    def _diff(self, expected, stored):
+        keys = set(expected) | set(stored)
+        return sorted(k for k in keys if expected.get(k) != stored.get(k))
+
+    def handle(self, *args, **options):
+        user_id = options["user"]
+        logs, archived = TimeLog.objects.all(), ArchivedTimeLog.objects.all()
+        if user_id:
+            logs, archived = logs.filter(user_id=user_id), archived.filter(user_id=user_id)
+
+        # Archived logs keep counting towards the rollup
+        daily, weekly = compute_from_logs(logs, archived)
+        daily_diff = self._diff(daily, self._stored(DailyHours, "day", user_id))
+        weekly_diff = self._diff(weekly, self._stored(WeeklyHours, "week_start", user_id))
+
+        for uid, date in weekly_diff[:20]:
+            self.stdout.write(f"  week mismatch: user={uid} week_start={date}")
+        summary = f"{len(daily_diff)} daily and {len(weekly_diff)} weekly buckets differ from raw logs"
+
+        if options["check"]:
+            if daily_diff or weekly_diff:
+                raise CommandError(summary)
+            self.stdout.write(self.style.SUCCESS("Rollup matches raw logs."))
+            return
+
+        with transaction.atomic():
+            for model, date_field, totals in (
+                (DailyHours, "day", daily),
+                (WeeklyHours, "week_start", weekly),
+            ):
+                existing = model.objects.all()
+                if user_id:
+                    existing = existing.filter(user_id=user_id)
+                existing.delete()
+                model.objects.bulk_create(
+                    [
+                        model(user_id=uid, total_hours=hours, log_count=count, **{date_field: date})
+                        for (uid, date), (hours, count) in totals.items()
+                    ],
+                    batch_size=1000,
+                )
+
+        # Cached week lists and summaries built from the old buckets are stale now
+        caching.bump(
+            [("user", uid) for uid, _ in weekly_diff]
+            + [caching.week_scope(uid, week_start) for uid, week_start in weekly_diff]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary}; rebuilt {len(daily)} daily and {len(weekly)} weekly buckets."
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_account import account_jobs
+from admin_account.models import AccountJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Run unfinished account deactivation/deletion jobs to completion, e.g. after "
+        "a restart interrupted their background thread. Finished chunks are not redone. "
+        "Running jobs are only picked up once their heartbeat is older than "
+        "ACCOUNT_JOB_STALE_AFTER seconds, so a job whose thread is still alive is left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, help="Only run this job id.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=account_jobs.CHUNK_SIZE, help="Rows per write transaction."
+        )
+
+    def handle(self, *args, **options):
+        jobs = account_jobs.resumable_jobs().order_by("created_at")
+        if options["job"]:
+            jobs = jobs.filter(pk=options["job"])
+            if not jobs.exists():
+                if AccountJob.objects.filter(pk=options["job"], status=AccountJob.RUNNING).exists():
+                    raise CommandError(f"Job {options['job']} is still running.")
+                raise CommandError(f"No unfinished job with id {options['job']}.")
+
+        for job in jobs:
+            if not account_jobs.claim(job):
+                self.stdout.write(f"{job.kind} {job.username}: picked up by another runner, skipped.")
+                continue
+            self.stdout.write(f"{job.kind} {job.username}: resuming at {job.processed}/{job.total}...")
+            job = account_jobs.run_job(job, chunk_size=options["chunk_size"])
+            self.stdout.write(self.style.SUCCESS(f"{job.kind} {job.username}: {job.status}"))
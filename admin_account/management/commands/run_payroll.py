@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from admin_account.payroll import run_payroll, week_start_for
+
+
+class Command(BaseCommand):
+    help = "Compute weekly payroll (total hours and pay) for every user in one pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--week",
+            help="Any date (YYYY-MM-DD) in the first week to close. Defaults to last week.",
+        )
+        parser.add_argument(
+            "--until",
+            help="Any date (YYYY-MM-DD) in the last week to close. Defaults to --week.",
+        )
+
+    def _parse(self, value, option):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"{option} must be a date in YYYY-MM-DD format, got {value!r}.")
+
+    def handle(self, *args, **options):
+        if options["week"]:
+            first_week = self._parse(options["week"], "--week")
+        else:
+            first_week = week_start_for(timezone.localdate()) - timedelta(days=7)
+        last_week = self._parse(options["until"], "--until") if options["until"] else first_week
+
+        if last_week < first_week:
+            raise CommandError("--until must not be before --week.")
+
+        result = run_payroll(first_week, last_week)
+        self.stdout.write(self.style.SUCCESS(
+            f"Payroll run: {result.rows} rows over {result.weeks} week(s) "
+            f"in {result.elapsed:.3f}s ({result.rows_per_second:.0f} rows/s)"
+        ))
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:38
+
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.timezone import localtime
+
+
+def backfill_rollup(apps, schema_editor):
+    TimeLog = apps.get_model("user_account", "TimeLog")
+    DailyHours = apps.get_model("admin_account", "DailyHours")
+    WeeklyHours = apps.get_model("admin_account", "WeeklyHours")
+
+    daily = defaultdict(lambda: [Decimal("0.00"), 0])
+    weekly = defaultdict(lambda: [Decimal("0.00"), 0])
+    rows = TimeLog.objects.filter(time_in__isnull=False, time_out__isnull=False).values_list(
+        "user_id", "time_in", "time_out"
+    )
+    for user_id, time_in, time_out in rows.iterator(chunk_size=2000):
+        hours = Decimal((time_out - time_in).total_seconds() / 3600).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        day = localtime(time_in).date()
+        week_start = day - timedelta(days=day.weekday())
+        daily[(user_id, day)][0] += hours
+        daily[(user_id, day)][1] += 1
+        weekly[(user_id, week_start)][0] += hours
+        weekly[(user_id, week_start)][1] += 1
+
+    DailyHours.objects.bulk_create(
+        [DailyHours(user_id=u, day=d, total_hours=h, log_count=c) for (u, d), (h, c) in daily.items()],
+        batch_size=1000,
+    )
+    WeeklyHours.objects.bulk_create(
+        [WeeklyHours(user_id=u, week_start=w, total_hours=h, log_count=c) for (u, w), (h, c) in weekly.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_account', '0003_weeklypayroll'),
+        ('user_account', '0004_timelog_work_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('log_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_hours', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('log_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_hours', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'week_start')},
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -41,3 +41,76 @@ class WeeklyPayroll(models.Model):
 
     def __str__(self):
         return f"{self.user.username} | {self.week_start} | ₱{self.total_pay}"
+
+
+class DailyHours(models.Model):
+    """Completed hours per user per local day, kept up to date as logs are closed or deleted."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_hours")
+    day = models.DateField()
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    log_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "day")
+
+    def __str__(self):
+        return f"{self.user.username} | {self.day} | {self.total_hours} hrs"
+
+
+class WeeklyHours(models.Model):
+    """Completed hours per user per week (Monday start), kept up to date alongside DailyHours."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="weekly_hours")
+    week_start = models.DateField()
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    log_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "week_start")
+
+    def __str__(self):
+        return f"{self.user.username} | {self.week_start} | {self.total_hours} hrs"
+
+
+class AccountJob(models.Model):
+    """A resumable, chunked deactivation or deletion of one user account (see account_jobs.py)."""
+    DEACTIVATE = "deactivate"
+    DELETE = "delete"
+    KIND_CHOICES = [(DEACTIVATE, "Deactivate"), (DELETE, "Delete")]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    DONE = "done"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (FAILED, "Failed"), (DONE, "Done")]
+
+    # Kept (as NULL) after a deletion finishes, so the job still reports what happened
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="account_jobs")
+    username = models.CharField(max_length=150)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    step = models.CharField(max_length=50, blank=True)
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Starting a job twice resumes the unfinished one instead
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=~models.Q(status="done"),
+                name="account_job_one_unfinished_per_user",
+            ),
+        ]
+
+    @property
+    def percent(self):
+        if self.status == self.DONE:
+            return 100
+        return min(99, self.processed * 100 // self.total) if self.total else 0
+
+    def __str__(self):
+        return f"{self.kind} {self.username} | {self.status} {self.processed}/{self.total}"
@@ -0,0 +1,128 @@
+# admin_account/pagination.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import F, Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class KeysetPage:
+    """A page of rows fetched with keyset (cursor) pagination.
+
+    Unlike ``Paginator`` it never counts or offsets the queryset, so the
+    cost of a page does not grow with the size of the table.
+    """
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def encode_cursor(time_in, pk):
+    """Encode a ``(time_in, id)`` position as a URL-safe token."""
+    if time_in is None:
+        return f"n_{pk}"
+    micros = (time_in - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{pk}"
+
+
+def decode_cursor(token):
+    """Decode a token from ``encode_cursor``. Returns None if it is invalid."""
+    try:
+        raw_time, raw_pk = token.split("_", 1)
+        pk = int(raw_pk)
+        if raw_time == "n":
+            return None, pk
+        micros = int(raw_time)
+    except (AttributeError, ValueError):
+        return None
+    try:
+        time_in = EPOCH + timedelta(microseconds=micros)
+    except OverflowError:
+        return None
+    return time_in, pk
+
+
+def _older_than(time_in, pk):
+    # Rows that come after (time_in, pk) in "newest first" order (NULLs last).
+    if time_in is None:
+        return Q(time_in__isnull=True, id__lt=pk)
+    return (
+        Q(time_in__lt=time_in)
+        | Q(time_in=time_in, id__lt=pk)
+        | Q(time_in__isnull=True)
+    )
+
+
+def _newer_than(time_in, pk):
+    # Rows that come before (time_in, pk) in "newest first" order (NULLs last).
+    if time_in is None:
+        return Q(time_in__isnull=False) | Q(time_in__isnull=True, id__gt=pk)
+    return Q(time_in__gt=time_in) | Q(time_in=time_in, id__gt=pk)
+
+
+def _sort_key(row):
+    # "newest first" order on (time_in, id), NULL time_in last
+    return (row.time_in is not None, row.time_in or EPOCH, row.id)
+
+
+def keyset_paginate(queryset, after=None, before=None, per_page=5, archive=None, archive_newest=None):
+    """
+    Return a ``KeysetPage`` of ``queryset`` ordered newest first on
+    ``(time_in, id)``.
+
+    ``after`` / ``before`` are cursor tokens taken from a previous page's
+    ``next_cursor`` / ``previous_cursor``. Only ``per_page + 1`` rows are
+    read; the extra row tells us whether another page exists.
+
+    ``archive`` is an optional queryset over the same rows' cold partition,
+    none of them newer than ``archive_newest``. It is read (another
+    ``per_page + 1`` rows at most) only when the page reaches that far back,
+    and merged into the page.
+    """
+    newest_first = (F("time_in").desc(nulls_last=True), F("id").desc())
+    oldest_first = (F("time_in").asc(nulls_first=True), F("id").asc())
+
+    after_key = decode_cursor(after) if after else None
+    before_key = decode_cursor(before) if before and not after_key else None
+
+    if before_key:
+        rows = list(queryset.filter(_newer_than(*before_key)).order_by(*oldest_first)[:per_page + 1])
+        if archive is not None and before_key[0] is not None and before_key[0] <= archive_newest:
+            rows += archive.filter(_newer_than(*before_key)).order_by(*oldest_first)[:per_page + 1]
+            rows = sorted(rows, key=_sort_key)[:per_page + 1]
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after_key:
+            queryset = queryset.filter(_older_than(*after_key))
+        rows = list(queryset.order_by(*newest_first)[:per_page + 1])
+        # A full hot page that ends after the newest archived row cannot contain archived rows
+        if archive is not None and (
+            len(rows) <= per_page or rows[-1].time_in is None or rows[-1].time_in <= archive_newest
+        ):
+            if after_key:
+                archive = archive.filter(_older_than(*after_key))
+            rows += archive.order_by(*newest_first)[:per_page + 1]
+            rows = sorted(rows, key=_sort_key, reverse=True)[:per_page + 1]
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after_key is not None
+
+    next_cursor = encode_cursor(rows[-1].time_in, rows[-1].id) if rows and has_next else None
+    previous_cursor = encode_cursor(rows[0].time_in, rows[0].id) if rows and has_previous else None
+
+    return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor)
@@ -0,0 +1,84 @@
+# admin_account/payouts.py
+import csv
+import re
+from decimal import Decimal
+
+from django.db.models import Q
+
+from .exports import CHUNK_SIZE, Echo, csv_safe
+from .models import WeeklyPayroll
+from .payroll import week_start_for
+
+CHANNELS = ("gcash", "bank")
+# What the profile forms accept; "+63..." must reach the bank unchanged
+ACCOUNT_NUMBER = re.compile(r"\+?[0-9]+")
+
+HEADERS = {
+    "gcash": ["reference", "gcash_number", "gcash_name", "amount"],
+    "bank": ["reference", "bank_name", "account_number", "account_name", "amount"],
+}
+
+
+class PayoutError(Exception):
+    """The requested week cannot be paid out (payroll has not been run for it)."""
+
+
+def closed_week(day):
+    """Monday of the pay week containing ``day``, once payroll has been run for it."""
+    week_start = week_start_for(day)
+    if not WeeklyPayroll.objects.filter(week_start=week_start).exists():
+        raise PayoutError(f"Payroll has not been run for the week of {week_start:%Y-%m-%d}.")
+    return week_start
+
+
+def payout_queryset(week_start, channel):
+    """
+    Payable rows for ``week_start`` joined with each user's Profile in one query.
+
+    Users with a GCash number are paid through GCash; everyone else with a
+    bank account number goes to the bank batch.
+    """
+    payrolls = WeeklyPayroll.objects.filter(week_start=week_start, total_pay__gt=0)
+    has_gcash = Q(user__profile__gcash_number__gt="")
+    if channel == "gcash":
+        payrolls = payrolls.filter(has_gcash)
+    else:
+        payrolls = payrolls.exclude(has_gcash).filter(user__profile__bank_number__gt="")
+    return payrolls.order_by("user_id").values_list(
+        "user_id",
+        "user__profile__full_name",
+        "user__profile__gcash_number",
+        "user__profile__gcash_name",
+        "user__profile__bank_name",
+        "user__profile__bank_number",
+        "total_pay",
+    )
+
+
+def account_number(value):
+    """``value`` as is when it is a plain number, else neutralized (it was saved before numbers were validated)."""
+    return value if ACCOUNT_NUMBER.fullmatch(value) else csv_safe(value)
+
+
+def payout_rows(week_start, channel):
+    """
+    Yield the CSV lines of one disbursement file, ending with a control row
+    holding the payee count and total amount. Rows are streamed, so memory
+    use does not depend on the number of payees.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(HEADERS[channel])
+
+    count, total = 0, Decimal("0.00")
+    rows = payout_queryset(week_start, channel).iterator(chunk_size=CHUNK_SIZE)
+    for user_id, full_name, gcash_number, gcash_name, bank_name, bank_number, amount in rows:
+        reference = f"XJG-{week_start:%Y%m%d}-{user_id}"
+        if channel == "gcash":
+            row = [reference, account_number(gcash_number), csv_safe(gcash_name), amount]
+        else:
+            row = [reference, csv_safe(bank_name), account_number(bank_number), csv_safe(full_name), amount]
+        count += 1
+        total += amount
+        yield writer.writerow(row)
+
+    yield writer.writerow(["CONTROL", count, total])
@@ -0,0 +1,110 @@
+# admin_account/payroll.py
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from . import caching
+from .models import WeeklyHours, WeeklyPayroll
+
+User = get_user_model()
+
+CENTS = Decimal("0.01")
+
+
+@dataclass
+class PayrollRunResult:
+    weeks: int
+    rows: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else float(self.rows)
+
+
+def week_start_for(day):
+    """Return the Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+def run_payroll(first_week, last_week=None):
+    """
+    Compute ``total_hours`` and ``total_pay`` for every user with completed
+    logs in the weeks from ``first_week`` to ``last_week`` (inclusive).
+
+    Hours come from the ``WeeklyHours`` rollup, so payroll uses the same
+    per-log rounding as the weekly summary and archived weeks keep counting.
+    Rows are written with a single ``bulk_create(update_conflicts=True)`` on
+    the ``("user", "week_start")`` unique constraint. The rate of an existing
+    payroll row is kept; new rows carry over the user's latest earlier rate.
+    Existing rows for weeks whose logs were all deleted are zeroed.
+    """
+    started = time.perf_counter()
+    first_week = week_start_for(first_week)
+    last_week = week_start_for(last_week or first_week)
+
+    totals = {
+        (user_id, week): hours
+        for user_id, week, hours in WeeklyHours.objects.filter(
+            week_start__gte=first_week, week_start__lte=last_week, log_count__gt=0
+        ).values_list("user_id", "week_start", "total_hours")
+    }
+
+    existing = {
+        (user_id, week): (rate, total_hours or total_pay)
+        for user_id, week, rate, total_hours, total_pay in WeeklyPayroll.objects.filter(
+            week_start__gte=first_week, week_start__lte=last_week
+        ).values_list("user_id", "week_start", "rate", "total_hours", "total_pay")
+    }
+    # Weeks that lost all their logs since the last run
+    for key, (_, paid) in existing.items():
+        if key not in totals and paid:
+            totals[key] = Decimal("0.00")
+    # Latest rate each user had before this run, used for brand new rows
+    previous_rates = dict(
+        User.objects.annotate(
+            latest_rate=Subquery(
+                WeeklyPayroll.objects.filter(user=OuterRef("pk"), week_start__lt=first_week)
+                .order_by("-week_start")
+                .values("rate")[:1]
+            )
+        )
+        .filter(latest_rate__isnull=False)
+        .values_list("id", "latest_rate")
+    )
+
+    payrolls = []
+    for (user_id, week), total_hours in totals.items():
+        if (user_id, week) in existing:
+            rate = existing[user_id, week][0]
+        else:
+            rate = previous_rates.get(user_id, Decimal("0.00"))
+        payrolls.append(WeeklyPayroll(
+            user_id=user_id,
+            week_start=week,
+            rate=rate,
+            total_hours=total_hours,
+            total_pay=(total_hours * rate).quantize(CENTS, rounding=ROUND_HALF_UP),
+        ))
+
+    with transaction.atomic():
+        WeeklyPayroll.objects.bulk_create(
+            payrolls,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["user", "week_start"],
+            update_fields=["total_hours", "total_pay"],
+        )
+    # bulk_create sends no post_save signals, so drop the cached week lists here
+    caching.bump([("user", payroll.user_id) for payroll in payrolls])
+
+    return PayrollRunResult(
+        weeks=(last_week - first_week).days // 7 + 1,
+        rows=len(payrolls),
+        elapsed=time.perf_counter() - started,
+    )
@@ -0,0 +1,100 @@
+# admin_account/rollup.py
+"""
+Incrementally maintained hours rollup (DailyHours / WeeklyHours).
+
+``TimeLog.save()`` / ``TimeLog.delete()`` keep it in sync for single logs.
+Bulk ``.update()`` / ``.delete()`` paths never go through those methods, so
+they must call ``record_logs`` / ``discard_logs`` explicitly.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.timezone import localtime
+
+from .models import DailyHours, WeeklyHours
+
+CENTS = Decimal("0.01")
+
+
+def log_hours(time_in, time_out):
+    """Hours for one log, rounded the same way the weekly summary rounds them."""
+    return Decimal((time_out - time_in).total_seconds() / 3600).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def bucket_for(time_in):
+    """Return the (local day, week start) a log belongs to."""
+    day = localtime(time_in).date()
+    return day, day - timedelta(days=day.weekday())
+
+
+def _collect(rows, sign):
+    daily = defaultdict(lambda: [Decimal("0.00"), 0])
+    weekly = defaultdict(lambda: [Decimal("0.00"), 0])
+    for user_id, time_in, time_out in rows:
+        if not (time_in and time_out):
+            continue
+        hours = log_hours(time_in, time_out) * sign
+        day, week_start = bucket_for(time_in)
+        daily[(user_id, day)][0] += hours
+        daily[(user_id, day)][1] += sign
+        weekly[(user_id, week_start)][0] += hours
+        weekly[(user_id, week_start)][1] += sign
+    return daily, weekly
+
+
+def _bump(model, date_field, totals):
+    for (user_id, date), (hours, count) in totals.items():
+        lookup = {"user_id": user_id, date_field: date}
+        changes = {
+            "total_hours": F("total_hours") + hours,
+            "log_count": F("log_count") + count,
+        }
+        if model.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, total_hours=hours, log_count=count)
+        except IntegrityError:
+            # Another request created the bucket first
+            model.objects.filter(**lookup).update(**changes)
+
+
+def _apply(rows, sign):
+    daily, weekly = _collect(rows, sign)
+    if not daily:
+        return
+    with transaction.atomic():
+        _bump(DailyHours, "day", daily)
+        _bump(WeeklyHours, "week_start", weekly)
+
+
+def record_logs(rows):
+    """Add newly completed logs, given as ``(user_id, time_in, time_out)`` rows, to the rollup."""
+    _apply(rows, 1)
+
+
+def discard_logs(rows):
+    """Remove completed logs, given as ``(user_id, time_in, time_out)`` rows, from the rollup."""
+    _apply(rows, -1)
+
+
+def compute_from_logs(*querysets):
+    """
+    Recompute the rollup from raw logs.
+
+    Each queryset (TimeLog, and ArchivedTimeLog for archived history) is
+    streamed with ``values_list`` so memory stays flat. Returns
+    ``(daily, weekly)`` dicts keyed by ``(user_id, date)`` with
+    ``[total_hours, log_count]`` values.
+    """
+    rows = (
+        row
+        for logs in querysets
+        for row in logs.filter(time_in__isnull=False, time_out__isnull=False)
+        .values_list("user_id", "time_in", "time_out")
+        .iterator(chunk_size=2000)
+    )
+    return _collect(rows, 1)
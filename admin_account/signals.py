@@ -1,16 +1,41 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from .models import WorkType
+from .models import WorkAssignment, WorkType, WeeklyPayroll
+from . import caching
+from .dropdowns import invalidate_work_type_options
 from user_account.models import TimeLog
 
 @receiver(post_save, sender=WorkType)
-def cleanup_ongoing_logs_on_archive(sender, instance, **kwargs):
-    """
-    Delete ongoing timelogs (no time_out) when a WorkType is archived.
-    Completed logs stay untouched.
-    """
-    if not instance.is_active:  # Archived
-        TimeLog.objects.filter(
-            task__work_types=instance,
-            time_out__isnull=True
-        ).delete()
+def refresh_work_type_options(sender, instance, **kwargs):
+    """Renaming or archiving a WorkType invalidates the cached filter dropdowns."""
+    invalidate_work_type_options()
+
+
+@receiver(post_save, sender=TimeLog)
+@receiver(post_delete, sender=TimeLog)
+def bump_timelog_caches(sender, instance, **kwargs):
+    """A log changed: drop its user's cached week list and the summaries of its old and new weeks."""
+    rows = [(instance.user_id, instance.time_in)]
+    saved_bounds = getattr(instance, "_saved_bounds", None)  # still the stored values during post_save
+    if saved_bounds:
+        rows.append(saved_bounds[:2])
+    caching.bump_logs(rows)
+
+
+@receiver(post_save, sender=WorkAssignment)
+@receiver(post_delete, sender=WorkAssignment)
+def bump_assignment_caches(sender, instance, **kwargs):
+    caching.bump([("user", instance.user_id)])
+
+
+@receiver(m2m_changed, sender=WorkAssignment.work_types.through)
+def bump_assignment_work_type_caches(sender, instance, action, **kwargs):
+    if action.startswith("post_") and isinstance(instance, WorkAssignment):
+        caching.bump([("user", instance.user_id)])
+
+
+@receiver(post_save, sender=WeeklyPayroll)
+@receiver(post_delete, sender=WeeklyPayroll)
+def bump_payroll_caches(sender, instance, **kwargs):
+    # Week lists show payroll rows; the cached weekly summary data does not
+    caching.bump([("user", instance.user_id)])
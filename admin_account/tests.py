@@ -1,10 +1,28 @@
-from django.test import TestCase, LiveServerTestCase
+import time
+from threading import Event, Thread
+from django.conf import settings
+from django.test import Client, TestCase, LiveServerTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
 from django.urls import reverse
-from django.utils.timezone import make_aware, now
+from django.utils.timezone import localdate, make_aware, now
 from datetime import timedelta, datetime
+from decimal import Decimal
 from django.contrib.auth.models import User
-from admin_account.models import WorkType, WorkAssignment
-from user_account.models import TimeLog
+from django.core.management import call_command
+from io import StringIO
+from django.core.management.base import CommandError
+from admin_account.models import AccountJob, WorkType, WorkAssignment, WeeklyPayroll, DailyHours, WeeklyHours
+from admin_account.payroll import run_payroll, week_start_for
+from admin_account import urls as admin_urls
+from admin_account.dropdowns import work_type_options
+from admin_account import account_jobs, caching, worktype_archive
+from admin_account.benchmarks import DataSize, compare, run_benchmarks
+from user_account.models import ArchivedTimeLog, ArchivedTimeLogWorkType, TimeLog, TimeLogWorkType
+from user_account import archive
+from accounts.models import Profile
+from payroll_main.testing import QueryContractMixin, add_logs, seed_history
 
 
 class WeeklyPayrollTest(TestCase):
@@ -48,6 +66,20 @@ class WeeklyPayrollTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Weekly Payroll")  # sanity check
 
+    def test_week_list_buckets_hours_in_two_queries(self):
+        url = reverse("user_week_list", args=[self.user.id])
+        # session + auth user + selected user, then the week buckets and payroll rows
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+
+        weeks = response.context["all_weeks"]
+        logged = [w for w in weeks if w["has_logs"]]
+        # Today's log falls in the current week, which is not listed yet
+        self.assertEqual(len(logged), 4)
+        for week in logged:
+            self.assertEqual(week["start"].weekday(), 0)
+            self.assertEqual(week["hours"], Decimal("4.00"))
+
     def test_week_summary_view(self):
         week_start = (now().date() - timedelta(days=28))  # 4 weeks ago Monday
         url = reverse("user_weekly_summary", args=[self.user.id, week_start.strftime("%Y-%m-%d")])
@@ -59,6 +91,1128 @@ class WeeklyPayrollTest(TestCase):
         self.assertContains(response, "₱400")  # 4 hrs * 100 rate
 
 
+class TaskListKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+
+        self.user = User.objects.create_user(username="shift_tester", password="test123")
+        self.work_type = WorkType.objects.create(name="Packing")
+        self.assignment = WorkAssignment.objects.create(user=self.user)
+        self.assignment.work_types.add(self.work_type)
+
+        # 12 finished logs, one per hour (two share a time_in to exercise the id tiebreak)
+        base = make_aware(datetime(2025, 1, 6, 8, 0))
+        self.logs = []
+        for i in range(12):
+            time_in = base + timedelta(hours=min(i, 10))
+            self.logs.append(TimeLog.objects.create(
+                user=self.user,
+                task=self.assignment,
+                work_type=self.work_type,
+                time_in=time_in,
+                time_out=time_in + timedelta(minutes=30),
+            ))
+
+    def _ids(self, response):
+        return [row["id"] for row in response.context["page_obj"]]
+
+    def test_walks_all_pages_forward_and_back(self):
+        url = reverse("task_list")
+        expected = [log.id for log in sorted(self.logs, key=lambda l: (l.time_in, l.id), reverse=True)]
+
+        response = self.client.get(url, {"status_filter": "done"})
+        pages = [self._ids(response)]
+        page_obj = response.context["page_obj"]
+        self.assertFalse(page_obj.has_previous)
+        while page_obj.has_next:
+            response = self.client.get(url, {"status_filter": "done", "after": page_obj.next_cursor})
+            page_obj = response.context["page_obj"]
+            pages.append(self._ids(response))
+
+        self.assertEqual([len(p) for p in pages], [5, 5, 2])
+        self.assertEqual(sum(pages, []), expected)
+
+        # Step back from the last page
+        response = self.client.get(url, {"status_filter": "done", "before": page_obj.previous_cursor})
+        self.assertEqual(self._ids(response), pages[1])
+        self.assertTrue(response.context["page_obj"].has_previous)
+
+    def test_page_links_keep_filters_and_anchor(self):
+        response = self.client.get(reverse("task_list"), {"work_type_filter": "Packing"})
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertContains(
+            response,
+            f"?work_type_filter=Packing&amp;after={next_cursor}#task-table",
+        )
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse("task_list"), {"after": "garbage"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._ids(response)), 5)
+
+
+class TaskListQueryCountTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+
+        self.active_type = WorkType.objects.create(name="Packing")
+        self.archived_type = WorkType.objects.create(name="Sorting", is_active=False)
+        cache.clear()
+
+    def _add_logs(self, count):
+        base = make_aware(datetime(2025, 1, 6, 8, 0))
+        for i in range(count):
+            user = User.objects.create_user(username=f"worker_{TimeLog.objects.count()}")
+            assignment = WorkAssignment.objects.create(user=user)
+            assignment.work_types.add(self.active_type if i % 2 else self.archived_type)
+            log = TimeLog.objects.create(
+                user=user,
+                task=assignment,
+                time_in=base + timedelta(hours=i),
+                time_out=None if i % 3 == 0 else base + timedelta(hours=i, minutes=30),
+            )
+            if i % 4 == 0:
+                # Legacy row without a name snapshot
+                TimeLog.objects.filter(pk=log.pk).update(work_type_names=None)
+
+    def _count_queries(self):
+        cache.clear()  # measure the uncached dropdown path too
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("task_list"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_logs(self):
+        self._add_logs(8)
+        small = self._count_queries()
+        self._add_logs(40)
+        large = self._count_queries()
+        self.assertEqual(small, large)
+
+    def test_hides_ongoing_logs_without_active_work_type(self):
+        self._add_logs(6)
+        response = self.client.get(reverse("task_list"), {"status_filter": "ongoing"})
+        shown = {row["id"] for row in response.context["page_obj"]}
+        expected = set(
+            TimeLog.objects.filter(
+                time_out__isnull=True, task__work_types=self.active_type
+            ).values_list("id", flat=True)
+        )
+        self.assertEqual(shown, expected)
+
+    def test_unnamed_logs_fall_back_to_assignment_work_types(self):
+        self._add_logs(6)
+        response = self.client.get(reverse("task_list"))
+        self.assertEqual(response.context["all_work_types"], ["Packing", "Sorting"])
+
+
+class ManageUsersTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.work_type = WorkType.objects.create(name="Packing")
+
+        # On-going: assigned with an open log
+        self.ongoing = User.objects.create_user(username="Carla")
+        assignment = WorkAssignment.objects.create(user=self.ongoing)
+        assignment.work_types.add(self.work_type)
+        TimeLog.objects.create(user=self.ongoing, task=assignment, time_in=now())
+
+        # Standby: assigned, nothing open
+        self.standby = User.objects.create_user(username="ben")
+        WorkAssignment.objects.create(user=self.standby).work_types.add(self.work_type)
+
+        # Unassigned + deactivated
+        self.unassigned = User.objects.create_user(username="alma", is_active=False)
+
+    def _rows(self, **params):
+        response = self.client.get(reverse("manage_users"), params)
+        self.assertEqual(response.status_code, 200)
+        return [(row["user"].username, row["work_status"], row["account_status"])
+                for row in response.context["page_obj"]]
+
+    def test_statuses_and_sorting(self):
+        self.assertEqual(self._rows(), [
+            ("alma", "Unassigned", "Deactivated"),
+            ("ben", "Standby", "Active"),
+            ("Carla", "On-going", "Active"),
+        ])
+        self.assertEqual([r[0] for r in self._rows(sort="desc")], ["Carla", "ben", "alma"])
+
+    def test_filters_and_name_search(self):
+        self.assertEqual([r[0] for r in self._rows(work_filter="Standby")], ["ben"])
+        self.assertEqual([r[0] for r in self._rows(account_filter="Deactivated")], ["alma"])
+        self.assertEqual([r[0] for r in self._rows(name_search="CAR")], ["Carla"])
+
+    def test_query_count_does_not_grow_with_users(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse("manage_users"))
+            return len(ctx.captured_queries)
+
+        small = count_queries()
+        for i in range(30):
+            user = User.objects.create_user(username=f"extra_{i}")
+            WorkAssignment.objects.create(user=user).work_types.add(self.work_type)
+        self.assertEqual(small, count_queries())
+
+
+class PayrollRunTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+
+        self.week = datetime(2025, 3, 3).date()  # Monday
+        self.alice = User.objects.create_user(username="alice")
+        self.bob = User.objects.create_user(username="bob")
+
+        # alice: 3h + 5h this week, rate 50 carried over from the previous week
+        WeeklyPayroll.objects.create(user=self.alice, week_start=self.week - timedelta(days=7), rate=Decimal("50"))
+        self._log(self.alice, self.week, 8, 3)
+        self._log(self.alice, self.week + timedelta(days=6), 20, 5)  # Sunday evening
+        # bob: 2.5h, no rate yet; plus a log in the following week that must be ignored
+        self._log(self.bob, self.week + timedelta(days=2), 9, 2.5)
+        self._log(self.bob, self.week + timedelta(days=7), 9, 4)
+
+    def _log(self, user, day, hour, hours):
+        time_in = make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=hour)
+        TimeLog.objects.create(user=user, time_in=time_in, time_out=time_in + timedelta(hours=hours))
+
+    def test_computes_every_user_for_the_week(self):
+        result = run_payroll(self.week)
+        self.assertEqual(result.rows, 2)
+
+        alice = WeeklyPayroll.objects.get(user=self.alice, week_start=self.week)
+        self.assertEqual(alice.total_hours, Decimal("8.00"))
+        self.assertEqual(alice.rate, Decimal("50.00"))
+        self.assertEqual(alice.total_pay, Decimal("400.00"))
+
+        bob = WeeklyPayroll.objects.get(user=self.bob, week_start=self.week)
+        self.assertEqual(bob.total_hours, Decimal("2.50"))
+        self.assertEqual(bob.total_pay, Decimal("0.00"))
+
+    def test_rerun_updates_in_place_and_keeps_rate(self):
+        run_payroll(self.week)
+        WeeklyPayroll.objects.filter(user=self.bob, week_start=self.week).update(rate=Decimal("100"))
+        self._log(self.bob, self.week + timedelta(days=3), 9, 1)
+
+        run_payroll(self.week)
+        bob = WeeklyPayroll.objects.get(user=self.bob, week_start=self.week)
+        self.assertEqual(bob.total_hours, Decimal("3.50"))
+        self.assertEqual(bob.total_pay, Decimal("350.00"))
+        self.assertEqual(WeeklyPayroll.objects.filter(week_start=self.week).count(), 2)
+
+    def test_hours_match_the_weekly_summary_rounding(self):
+        # 20 minutes is 0.33h per log, so three logs are 0.99h (one 60-minute sum would give 1.00h)
+        carol = User.objects.create_user(username="carol")
+        for hour in (8, 10, 12):
+            self._log(carol, self.week + timedelta(days=1), hour, 1 / 3)
+        run_payroll(self.week)
+        self.assertEqual(
+            WeeklyPayroll.objects.get(user=carol, week_start=self.week).total_hours,
+            WeeklyHours.objects.get(user=carol, week_start=self.week).total_hours,
+        )
+        self.assertEqual(WeeklyHours.objects.get(user=carol, week_start=self.week).total_hours, Decimal("0.99"))
+
+    def test_rerun_zeroes_weeks_whose_logs_were_deleted(self):
+        run_payroll(self.week)
+        WeeklyPayroll.objects.filter(user=self.alice, week_start=self.week).update(rate=Decimal("50"))
+        for log in TimeLog.objects.filter(user=self.alice):
+            log.delete()
+
+        result = run_payroll(self.week)
+        self.assertEqual(result.rows, 2)
+        alice = WeeklyPayroll.objects.get(user=self.alice, week_start=self.week)
+        self.assertEqual((alice.total_hours, alice.total_pay, alice.rate), (Decimal("0.00"), Decimal("0.00"), Decimal("50.00")))
+
+    def test_management_command_covers_a_range(self):
+        out = StringIO()
+        call_command("run_payroll", week="2025-03-05", until="2025-03-10", stdout=out)
+        self.assertIn("3 rows over 2 week(s)", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+    def test_admin_trigger(self):
+        response = self.client.post(reverse("payroll_run"), {"week_start": "2025-03-03"}, follow=True)
+        self.assertContains(response, "Payroll computed: 2 rows")
+
+
+class HoursRollupTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.user = User.objects.create_user(username="rollup_tester", password="test123")
+        self.time_in = now() - timedelta(hours=3)
+
+    def _weekly_hours(self):
+        return sum(WeeklyHours.objects.filter(user=self.user).values_list("total_hours", flat=True), Decimal("0"))
+
+    def _daily_hours(self):
+        return sum(DailyHours.objects.filter(user=self.user).values_list("total_hours", flat=True), Decimal("0"))
+
+    def test_stop_and_delete_shift_update_rollup(self):
+        log = TimeLog.objects.create(user=self.user, time_in=self.time_in)
+        self.assertEqual(self._weekly_hours(), Decimal("0"))
+
+        self.client.post(reverse("stop_shift", args=[log.id]))
+        self.assertEqual(self._weekly_hours(), Decimal("3.00"))
+        self.assertEqual(self._daily_hours(), Decimal("3.00"))
+
+        # Stopping again replaces the old time_out instead of double counting
+        self.client.post(reverse("stop_shift", args=[log.id]))
+        self.assertEqual(self._weekly_hours(), Decimal("3.00"))
+
+        self.client.post(reverse("delete_shift", args=[log.id]))
+        self.assertEqual(self._weekly_hours(), Decimal("0.00"))
+        self.assertEqual(WeeklyHours.objects.get(user=self.user).log_count, 0)
+
+    def test_user_time_out_updates_rollup(self):
+        log = TimeLog.objects.create(user=self.user, time_in=self.time_in)
+        self.client.login(username="rollup_tester", password="test123")
+        self.client.get(reverse("timelog_timeout", args=[log.id]))
+        self.assertEqual(self._weekly_hours(), Decimal("3.00"))
+
+    def test_deactivation_bulk_close_updates_rollup(self):
+        TimeLog.objects.create(user=self.user, time_in=self.time_in)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("admin_user_detail", args=[self.user.id]), {"deactivate_account": "1"})
+        self.assertFalse(TimeLog.objects.filter(user=self.user, time_out__isnull=True).exists())
+        self.assertEqual(self._weekly_hours(), Decimal("3.00"))
+
+    def test_rebuild_verifies_and_repairs(self):
+        TimeLog.objects.create(user=self.user, time_in=self.time_in, time_out=self.time_in + timedelta(hours=2))
+        call_command("rebuild_hours_rollup", check=True, stdout=StringIO())
+
+        WeeklyHours.objects.filter(user=self.user).update(total_hours=Decimal("99"))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_hours_rollup", check=True, stdout=StringIO())
+
+        call_command("rebuild_hours_rollup", stdout=StringIO())
+        self.assertEqual(self._weekly_hours(), Decimal("2.00"))
+        call_command("rebuild_hours_rollup", check=True, stdout=StringIO())
+
+
+class CsvExportTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.user = User.objects.create_user(username="export_tester")
+
+        self.time_in = make_aware(datetime(2025, 1, 6, 8, 0))
+        TimeLog.objects.create(user=self.user, work_type_names="Packing", time_in=self.time_in,
+                               time_out=self.time_in + timedelta(hours=2, minutes=30))
+        TimeLog.objects.create(user=self.user, work_type_names="Sorting", time_in=self.time_in + timedelta(days=1))
+        WeeklyPayroll.objects.create(user=self.user, week_start=datetime(2025, 1, 6).date(),
+                                     rate=Decimal("100"), total_hours=Decimal("2.5"), total_pay=Decimal("250"))
+
+    def _csv(self, url_name, params=None):
+        response = self.client.get(reverse(url_name), params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_exports_timelogs_with_local_times_and_hours(self):
+        lines = self._csv("export_timelogs")
+        self.assertEqual(lines[0], "id,user,work_types,date,time_in,time_out,hours,status")
+        self.assertEqual(len(lines), 3)
+        self.assertIn("export_tester,Packing,2025-01-06,2025-01-06 08:00:00,2025-01-06 10:30:00,2.5,Done", lines[1])
+        self.assertTrue(lines[2].endswith(",,Ongoing"))
+
+    def test_timelog_filters_match_task_list(self):
+        self.assertEqual(len(self._csv("export_timelogs", {"status_filter": "ongoing"})), 2)
+        self.assertEqual(len(self._csv("export_timelogs", {"work_type_filter": "Packing"})), 2)
+        self.assertEqual(len(self._csv("export_timelogs", {"date_filter": "2025-01-07"})), 2)
+        self.assertEqual(len(self._csv("export_timelogs", {"date_from": "2025-01-06", "date_to": "2025-01-07"})), 3)
+        self.assertEqual(len(self._csv("export_timelogs", {"user": str(self.admin.id)})), 1)
+
+    def test_hides_ongoing_logs_without_active_work_type_like_task_list(self):
+        worker = User.objects.create_user(username="orphaned")
+        assignment = WorkAssignment.objects.create(user=worker)
+        assignment.work_types.set([WorkType.objects.create(name="Retired", is_active=False)])
+        TimeLog.objects.create(user=worker, task=assignment, time_in=self.time_in + timedelta(days=2))
+        self.assertEqual(len(self._csv("export_timelogs")), 3)
+
+    def test_neutralises_formula_cells(self):
+        TimeLog.objects.create(user=self.user, work_type_names="=HYPERLINK(\"x\")", time_in=self.time_in,
+                               time_out=self.time_in + timedelta(hours=1))
+        User.objects.filter(pk=self.user.pk).update(username="@evil")
+        lines = self._csv("export_timelogs", {"status_filter": "done"})
+        self.assertIn(",'@evil,\"'=HYPERLINK(\"\"x\"\")\",", lines[2])
+        self.assertTrue(self._csv("export_payroll")[1].startswith("'@evil,"))
+
+    def test_exports_payroll(self):
+        lines = self._csv("export_payroll", {"date_from": "2025-01-01"})
+        self.assertEqual(lines[1], "export_tester,2025-01-06,100.00,2.50,250.00")
+
+
+class PayoutBatchTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.week = datetime(2025, 1, 6).date()
+
+        self.gcash_user = self._payee("gina", "250.00", gcash_number="09171234567", gcash_name="Gina G")
+        self.bank_user = self._payee("bert", "400.50", bank_name="BDO", bank_number="001122")
+        self._payee("both", "100.00", gcash_number="09998887777", gcash_name="Both B",
+                    bank_name="BPI", bank_number="334455")
+        self._payee("unpaid", "0.00", gcash_number="09170000000")
+
+    def _payee(self, username, pay, **profile):
+        user = User.objects.create_user(username=username)
+        Profile.objects.create(user=user, full_name=username.title(), **profile)
+        WeeklyPayroll.objects.create(user=user, week_start=self.week, total_pay=Decimal(pay))
+        return user
+
+    def _batch(self, channel, week_start="2025-01-06"):
+        response = self.client.get(reverse("export_payouts", args=[channel]), {"week_start": week_start})
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_gcash_batch(self):
+        lines = self._batch("gcash")
+        self.assertEqual(lines[0], "reference,gcash_number,gcash_name,amount")
+        self.assertEqual(lines[1], f"XJG-20250106-{self.gcash_user.id},09171234567,Gina G,250.00")
+        self.assertEqual(lines[-1], "CONTROL,2,350.00")
+
+    def test_bank_batch_skips_gcash_payees(self):
+        lines = self._batch("bank")
+        self.assertEqual(lines[1:], [f"XJG-20250106-{self.bank_user.id},BDO,001122,Bert,400.50", "CONTROL,1,400.50"])
+
+    def test_unknown_channel(self):
+        response = self.client.get(reverse("export_payouts", args=["cash"]), {"week_start": "2025-01-06"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_any_day_of_the_week_picks_its_monday(self):
+        self.assertEqual(self._batch("gcash", week_start="2025-01-09"), self._batch("gcash"))
+
+    def test_week_without_payroll_is_refused(self):
+        response = self.client.get(reverse("export_payouts", args=["gcash"]), {"week_start": "2025-01-13"})
+        self.assertRedirects(response, reverse("payroll_run"), fetch_redirect_response=False)
+        with self.assertRaisesMessage(CommandError, "Payroll has not been run for the week of 2025-01-13"):
+            call_command("export_payouts", "2025-01-15", dir=self.id(), stdout=StringIO())
+
+    def test_account_numbers_cannot_become_formulas(self):
+        Profile.objects.filter(user=self.gcash_user).update(gcash_number="+639171234567")
+        Profile.objects.filter(user=self.bank_user).update(bank_number='=HYPERLINK("http://x")')
+
+        self.assertIn(f"XJG-20250106-{self.gcash_user.id},+639171234567,Gina G,250.00", self._batch("gcash"))
+        self.assertIn(
+            f'XJG-20250106-{self.bank_user.id},BDO,"\'=HYPERLINK(""http://x"")",Bert,400.50', self._batch("bank")
+        )
+
+
+class WorkTypeOptionsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.user = User.objects.create_user(username="dropdown_tester", password="test123")
+        self.other = User.objects.create_user(username="other_tester")
+        self.work_type = WorkType.objects.create(name="Packing")
+        TimeLog.objects.create(user=self.user, work_type_names="Packing", time_in=now())
+        TimeLog.objects.create(user=self.other, work_type_names="Sorting", time_in=now())
+
+    def test_scopes(self):
+        self.assertEqual(work_type_options(), ["Packing", "Sorting"])
+        self.assertEqual(work_type_options(self.user.id), ["Packing"])
+
+    def test_cached_after_first_call(self):
+        work_type_options(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(work_type_options(self.user.id), ["Packing"])
+
+    def test_new_name_invalidates(self):
+        work_type_options()
+        work_type_options(self.user.id)
+        TimeLog.objects.create(user=self.user, work_type_names="Welding", time_in=now(), time_out=now())
+        self.assertEqual(work_type_options(), ["Packing", "Sorting", "Welding"])
+        self.assertEqual(work_type_options(self.user.id), ["Packing", "Welding"])
+
+    def test_worktype_change_invalidates(self):
+        work_type_options()
+        with self.assertNumQueries(0):
+            work_type_options()
+        self.work_type.name = "Packing QA"
+        self.work_type.save()
+        with self.assertNumQueries(1):
+            work_type_options()
+
+    def test_views_use_options(self):
+        response = self.client.get(reverse("admin_user_detail", args=[self.user.id]))
+        self.assertEqual(response.context["all_work_types"], ["Packing"])
+        self.client.login(username="dropdown_tester", password="test123")
+        response = self.client.get(reverse("timelog_list"))
+        self.assertEqual(response.context["all_work_types"], ["Packing"])
+
+
+class WorkTypeTagFilterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.user = User.objects.create_user(username="tag_tester")
+        # Only one log per user can be open
+        self.pack = TimeLog.objects.create(user=self.user, work_type_names="Pack", time_in=now(), time_out=now())
+        self.pack_qa = TimeLog.objects.create(
+            user=self.user, work_type_names="Packing QA", time_in=now(), time_out=now()
+        )
+        self.multi = TimeLog.objects.create(user=self.user, work_type_names="Sorting / Pack", time_in=now())
+
+    def _ids(self, url, params):
+        response = self.client.get(url, params)
+        return {row["id"] for row in response.context["page_obj"]}
+
+    def test_tags_snapshot_names(self):
+        self.assertEqual(
+            list(self.multi.work_type_tags.order_by("name").values_list("name", flat=True)),
+            ["Pack", "Sorting"],
+        )
+
+    def test_tags_come_from_work_type_rows(self):
+        pick_pack = WorkType.objects.create(name="Pick / Pack")
+        sorting = WorkType.objects.create(name="Sorting")
+        worker = User.objects.create_user(username="tag_worker")
+        assignment = WorkAssignment.objects.create(user=worker)
+        assignment.work_types.set([pick_pack, sorting])
+
+        own = TimeLog.objects.create(user=worker, task=assignment, work_type=pick_pack,
+                                     work_type_names="Pick / Pack", time_in=now(), time_out=now())
+        from_task = TimeLog.objects.create(user=worker, task=assignment, time_in=now())
+
+        self.assertEqual(list(own.work_type_tags.values_list("work_type_id", "name")), [(pick_pack.id, "Pick / Pack")])
+        self.assertEqual(
+            sorted(from_task.work_type_tags.values_list("work_type_id", "name")),
+            sorted([(pick_pack.id, "Pick / Pack"), (sorting.id, "Sorting")]),
+        )
+
+    def test_exact_match_without_substring_false_positives(self):
+        expected = {self.pack.id, self.multi.id}
+        self.assertEqual(self._ids(reverse("task_list"), {"work_type_filter": "Pack"}), expected)
+        self.assertEqual(
+            self._ids(reverse("admin_user_detail", args=[self.user.id]), {"work_type_filter": "Pack"}),
+            expected,
+        )
+
+    def test_filter_uses_tag_index(self):
+        plan = TimeLog.objects.filter(work_type_tags__name="Pack").explain()
+        self.assertIn("timelog_wt_name_log_idx", plan)
+
+    def test_dropdown_lists_individual_names(self):
+        self.assertEqual(work_type_options(), ["Pack", "Packing QA", "Sorting"])
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_seed_and_measure_every_view(self):
+        results = run_benchmarks(DataSize("tiny", users=3, work_types=3, years=0.05), repeat=1)
+        self.assertGreater(results["logs"], 0)
+        self.assertEqual(set(results["views"]), {
+            "task_list", "manage_users", "admin_user_detail", "user_week_list",
+            "user_weekly_summary", "timelog_list", "timelog_create",
+        })
+        for stats in results["views"].values():
+            self.assertEqual(set(stats), {"median_ms", "p95_ms", "queries", "peak_kib"})
+        # Seeded logs are fully indexed: tags and hours rollup are in place
+        self.assertEqual(WorkType.objects.count(), 3)
+        call_command("rebuild_hours_rollup", check=True, stdout=StringIO())
+
+    def test_cached_views_are_measured_uncached(self):
+        results = run_benchmarks(DataSize("tiny", users=2, work_types=2, years=0.02), repeat=2)
+        worker = User.objects.filter(username__startswith="bench_user_").order_by("username").first()
+        client = Client()
+        client.force_login(worker)
+        for name in ("timelog_create", "timelog_list"):
+            cache.clear()
+            with CaptureQueriesContext(connection) as cold:
+                client.get(reverse(name))
+            self.assertEqual(results["views"][name]["queries"], len(cold), name)
+
+    def test_runs_on_a_private_cache(self):
+        cache.set("live_entry", "kept")
+        run_benchmarks(DataSize("tiny", users=2, work_types=2, years=0.02), repeat=1)
+        self.assertEqual(cache.get("live_entry"), "kept")
+
+    def test_compare_flags_query_regressions(self):
+        baseline = {"sizes": {"small": {"views": {"task_list": {"queries": 3, "median_ms": 10}}}}}
+        current = {"sizes": {"small": {"views": {"task_list": {"queries": 4, "median_ms": 10}}}}}
+        self.assertEqual(compare(baseline, current), ["small/task_list: queries 3 -> 4"])
+
+
+class DashboardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        caching.reset_stats()
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.user = User.objects.create_user(username="cache_tester")
+        self.week = week_start_for(now().date()) - timedelta(days=14)
+        self.time_in = make_aware(datetime.combine(self.week, datetime.min.time()) + timedelta(hours=8))
+        self.log = TimeLog.objects.create(user=self.user, time_in=self.time_in, time_out=self.time_in + timedelta(hours=2))
+
+    def _stats(self, namespace):
+        stats = caching.cache_stats()[namespace]
+        return stats["hits"], stats["misses"]
+
+    def test_week_list_cached_until_log_changes(self):
+        url = reverse("user_week_list", args=[self.user.id])
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self._stats("user_week_list"), (1, 1))
+
+        self.log.time_out = self.time_in + timedelta(hours=5)
+        self.log.save()
+        response = self.client.get(url)
+        self.assertEqual(self._stats("user_week_list"), (1, 2))
+        week = next(w for w in response.context["all_weeks"] if w["start"] == self.week)
+        self.assertEqual(week["hours"], Decimal("5.00"))
+
+    def test_week_list_refreshed_by_payroll_changes(self):
+        url = reverse("user_week_list", args=[self.user.id])
+        self.client.get(url)
+        WeeklyPayroll.objects.create(user=self.user, week_start=self.week, rate=Decimal("50.00"))
+        response = self.client.get(url)
+        week = next(w for w in response.context["all_weeks"] if w["start"] == self.week)
+        self.assertEqual(week["payroll"].rate, Decimal("50.00"))
+
+        run_payroll(self.week)
+        response = self.client.get(url)
+        week = next(w for w in response.context["all_weeks"] if w["start"] == self.week)
+        self.assertEqual(week["payroll"].total_pay, Decimal("100.00"))
+
+    def test_weekly_summary_only_invalidated_for_its_week(self):
+        url = reverse("user_weekly_summary", args=[self.user.id, self.week.isoformat()])
+        self.client.get(url)
+        other_week = self.time_in + timedelta(days=7)
+        TimeLog.objects.create(user=self.user, time_in=other_week, time_out=other_week + timedelta(hours=1))
+        self.client.get(url)
+        self.assertEqual(self._stats("user_weekly_summary"), (1, 1))
+
+        self.log.delete()
+        response = self.client.get(url)
+        self.assertEqual(self._stats("user_weekly_summary"), (1, 2))
+        self.assertEqual(response.context["daily_summary"]["Monday"]["logs"], [])
+
+    def test_assignment_and_work_type_changes_bump_versions(self):
+        user_scope = [("user", self.user.id)]
+        before = caching.versions(user_scope)
+        assignment = WorkAssignment.objects.create(user=self.user)
+        assignment.work_types.add(WorkType.objects.create(name="Sorting"))
+        self.assertGreater(caching.versions(user_scope), before)
+
+        response = self.client.get(reverse("worktype_options"))
+        self.assertEqual([wt.name for wt in response.context["worktypes"]], ["Sorting"])
+        WorkType.objects.create(name="Packing")
+        response = self.client.get(reverse("worktype_options"))
+        self.assertEqual(sorted(wt.name for wt in response.context["worktypes"]), ["Packing", "Sorting"])
+
+    def test_evicted_version_key_never_resurrects_old_entries(self):
+        scope = [("user", self.user.id)]
+        self.assertEqual(caching.cached("eviction", lambda: "old", scopes=scope), "old")
+        # The cache dropped the version key (LRU / cull), then a log changed
+        cache.delete(caching._version_key(*scope[0]))
+        caching.bump(scope)
+        self.assertEqual(caching.cached("eviction", lambda: "new", scopes=scope), "new")
+
+        cache.delete(caching._version_key(*scope[0]))
+        self.assertEqual(caching.cached("eviction", lambda: "newer", scopes=scope), "newer")
+
+    def test_entries_expire_no_later_than_their_version_keys(self):
+        almost_expired = time.time_ns() - (caching.VERSION_TIMEOUT - 10) * 1_000_000_000
+        self.assertLessEqual(caching._entry_timeout(3600, [time.time_ns(), almost_expired]), 10)
+        self.assertEqual(caching._entry_timeout(3600, [time.time_ns()]), 3600)
+
+    def test_main_menu_and_stats_view(self):
+        self.client.get(reverse("admin_main_menu"))
+        response = self.client.get(reverse("admin_main_menu"))
+        self.assertContains(response, reverse("payroll_run"))
+
+        stats = self.client.get(reverse("cache_stats")).json()
+        self.assertEqual(stats["namespaces"]["admin_main_menu"], {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+
+
+class AdminUserDetailTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.user = User.objects.create_user(username="detail_tester")
+        self.work_types = [WorkType.objects.create(name=name) for name in ("Sorting", "Packing", "Loading")]
+        self.assignment = WorkAssignment.objects.create(user=self.user)
+        self.assignment.work_types.set(self.work_types)
+        self.logs = add_logs([self.assignment], 12, self.work_types[:2])  # the newest one is still open
+        self.url = reverse("admin_user_detail", args=[self.user.id])
+
+    def test_get_never_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertIsNone(response.context["profile"])
+        self.assertFalse(Profile.objects.filter(user=self.user).exists())
+        self.assertEqual([q["sql"].split()[0] for q in queries if not q["sql"].startswith("SELECT")], [])
+
+    def test_active_log_flags(self):
+        flags = {wt["name"]: wt["has_active_log"] for wt in self.client.get(self.url).context["assigned_worktypes"]}
+        self.assertEqual(flags, {"Sorting": True, "Packing": True, "Loading": True})
+        self.logs[-1].time_out = now()
+        self.logs[-1].save()
+        flags = {wt["name"]: wt["has_active_log"] for wt in self.client.get(self.url).context["assigned_worktypes"]}
+        self.assertEqual(flags, {"Sorting": False, "Packing": False, "Loading": False})
+
+    def test_pages_come_from_sql_newest_first(self):
+        newest_first = sorted(self.logs, key=lambda log: log.time_in, reverse=True)
+        page = self.client.get(self.url, {"page": 2}).context["page_obj"]
+        self.assertEqual(page.paginator.count, 12)
+        self.assertEqual([row["id"] for row in page.object_list], [log.id for log in newest_first[5:10]])
+
+    def test_pages_union_the_archive(self):
+        old_logs = add_logs([self.assignment], 6, self.work_types[:2], end=now() - timedelta(days=300), leave_open=False)
+        for week in {week_start_for(localdate(log.time_in)) for log in old_logs}:
+            WeeklyPayroll.objects.create(user=self.user, week_start=week, rate=100, total_pay=400)
+        archive.archive_logs()
+        self.assertEqual(ArchivedTimeLog.objects.count(), 6)
+
+        newest_first = sorted(self.logs, key=lambda log: log.time_in, reverse=True) + old_logs[::-1]
+        page = self.client.get(self.url, {"page": 3}).context["page_obj"]
+        self.assertEqual(page.paginator.count, 18)
+        self.assertEqual(
+            [(row["id"], row["archived"]) for row in page.object_list],
+            [(log.id, log in old_logs) for log in newest_first[10:15]],
+        )
+
+    def test_query_count_is_fixed(self):
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(self.url, {"page": 2})
+            return len(queries)
+
+        small = count_queries()
+        add_logs([self.assignment], 200, self.work_types, end=self.logs[0].time_in, leave_open=False)
+        for i in range(10):
+            extra = WorkAssignment.objects.create(user=self.user)
+            extra.work_types.set([WorkType.objects.create(name=f"Extra {i}"), *self.work_types])
+        self.assertEqual(count_queries(), small)
+
+
+class AccountJobTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.work_types = [WorkType.objects.create(name="Sorting"), WorkType.objects.create(name="Packing")]
+        self.user, self.bystander = seed_history(2, 30, self.work_types, prefix="job")
+        Profile.objects.create(user=self.user, full_name="Long Tenure")
+        WeeklyPayroll.objects.create(user=self.user, week_start=week_start_for(now().date()), total_pay=Decimal("10"))
+
+    def _counts(self, user_id):
+        return [
+            TimeLog.objects.filter(user_id=user_id).count(),
+            WorkAssignment.objects.filter(user_id=user_id).count(),
+            WeeklyHours.objects.filter(user_id=user_id).count(),
+            User.objects.filter(pk=user_id).count(),
+        ]
+
+    def test_delete_runs_in_chunks_and_removes_user_last(self):
+        bystander_counts = self._counts(self.bystander.id)
+        job = account_jobs.start_job(self.user, AccountJob.DELETE)
+        self.assertFalse(User.objects.get(pk=self.user.id).is_active)
+
+        finished = account_jobs.run_job(job, chunk_size=7, pause=0)
+
+        self.assertEqual((finished.status, finished.processed), (AccountJob.DONE, job.total))
+        self.assertIsNone(finished.user_id)
+        self.assertEqual(self._counts(self.user.id), [0, 0, 0, 0])
+        self.assertEqual(self._counts(self.bystander.id), bystander_counts)
+
+    def test_interrupted_job_resumes_where_it_stopped(self):
+        job = account_jobs.start_job(self.user, AccountJob.DELETE)
+        # Two chunks done, then the worker died
+        for _ in range(2):
+            account_jobs._run_chunk(job.pk, "time logs", TimeLog.objects.filter(user=self.user), 10)
+        AccountJob.objects.filter(pk=job.pk).update(status=AccountJob.RUNNING, updated_at=now() - timedelta(minutes=5))
+
+        # Asking again reuses the unfinished job instead of starting over
+        self.assertEqual(account_jobs.start_job(self.user, AccountJob.DELETE).pk, job.pk)
+        call_command("resume_account_jobs", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AccountJob.DONE, job.total))
+        self.assertFalse(User.objects.filter(pk=self.user.id).exists())
+
+    def test_resume_leaves_live_jobs_alone(self):
+        job = account_jobs.start_job(self.user, AccountJob.DELETE)
+        self.assertEqual(account_jobs._run_chunk(job.pk, "time logs", TimeLog.objects.filter(user=self.user), 10), 10)
+        AccountJob.objects.filter(pk=job.pk).update(status=AccountJob.RUNNING)
+
+        # The last chunk was just now, so its thread may still be working on it
+        with self.assertRaisesMessage(CommandError, "still running"):
+            call_command("resume_account_jobs", job=job.pk, stdout=StringIO())
+        call_command("resume_account_jobs", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AccountJob.RUNNING, 10))
+
+        # A second runner that read the same stale row loses the claim
+        AccountJob.objects.filter(pk=job.pk).update(updated_at=now() - timedelta(minutes=5))
+        first, second = AccountJob.objects.get(pk=job.pk), AccountJob.objects.get(pk=job.pk)
+        self.assertTrue(account_jobs.claim(first))
+        self.assertFalse(account_jobs.claim(second))
+
+    def test_admin_page_reports_progress(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("admin_user_detail", args=[self.user.id]), {"delete_account": "1"})
+        job = AccountJob.objects.get(username=self.user.username)
+        self.assertRedirects(response, reverse("account_job", args=[job.id]))
+        status = self.client.get(reverse("account_job_status", args=[job.id])).json()
+        self.assertEqual((status["status"], status["percent"], status["processed"]), ("done", 100, job.total))
+
+    def test_deactivation_closes_open_logs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("admin_user_detail", args=[self.user.id]), {"deactivate_account": "1"})
+        self.assertFalse(TimeLog.objects.filter(user=self.user, time_out__isnull=True).exists())
+        self.assertEqual(TimeLog.objects.filter(user=self.user).count(), 30)
+        self.assertEqual(AccountJob.objects.get(user=self.user).status, AccountJob.DONE)
+
+    def test_reactivation_refused_while_any_job_is_unfinished(self):
+        for kind in (AccountJob.DEACTIVATE, AccountJob.DELETE):
+            account_jobs.start_job(self.user, kind)
+            self.client.post(reverse("admin_user_detail", args=[self.user.id]), {"reactivate_account": "1"})
+            self.assertFalse(User.objects.get(pk=self.user.id).is_active)
+
+    def test_reactivation_after_deactivation_finishes(self):
+        account_jobs.run_job(account_jobs.start_job(self.user, AccountJob.DEACTIVATE), pause=0)
+        self.client.post(reverse("admin_user_detail", args=[self.user.id]), {"reactivate_account": "1"})
+        self.assertTrue(User.objects.get(pk=self.user.id).is_active)
+
+
+class AccountJobLatencyTest(TransactionTestCase):
+    """Clock-ins must stay within settings.CLOCK_IN_LATENCY_BUDGET while a large account is deleted."""
+
+    def test_clock_in_latency_during_deletion(self):
+        work_types = [WorkType.objects.create(name="Sorting")]
+        victim = User.objects.create_user(username="long_tenure")
+        add_logs([WorkAssignment.objects.create(user=victim)], 4000, work_types, leave_open=False)
+        worker = User.objects.create_user(username="on_shift")
+        task = WorkAssignment.objects.create(user=worker)
+        task.work_types.set(work_types)
+        job = account_jobs.start_job(victim, AccountJob.DELETE)
+
+        done = Event()
+
+        def delete():
+            try:
+                account_jobs.run_job(job, chunk_size=200)
+            finally:
+                done.set()
+                connection.close()
+
+        client = Client()
+        client.force_login(worker)
+        timein_url = reverse("timelog_timein", args=[task.id, work_types[0].id])
+        latencies = []
+        thread = Thread(target=delete)
+        thread.start()
+        try:
+            while not done.is_set():
+                started = time.perf_counter()
+                client.post(timein_url)
+                latencies.append(time.perf_counter() - started)
+                open_log = TimeLog.objects.get(user=worker, time_out__isnull=True)
+                client.post(reverse("timelog_timeout", args=[open_log.id]))
+        finally:
+            thread.join()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AccountJob.DONE)
+        self.assertGreater(len(latencies), 5)
+        self.assertLess(max(latencies), settings.CLOCK_IN_LATENCY_BUDGET)
+
+
+class WorkTypeArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.packing = WorkType.objects.create(name="Packing")
+        self.sorting = WorkType.objects.create(name="Sorting")
+        self.started = now() - timedelta(hours=1)
+        # Five workers clocked in on Packing, one on Sorting through an assignment that has both
+        for i in range(6):
+            user = User.objects.create_user(username=f"packer{i}")
+            assignment = WorkAssignment.objects.create(user=user)
+            assignment.work_types.set([self.packing, self.sorting])
+            work_type = self.sorting if i == 5 else self.packing
+            TimeLog.objects.create(user=user, task=assignment, work_type=work_type, time_in=self.started)
+        self.finished = TimeLog.objects.create(
+            user=user, task=assignment, work_type=self.packing,
+            time_in=self.started - timedelta(hours=3), time_out=self.started - timedelta(hours=2),
+        )
+
+    def test_preview_counts_users_in_one_query(self):
+        with self.assertNumQueries(1):
+            count, names = worktype_archive.affected_users(self.packing, limit=3)
+        self.assertEqual((count, names), (5, ["packer0", "packer1", "packer2"]))
+
+        response = self.client.get(reverse("worktype_delete", args=[self.packing.pk]))
+        self.assertTemplateUsed(response, "admin_account/worktype_confirm_delete.html")
+        self.assertEqual(len(response.context["users"]), 5)
+        self.assertTrue(WorkType.objects.get(pk=self.packing.pk).is_active)
+
+    def test_archive_deletes_open_logs_in_chunks(self):
+        result = worktype_archive.archive_work_type(self.packing, chunk_size=2)
+
+        # Each chunk is its own write transaction; the slowest one bounds the lock hold time
+        self.assertEqual((result.deleted, result.chunks), (5, 3))
+        self.assertGreater(result.longest_chunk, 0)
+        self.assertFalse(WorkType.objects.get(pk=self.packing.pk).is_active)
+        # Only logs clocked in on Packing go; the Sorting shift and finished logs stay
+        open_types = TimeLog.objects.filter(time_out__isnull=True).values_list("work_type", flat=True)
+        self.assertEqual(list(open_types), [self.sorting.id])
+        self.assertTrue(TimeLog.objects.filter(pk=self.finished.pk).exists())
+
+    def test_confirmed_post_archives(self):
+        response = self.client.post(reverse("worktype_delete", args=[self.packing.pk]))
+        self.assertRedirects(response, reverse("worktype_options"), fetch_redirect_response=False)
+        self.assertEqual(TimeLog.objects.filter(time_out__isnull=True).count(), 1)
+
+
+class TimeLogArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_tester", password="admin123", email="admin@example.com"
+        )
+        self.client.login(username="admin_tester", password="admin123")
+        self.user = User.objects.create_user(username="archive_tester", password="test123")
+
+        # A paid week and an unpaid week, both well past the horizon, and a recent log
+        self.paid_week = week_start_for(now().date()) - timedelta(weeks=40)
+        self.unpaid_week = self.paid_week + timedelta(weeks=1)
+        self.old_logs = [
+            self._log(self.paid_week, hours=8, name="Packing"),
+            self._log(self.paid_week, hours=11, name="Sorting / Packing"),
+        ]
+        self.unpaid_log = self._log(self.unpaid_week, hours=8, name="Packing")
+        self.recent_log = self._log(week_start_for(now().date()) - timedelta(weeks=1), hours=8, name="Packing")
+        run_payroll(self.paid_week)
+        WeeklyPayroll.objects.filter(user=self.user, week_start=self.paid_week).update(
+            rate=Decimal("100"), total_pay=Decimal("400")
+        )
+
+    def _log(self, week, hours, name):
+        time_in = make_aware(datetime.combine(week, datetime.min.time()) + timedelta(hours=hours))
+        return TimeLog.objects.create(user=self.user, work_type_names=name, time_in=time_in, time_out=time_in + timedelta(hours=2))
+
+    def _archive(self, **options):
+        call_command("archive_timelogs", stdout=StringIO(), **options)
+
+    def test_moves_only_closed_logs_from_paid_old_weeks(self):
+        self._archive(chunk_size=1)
+
+        self.assertCountEqual(ArchivedTimeLog.objects.values_list("id", flat=True), [log.id for log in self.old_logs])
+        self.assertCountEqual(TimeLog.objects.values_list("id", flat=True), [self.unpaid_log.id, self.recent_log.id])
+        self.assertFalse(TimeLogWorkType.objects.filter(log_id__in=[log.id for log in self.old_logs]).exists())
+        self.assertCountEqual(
+            ArchivedTimeLogWorkType.objects.values_list("log_id", "name"),
+            [(self.old_logs[0].id, "Packing"), (self.old_logs[1].id, "Sorting"), (self.old_logs[1].id, "Packing")],
+        )
+        # The rollup keeps counting archived hours, and re-running payroll keeps the paid totals
+        call_command("rebuild_hours_rollup", check=True, stdout=StringIO())
+        run_payroll(self.paid_week)
+        self.assertEqual(WeeklyPayroll.objects.get(user=self.user, week_start=self.paid_week).total_hours, Decimal("4.00"))
+
+    def test_interrupted_run_resumes(self):
+        def stop_after_first_chunk(scanned, archived, last_id):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            archive.archive_logs(chunk_size=1, progress=stop_after_first_chunk)
+        self.assertEqual(ArchivedTimeLog.objects.count(), 1)
+
+        self._archive()
+        self.assertEqual(ArchivedTimeLog.objects.count(), 2)
+        self._archive()
+        self.assertEqual(ArchivedTimeLog.objects.count(), 2)
+
+    def test_history_views_union_the_archive(self):
+        self._archive()
+        all_ids = [self.recent_log.id, self.unpaid_log.id, self.old_logs[1].id, self.old_logs[0].id]
+
+        # task_list: walk the keyset pages across the hot/cold boundary
+        seen, params = [], {}
+        while True:
+            page = self.client.get(reverse("task_list"), params).context["page_obj"]
+            seen += [row["id"] for row in page.object_list]
+            if not page.has_next:
+                break
+            params = {"after": page.next_cursor}
+        self.assertEqual(seen[-4:], all_ids)
+
+        rows = self.client.get(reverse("task_list"), {"work_type_filter": "Sorting"}).context["page_obj"].object_list
+        self.assertEqual([(row["id"], row["archived"]) for row in rows], [(self.old_logs[1].id, True)])
+
+        detail = self.client.get(reverse("admin_user_detail", args=[self.user.id]))
+        self.assertEqual([row["id"] for row in detail.context["page_obj"].object_list], all_ids)
+
+        summary = self.client.get(reverse("user_weekly_summary", args=[self.user.id, self.paid_week.isoformat()]))
+        self.assertEqual(len(summary.context["daily_summary"]["Monday"]["logs"]), 2)
+
+        csv_lines = b"".join(self.client.get(reverse("export_timelogs")).streaming_content).decode().splitlines()
+        self.assertEqual([int(line.split(",")[0]) for line in csv_lines[1:]], all_ids[::-1])
+
+        self.client.login(username="archive_tester", password="test123")
+        own = self.client.get(reverse("timelog_list"))
+        self.assertEqual([row["id"] for row in own.context["page_obj"].object_list], all_ids)
+        self.assertEqual(
+            own.context["all_timelogs_dates"],
+            sorted({localdate(log.time_in) for log in [self.recent_log, self.unpaid_log, *self.old_logs]}, reverse=True),
+        )
+
+    def test_archived_work_type_filter_matches_whole_tags(self):
+        pick_pack = WorkType.objects.create(name="Pick / Pack")
+        time_in = self.old_logs[0].time_in + timedelta(hours=4)
+        log = TimeLog.objects.create(
+            user=self.user, work_type=pick_pack, work_type_names="Pick / Pack",
+            time_in=time_in, time_out=time_in + timedelta(hours=1),
+        )
+        self._archive()
+        self.assertTrue(ArchivedTimeLog.objects.filter(id=log.id).exists())
+
+        def filtered(name):
+            rows = self.client.get(reverse("task_list"), {"work_type_filter": name}).context["page_obj"].object_list
+            return [row["id"] for row in rows]
+
+        self.assertEqual(filtered("Pick / Pack"), [log.id])
+        self.assertEqual(filtered("Pick"), [])
+        self.assertEqual(filtered("pick / pack"), [])
+        self.client.login(username="archive_tester", password="test123")
+        response = self.client.get(reverse("timelog_list"), {"work_type_filter": "Pick / Pack"})
+        self.assertEqual([row["id"] for row in response.context["page_obj"].object_list], [log.id])
+        self.assertIn("Pick / Pack", response.context["all_work_types"])
+
+    def test_recent_ranges_do_not_read_the_archive(self):
+        self._archive()
+        recent_day = localdate(self.recent_log.time_in).isoformat()
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.client.get(reverse("task_list"), {"date_filter": recent_day}).context["page_obj"].object_list
+        self.assertEqual([row["id"] for row in rows], [self.recent_log.id])
+        archive_reads = [q["sql"] for q in queries if '"user_account_archivedtimelog"' in q["sql"] and "MAX(" not in q["sql"]]
+        self.assertEqual(archive_reads, [])
+
+
+class QueryComplexityContractTest(QueryContractMixin, TestCase):
+    """Every admin view must run the same number of queries with 15 logs as with 1000+."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="contract_admin", password="admin123")
+        self.client.login(username="contract_admin", password="admin123")
+        self.work_types = [WorkType.objects.create(name="Sorting"), WorkType.objects.create(name="Packing")]
+        self.week = week_start_for(now().date()) - timedelta(days=7)
+
+        self.worker = User.objects.create_user(username="contract_worker")
+        self.assignment = WorkAssignment.objects.create(user=self.worker)
+        self.assignment.work_types.set(self.work_types)
+        self.logs = add_logs([self.assignment], 5, self.work_types)
+        self._add_payees([self.worker])
+        seed_history(2, 5, self.work_types, prefix="small")
+        self.job = AccountJob.objects.create(
+            username="gone", kind=AccountJob.DELETE, status=AccountJob.DONE, total=5, processed=5
+        )
+
+    def _add_payees(self, users):
+        Profile.objects.bulk_create([
+            Profile(user=user, full_name=user.username, gcash_number="0917" if i % 2 else "",
+                    bank_name="BDO", bank_number="0011")
+            for i, user in enumerate(users)
+        ])
+        WeeklyPayroll.objects.bulk_create(
+            [WeeklyPayroll(user=user, week_start=self.week, total_pay=Decimal("100.00")) for user in users]
+        )
+
+    def _grow(self):
+        # The worker gets years of closed history and more work types, plus 20 new workers with 50 logs each
+        add_logs([self.assignment], 300, self.work_types, end=self.logs[0].time_in, leave_open=False)
+        extra = WorkAssignment.objects.create(user=self.worker)
+        extra.work_types.set([WorkType.objects.create(name=f"Extra {i}") for i in range(8)])
+        self._add_payees(seed_history(20, 50, self.work_types, prefix="large"))
+
+    def _cases(self):
+        closed_log = self.logs[0].id
+        worker = self.worker.id
+        return {
+            "admin_main_menu": reverse("admin_main_menu"),
+            "task_list": reverse("task_list"),
+            "assign_task": reverse("assign_task"),
+            "stop_shift": reverse("stop_shift", args=[closed_log]),
+            "delete_shift": reverse("delete_shift", args=[closed_log]),
+            "export_timelogs": reverse("export_timelogs"),
+            "export_payroll": reverse("export_payroll"),
+            "export_payouts": reverse("export_payouts", args=["gcash"]) + f"?week_start={self.week}",
+            "worktype_options": reverse("worktype_options"),
+            "worktype_edit": reverse("worktype_edit", args=[self.work_types[0].pk]),
+            # The worker's open log keeps this on the confirmation page instead of archiving
+            "worktype_delete": reverse("worktype_delete", args=[self.work_types[0].pk]),
+            "manage_users": reverse("manage_users"),
+            "admin_user_detail": reverse("admin_user_detail", args=[worker]),
+            "user_weekly_summary": reverse("user_weekly_summary", args=[worker, self.week.isoformat()]),
+            "user_week_list": reverse("user_week_list", args=[worker]),
+            "payroll_run": reverse("payroll_run"),
+            "cache_stats": reverse("cache_stats"),
+            "account_job": reverse("account_job", args=[self.job.id]),
+            "account_job_status": reverse("account_job_status", args=[self.job.id]),
+        }
+
+    def test_every_url_is_covered(self):
+        names = {pattern.name for pattern in admin_urls.urlpatterns}
+        self.assertEqual(names, set(self._cases()))
+
+    def test_query_counts_do_not_grow_with_data(self):
+        cases = {label: (self.client, url) for label, url in self._cases().items()}
+        self.assertConstantQueries(cases, self._grow)
+
+
+class ClockInStormTest(LiveServerTestCase):
+    def test_storm_against_live_server(self):
+        out = StringIO()
+        call_command(
+            "clockin_storm", "--target", f"wsgi={self.live_server_url}",
+            "--workers", "6", "--concurrency", "3", stdout=out,
+        )
+        self.assertRegex(out.getvalue(), r"wsgi: 6 clock-ins .* errors 0 \| open logs 6")
+        self.assertFalse(User.objects.filter(username__startswith="storm_").exists())
+
+    def test_keeps_a_storm_work_type_it_did_not_create(self):
+        existing = WorkType.objects.create(name="Storm Test")
+        call_command(
+            "clockin_storm", "--target", f"wsgi={self.live_server_url}", "--workers", "2", stdout=StringIO(),
+        )
+        self.assertTrue(WorkType.objects.filter(pk=existing.pk).exists())
+
+
 # 👇 Add this class for manual browser testing
 class WeeklyPayrollLiveTest(LiveServerTestCase):
     def setUp(self):
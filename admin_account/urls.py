@@ -7,6 +7,9 @@ urlpatterns = [
     path("tasks/assign/", views.assign_task, name="assign_task"),
     path('tasks/stop/<int:log_id>/', views.stop_shift, name='stop_shift'),
     path('tasks/delete/<int:log_id>/', views.delete_shift, name='delete_shift'),
+    path("export/timelogs/", views.export_timelogs, name="export_timelogs"),
+    path("export/payroll/", views.export_payroll, name="export_payroll"),
+    path("export/payouts/<str:channel>/", views.export_payouts, name="export_payouts"),
 
     path('options/', views.worktype_options, name='worktype_options'),
     path('options/edit/<int:pk>/', views.worktype_edit, name='worktype_edit'),
@@ -14,6 +17,8 @@ urlpatterns = [
     path("worktype/<int:pk>/delete/", views.worktype_delete, name="worktype_delete"),
     path("manage-users/", views.manage_users, name="manage_users"),
     path('manage-users/<int:user_id>/', views.admin_user_detail, name='admin_user_detail'),
+    path("account-jobs/<int:job_id>/", views.account_job, name="account_job"),
+    path("account-jobs/<int:job_id>/status/", views.account_job_status, name="account_job_status"),
     
     path(
     "admin_account/user-weekly-summary/<int:user_id>/<str:week_start>/",
@@ -22,6 +27,8 @@ urlpatterns = [
     ),
     
     path("user-week-list/<int:user_id>/", views.user_week_list, name="user_week_list"),
+    path("payroll/run/", views.payroll_run, name="payroll_run"),
+    path("cache/stats/", views.cache_stats, name="cache_stats"),
 
 
 ]
@@ -2,22 +2,34 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import user_passes_test
 from .forms import WorkAssignmentForm, WorkTypeForm, AdminWorkAssignmentForm, AdminSingleWorkAssignmentForm
 from django.db.models import F, ExpressionWrapper, DurationField
-from django.db.models import Min, Max, F, Q
+from django.db.models import Min, Max, F, Q, Exists, OuterRef, Case, When, Value, CharField
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta, datetime
 from django import forms  
 from django.contrib import messages
-from django.utils.timezone import localtime, now
+from django.utils.timezone import localtime
 from django.db.models import Sum, F, ExpressionWrapper, DurationField
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
 from django.core.paginator import Paginator
-
-
-from .models import WorkAssignment, WorkType, WeeklyPayroll
+from django.http import StreamingHttpResponse, Http404, JsonResponse
+from django.conf import settings
+from django.template.loader import render_to_string
+from . import caching
+from .dates import local_day_bounds
+from .dropdowns import WORKTYPE_SCOPE, work_type_options
+from . import account_jobs, exports, payouts
+from .pagination import keyset_paginate
+from .payroll import run_payroll, week_start_for
+from .worktype_archive import affected_users, archive_work_type
+
+
+from .models import WorkAssignment, WorkType, WeeklyPayroll, DailyHours, WeeklyHours, AccountJob
 from user_account.models import TimeLog  # import TimeLog
-from accounts.models import Profile
+from user_account.models import ArchivedTimeLog
+from user_account.archive import archived_through, cold_logs
 
 User = get_user_model()
 
@@ -40,55 +52,32 @@ def assign_task(request):
 
 @superuser_required
 def task_list(request):
-    # Get filter values
-    date_filter = request.GET.get("date_filter")
-    work_type_filter = request.GET.get("work_type_filter")
-    status_filter = request.GET.get("status_filter")  # "ongoing" or "done"
-
-    # Base queryset
-    logs = TimeLog.objects.select_related("user", "task").order_by("-time_in")
-
-    # Filter by date (use datetime.date)
-    if date_filter:
-        try:
-            parsed_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-            start_dt = timezone.make_aware(datetime.combine(parsed_date, datetime.min.time()))
-            end_dt = timezone.make_aware(datetime.combine(parsed_date, datetime.max.time()))
-            logs = logs.filter(time_in__gte=start_dt, time_in__lte=end_dt)
-        except ValueError:
-            logs = logs.none()
-
-
-    # Filter by work type
-    if work_type_filter:
-        logs = logs.filter(work_type_names__icontains=work_type_filter)
-
-    # Filter by status
-    if status_filter == "ongoing":
-        logs = logs.filter(time_out__isnull=True)
-    elif status_filter == "done":
-        logs = logs.filter(time_out__isnull=False)
+    # Same filters as the CSV export, including hiding ongoing logs whose
+    # assignment no longer has an active work type
+    logs = exports.filter_timelogs(request.GET).select_related("user", "task")
+
+    # Archived (cold) history, only read when the requested range reaches it
+    archived_logs = exports.filter_archived_timelogs(request.GET)
+
+    # Work type dropdown values (cached DISTINCT query)
+    all_work_types = work_type_options()
+
+    # Keyset pagination on (time_in, id): reads only the visible page + 1 lookahead row
+    page_obj = keyset_paginate(
+        logs,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=5,
+        archive=archived_logs.select_related("user") if archived_logs is not None else None,
+        archive_newest=archived_through(),
+    )
 
     timelogs = []
-    all_timelogs_dates = set()
-    all_work_types = set()
-
-    for log in logs:
-        if log.time_out is None and log.task and not log.task.work_types.filter(is_active=True).exists():
-            continue
-
+    for log in page_obj:
         work_types = log.work_type_names or "No type"
         local_in = timezone.localtime(log.time_in) if log.time_in else None
         local_out = timezone.localtime(log.time_out) if log.time_out else None
 
-        # Track unique values for dropdowns
-        if local_in:
-            all_timelogs_dates.add(local_in.date())
-        if log.work_type_names:
-            all_work_types.add(log.work_type_names)
-        elif log.task and log.task.work_types.exists():
-            all_work_types.update([wt.name for wt in log.task.work_types.all()])
-
         total_hours = None
         if local_in and local_out:
             delta = local_out - local_in
@@ -103,17 +92,13 @@ def task_list(request):
             "status": "Done" if local_out else "Ongoing",
             "work_types": work_types,
             "total_hours": f"{total_hours} hrs" if total_hours is not None else "Ongoing",
+            "archived": isinstance(log, ArchivedTimeLog),
         })
-
-    # Pagination
-    paginator = Paginator(timelogs, 5)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = timelogs
 
     context = {
         "page_obj": page_obj,
-        "all_timelogs_dates": sorted(all_timelogs_dates, reverse=True),
-        "all_work_types": sorted(all_work_types),
+        "all_work_types": all_work_types,
         "request": request,  # preserve filter values in template
     }
     return render(request, "admin_account/task_list.html", context)
@@ -143,9 +128,87 @@ def delete_shift(request, log_id):
     return redirect('task_list')
 
 
+@superuser_required
+def export_timelogs(request):
+    """Stream time logs as CSV using the same filters as task_list."""
+    logs = exports.filter_timelogs(request.GET)
+    archived_logs = exports.filter_archived_timelogs(request.GET)
+    response = StreamingHttpResponse(exports.timelog_rows(logs, archived_logs), content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="timelogs.csv"'
+    return response
+
+
+@superuser_required
+def export_payroll(request):
+    """Stream weekly payroll rows as CSV."""
+    payrolls = exports.filter_payrolls(request.GET)
+    response = StreamingHttpResponse(exports.payroll_rows(payrolls), content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="weekly_payroll.csv"'
+    return response
+
+
+@superuser_required
+def export_payouts(request, channel):
+    """Stream a GCash or bank disbursement file for one closed pay week."""
+    if channel not in payouts.CHANNELS:
+        raise Http404("Unknown payout channel.")
+    try:
+        week_start = payouts.closed_week(datetime.strptime(request.GET.get("week_start", ""), "%Y-%m-%d").date())
+    except ValueError:
+        messages.error(request, "Please choose a valid week to pay out.")
+        return redirect("payroll_run")
+    except payouts.PayoutError as exc:
+        messages.error(request, str(exc))
+        return redirect("payroll_run")
+
+    response = StreamingHttpResponse(payouts.payout_rows(week_start, channel), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="payout_{channel}_{week_start:%Y%m%d}.csv"'
+    return response
+
+
 @superuser_required
 def admin_main_menu(request):
-    return render(request, "admin_account/main_menu.html")
+    # The menu cards are static, so render them once per cache lifetime
+    menu_cards = caching.cached(
+        "admin_main_menu", lambda: render_to_string("admin_account/main_menu_cards.html")
+    )
+    return render(request, "admin_account/main_menu.html", {"menu_cards": menu_cards})
+
+
+@superuser_required
+def cache_stats(request):
+    """Per-process hit/miss counters of the dashboard caches, for tuning."""
+    return JsonResponse({"backend": settings.CACHES["default"]["BACKEND"], "namespaces": caching.cache_stats()})
+
+@superuser_required
+def payroll_run(request):
+    today = timezone.localdate()
+    default_week = week_start_for(today) - timedelta(days=7)
+
+    if request.method == "POST":
+        try:
+            first_week = datetime.strptime(request.POST.get("week_start", ""), "%Y-%m-%d").date()
+            week_end = request.POST.get("week_end")
+            last_week = datetime.strptime(week_end, "%Y-%m-%d").date() if week_end else first_week
+        except ValueError:
+            messages.error(request, "Please enter valid dates.")
+            return redirect("payroll_run")
+
+        if last_week < first_week:
+            messages.error(request, "The end week must not be before the start week.")
+            return redirect("payroll_run")
+
+        result = run_payroll(first_week, last_week)
+        messages.success(
+            request,
+            f"Payroll computed: {result.rows} rows over {result.weeks} week(s) "
+            f"in {result.elapsed:.2f}s ({result.rows_per_second:.0f} rows/s)."
+        )
+        return redirect("payroll_run")
+
+    return render(request, "admin_account/payroll_run.html", {
+        "default_week": default_week,
+    })
 
 @superuser_required
 def worktype_options(request):
@@ -158,7 +221,9 @@ def worktype_options(request):
         form = WorkTypeForm()
 
     # 👇 only fetch active worktypes
-    worktypes = WorkType.objects.filter(is_active=True)
+    worktypes = caching.cached(
+        "worktype_list", lambda: list(WorkType.objects.filter(is_active=True)), scopes=[WORKTYPE_SCOPE]
+    )
 
     return render(request, 'admin_account/options.html', {
         'form': form,
@@ -181,28 +246,23 @@ def worktype_edit(request, pk):
 def worktype_delete(request, pk):
     worktype = get_object_or_404(WorkType, pk=pk)
 
-    # Get ongoing logs + users
-    ongoing_logs = TimeLog.objects.filter(
-        task__work_types=worktype,
-        time_out__isnull=True
-    ).select_related("user")
-
     if request.method == "POST":
-        worktype.is_active = False
-        worktype.save()
+        archive_work_type(worktype)
         return redirect("worktype_options")
 
+    # Users still clocked in on it (count + first names, one query)
+    user_count, users = affected_users(worktype)
+
     # If there are ongoing logs -> show confirmation page with names
-    if ongoing_logs.exists():
-        users = [log.user.username for log in ongoing_logs]
+    if user_count:
         return render(request, "admin_account/worktype_confirm_delete.html", {
             "worktype": worktype,
-            "users": users
+            "users": users,
+            "more_users": user_count - len(users),
         })
 
     # If no ongoing logs -> just archive immediately
-    worktype.is_active = False
-    worktype.save()
+    archive_work_type(worktype)
     return redirect("worktype_options")
 
 
@@ -214,48 +274,51 @@ def manage_users(request):
     sort_order = request.GET.get("sort", "asc")  # default ascending
     name_search = request.GET.get("name_search", "").strip().lower()
 
-    users = User.objects.filter(is_superuser=False)
-
-    user_list = []
-    for u in users:
-        active_tasks = WorkAssignment.objects.filter(user=u, work_types__is_active=True)
-        ongoing_logs = TimeLog.objects.filter(user=u, time_out__isnull=True)
-
-        # Work status
-        if ongoing_logs.exists():
-            work_status = "On-going"
-        elif active_tasks.exists():
-            work_status = "Standby"
-        else:
-            work_status = "Unassigned"
-
-        # Account status
-        account_status = "Active" if u.is_active else "Deactivated"
-
-        # Apply name search filter
-        if name_search and name_search not in u.username.lower():
-            continue
-
-        user_list.append({
-            "user": u,
-            "work_status": work_status,
-            "account_status": account_status
-        })
+    # Work/account status computed in SQL (no per-user queries)
+    users = User.objects.filter(is_superuser=False).annotate(
+        work_status=Case(
+            When(
+                Exists(TimeLog.objects.filter(user=OuterRef("pk"), time_out__isnull=True)),
+                then=Value("On-going"),
+            ),
+            When(
+                Exists(WorkAssignment.objects.filter(user=OuterRef("pk"), work_types__is_active=True)),
+                then=Value("Standby"),
+            ),
+            default=Value("Unassigned"),
+            output_field=CharField(),
+        ),
+        account_status=Case(
+            When(is_active=True, then=Value("Active")),
+            default=Value("Deactivated"),
+            output_field=CharField(),
+        ),
+    )
 
-    # Apply filters
+    # Apply name search & filters
+    if name_search:
+        users = users.filter(username__icontains=name_search)
     if account_filter:
-        user_list = [u for u in user_list if u["account_status"] == account_filter]
+        users = users.filter(account_status=account_filter)
     if work_filter:
-        user_list = [u for u in user_list if u["work_status"] == work_filter]
+        users = users.filter(work_status=work_filter)
 
     # Sort by username
-    reverse = True if sort_order == "desc" else False
-    user_list.sort(key=lambda x: x["user"].username.lower(), reverse=reverse)
+    username_order = Lower("username").desc() if sort_order == "desc" else Lower("username").asc()
+    users = users.order_by(username_order, "id")
 
-    # Pagination
-    paginator = Paginator(user_list, 10)
+    # Pagination (on the queryset, only the visible page is fetched)
+    paginator = Paginator(users, 10)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = [
+        {
+            "user": u,
+            "work_status": u.work_status,
+            "account_status": u.account_status,
+        }
+        for u in page_obj.object_list
+    ]
 
     context = {
         "page_obj": page_obj,
@@ -269,60 +332,37 @@ def manage_users(request):
 
 @superuser_required
 def admin_user_detail(request, user_id):
-    user = get_object_or_404(User, pk=user_id)
-
-    # Fetch or create profile
-    profile, _ = Profile.objects.get_or_create(user=user)
-
-    # --------------------------
-    # ACTIVE ASSIGNED WORKTYPES
-    # --------------------------
-    assigned_worktypes = []
-    for wt in WorkType.objects.filter(
-        assignments__user=user,
-        assignments__logs_is_active_in_user=True,
-        is_active=True
-    ).distinct():
-
-        has_active_log = TimeLog.objects.filter(
-            user=user,
-            time_out__isnull=True,
-            task__work_types=wt
-        ).exists()
-
-        assigned_worktypes.append({
-            "id": wt.id,
-            "name": wt.name,
-            "has_active_log": has_active_log,
-        })
+    # Profile comes with the user; a missing one is shown as blanks, never created on a GET
+    user = get_object_or_404(User.objects.select_related("profile"), pk=user_id)
+    profile = getattr(user, "profile", None)
 
     # --------------------------
     # HANDLE POST REQUESTS
     # --------------------------
     if request.method == "POST":
 
-        # ----- DEACTIVATE USER -----
-        if "deactivate_account" in request.POST:
-            user.is_active = False
-            user.save()
-            TimeLog.objects.filter(user=user, time_out__isnull=True).update(time_out=timezone.now())
-            messages.success(request, f"User {user.username} has been deactivated.")
-            return redirect("admin_user_detail", user_id=user.id)
-
-        # ----- DELETE ACCOUNT -----
-        elif "delete_account" in request.POST:
-            TimeLog.objects.filter(user=user).delete()
-            WorkAssignment.objects.filter(user=user).delete()
-            username = user.username
-            user.delete()
-            messages.success(request, f"User {username} and all associated logs have been deleted.")
-            return redirect("manage_users")
+        # ----- DEACTIVATE / DELETE USER -----
+        # Both run as chunked jobs (account_jobs.py) so a long history never holds the write lock for long
+        if "deactivate_account" in request.POST or "delete_account" in request.POST:
+            kind = AccountJob.DELETE if "delete_account" in request.POST else AccountJob.DEACTIVATE
+            job = account_jobs.start_job(user, kind)
+            account_jobs.launch(job)
+            return redirect("account_job", job_id=job.id)
 
         # ----- REACTIVATE USER -----
         elif "reactivate_account" in request.POST:
-            user.is_active = True
-            user.save()
-            messages.success(request, f"User {user.username} has been reactivated.")
+            # A job still running would keep closing or deleting the reactivated account's rows
+            job = AccountJob.objects.filter(user=user).exclude(status=AccountJob.DONE).first()
+            if job:
+                messages.error(
+                    request,
+                    f"User {user.username} has an unfinished {job.get_kind_display().lower()} job "
+                    "and cannot be reactivated until it finishes.",
+                )
+            else:
+                user.is_active = True
+                user.save()
+                messages.success(request, f"User {user.username} has been reactivated.")
             return redirect("admin_user_detail", user_id=user.id)
 
         # ----- REMOVE WORKTYPE -----
@@ -391,10 +431,27 @@ def admin_user_detail(request, user_id):
     else:
         form = AdminSingleWorkAssignmentForm(user=user)
 
+    # --------------------------
+    # ACTIVE ASSIGNED WORKTYPES
+    # --------------------------
+    # One query, each flagged with whether the user has an open log in it
+    assigned_worktypes = list(
+        WorkType.objects.filter(
+            assignments__user=user,
+            assignments__logs_is_active_in_user=True,
+            is_active=True
+        ).distinct().annotate(
+            has_active_log=Exists(
+                TimeLog.objects.filter(user=user, time_out__isnull=True, task__work_types=OuterRef("pk"))
+            )
+        ).order_by("name").values("id", "name", "has_active_log")
+    )
+
     # --------------------------
     # TIME LOGS (HISTORICAL + ONGOING)
     # --------------------------
-    logs = TimeLog.objects.filter(user=user).select_related("task").order_by("-time_in")
+    log_columns = ("id", "time_in", "time_out", "work_type_names", "archived")
+    logs = TimeLog.objects.filter(user=user).annotate(archived=Value(False))
 
     # --------------------------
     # FILTERING
@@ -402,51 +459,65 @@ def admin_user_detail(request, user_id):
     date_filter = request.GET.get("date_filter")
     work_type_filter = request.GET.get("work_type_filter")
 
-    # Build all work types from user's logs for dropdown
-    all_work_types = set()
-    for log in logs:
-        if getattr(log, "work_type_names", None):
-            all_work_types.add(log.work_type_names)
+    # Work type dropdown values for this user (cached DISTINCT query)
+    all_work_types = work_type_options(user.id)
+
+    # Archived (cold) history, only read when the requested range reaches it
+    archived_logs = cold_logs()
 
     # Apply filters
     if date_filter:
         try:
-            logs = logs.filter(time_in__date=date_filter)
+            start_dt, end_dt = local_day_bounds(datetime.strptime(date_filter, "%Y-%m-%d").date())
+            logs = logs.filter(time_in__gte=start_dt, time_in__lt=end_dt)
+            archived_logs = cold_logs(start_dt)
+            if archived_logs is not None:
+                archived_logs = archived_logs.filter(time_in__gte=start_dt, time_in__lt=end_dt)
         except ValueError:
             pass
 
     if work_type_filter:
-        logs = logs.filter(work_type_names__icontains=work_type_filter)
+        logs = logs.filter(work_type_tags__name=work_type_filter)
+        if archived_logs is not None:
+            archived_logs = archived_logs.filter(work_type_tags__name=work_type_filter)
+
+    logs = logs.values(*log_columns)
+    if archived_logs is not None:
+        logs = logs.union(
+            archived_logs.filter(user=user).annotate(archived=Value(True)).values(*log_columns), all=True
+        )
 
     # --------------------------
-    # Prepare timelog data
+    # PAGINATION (5 logs per page) -- COUNT + LIMIT/OFFSET in SQL, newest first
+    # --------------------------
+    paginator = Paginator(logs.order_by(F("time_in").desc(nulls_last=True), F("id").desc()), 5)
+    page_number = request.GET.get("page")
+    page_obj = paginator.get_page(page_number)
+
+    # --------------------------
+    # Prepare timelog data (visible page only)
     # --------------------------
     timelogs = []
-    for log in logs:
-        work_types = log.work_type_names or "No type"
+    for log in page_obj:
+        time_in, time_out = log["time_in"], log["time_out"]
 
         time_in_str, time_out_str, total_hours = "", "", None
-        if log.time_in:
-            time_in_str = localtime(log.time_in).strftime("%I:%M %p")
-        if log.time_out:
-            time_out_str = localtime(log.time_out).strftime("%I:%M %p")
-            total_hours = round((log.time_out - log.time_in).total_seconds() / 3600, 2)
+        if time_in:
+            time_in_str = localtime(time_in).strftime("%I:%M %p")
+        if time_out:
+            time_out_str = localtime(time_out).strftime("%I:%M %p")
+            total_hours = round((time_out - time_in).total_seconds() / 3600, 2)
 
         timelogs.append({
-            "id": log.id,
-            "date": localtime(log.time_in).date() if log.time_in else "",
+            "id": log["id"],
+            "date": localtime(time_in).date() if time_in else "",
             "time_in": time_in_str,
             "time_out": time_out_str,
-            "work_types": work_types,
+            "work_types": log["work_type_names"] or "No type",
             "total_hours": f"{total_hours} hrs" if total_hours is not None else "Ongoing",
+            "archived": log["archived"],
         })
-
-    # --------------------------
-    # PAGINATION (5 logs per page)
-    # --------------------------
-    paginator = Paginator(timelogs, 5)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = timelogs
 
     # --------------------------
     # RENDER CONTEXT
@@ -459,112 +530,165 @@ def admin_user_detail(request, user_id):
         "page_obj": page_obj,
         "date_filter": date_filter,
         "work_type_filter": work_type_filter,
-        "all_work_types": sorted(all_work_types),  # ✅ for dropdown
+        "all_work_types": all_work_types,  # ✅ for dropdown
     }
 
     return render(request, "admin_account/admin_user_detail.html", context)
 
 
 
+@superuser_required
+def account_job(request, job_id):
+    """Progress page of an account deactivation/deletion job (polls account_job_status)."""
+    job = get_object_or_404(AccountJob, pk=job_id)
+    return render(request, "admin_account/account_job.html", {"job": job})
+
+
+@superuser_required
+def account_job_status(request, job_id):
+    job = get_object_or_404(AccountJob, pk=job_id)
+    return JsonResponse({
+        "kind": job.kind,
+        "status": job.status,
+        "step": job.step,
+        "processed": job.processed,
+        "total": job.total,
+        "percent": job.percent,
+        "error": job.error,
+    })
+
+
 @superuser_required
 def user_week_list(request, user_id):
     user = get_object_or_404(User, id=user_id)
-    logs = TimeLog.objects.filter(user=user, time_out__isnull=False).order_by("time_in")
+    today = timezone.localdate()
+    last_sunday = today - timedelta(days=today.weekday() + 1)
+    # Cached per user until one of their logs or payroll rows changes (see signals.py)
+    all_weeks = caching.cached(
+        "user_week_list",
+        lambda: _build_week_list(user, last_sunday),
+        parts=[user.id, last_sunday],
+        scopes=[("user", user.id)],
+    )
 
     # If user has no logs, just return an empty context
-    if not logs.exists():
+    if not all_weeks:
         return render(request, "admin_account/user_week_list.html", {
             "selected_user": user,
             "page_obj": None,
             "all_weeks": [],
         })
 
-    # Get first and last dates
-    first_log_date = logs.first().time_in.date()
-    today = now().date()
-    start_of_first_week = first_log_date - timedelta(days=first_log_date.weekday())
-    last_sunday = today - timedelta(days=today.weekday() + 1)
+    # Paginate
+    paginator = Paginator(all_weeks, 5)
+    page_number = request.GET.get("page")
+    page_obj = paginator.get_page(page_number)
 
-    # Build all weeks
-    all_weeks = []
-    current_start = start_of_first_week
+    return render(request, "admin_account/user_week_list.html", {
+        "selected_user": user,
+        "page_obj": page_obj,
+        "all_weeks": all_weeks,
+    })
 
-    while current_start <= last_sunday:
-        current_end = current_start + timedelta(days=6)
 
-        # Does this week have logs?
-        has_logs = logs.filter(
-            time_in__date__gte=current_start,
-            time_in__date__lte=current_end
-        ).exists()
+def _build_week_list(user, last_sunday):
+    """Every week from the user's first logged week up to ``last_sunday``, newest first."""
+    # Precomputed weekly totals (Monday starts in the site time zone, Asia/Manila)
+    hours_by_week = dict(
+        WeeklyHours.objects.filter(user=user, log_count__gt=0)
+        .order_by("week_start")
+        .values_list("week_start", "total_hours")
+    )
+    if not hours_by_week:
+        return []
+
+    # First week with logs, up to the last completed week (ending Sunday)
+    start_of_first_week = min(hours_by_week)
 
-        # Get payroll record (may be None)
-        payroll = WeeklyPayroll.objects.filter(
+    # One bulk query for payroll rows, keyed by week_start
+    payrolls = {
+        payroll.week_start: payroll
+        for payroll in WeeklyPayroll.objects.filter(
             user=user,
-            week_start=current_start
-        ).first()
+            week_start__gte=start_of_first_week,
+            week_start__lte=last_sunday,
+        )
+    }
 
+    # Build all weeks
+    all_weeks = []
+    current_start = start_of_first_week
+
+    while current_start <= last_sunday:
         all_weeks.append({
             "start": current_start,
-            "end": current_end,
-            "has_logs": has_logs,
-            "payroll": payroll,  # either object or None
+            "end": current_start + timedelta(days=6),
+            "has_logs": current_start in hours_by_week,
+            "hours": hours_by_week.get(current_start, Decimal("0.00")),
+            "payroll": payrolls.get(current_start),  # either object or None
         })
-
         current_start += timedelta(days=7)
 
     # Sort newest first
-    all_weeks = sorted(all_weeks, key=lambda w: w["start"], reverse=True)
+    return sorted(all_weeks, key=lambda w: w["start"], reverse=True)
 
-    # Paginate
-    paginator = Paginator(all_weeks, 5)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
 
-    return render(request, "admin_account/user_week_list.html", {
-        "selected_user": user,
-        "page_obj": page_obj,
-        "all_weeks": all_weeks,
-    })
-    
-@superuser_required
-def user_weekly_summary(request, user_id, week_start):
-    user = get_object_or_404(User, id=user_id)
-    start_of_week = datetime.strptime(week_start, "%Y-%m-%d").date()
+def _build_daily_summary(user, start_of_week, weekdays):
+    """Logs and hours per weekday of one week, plus the weekly total."""
     end_of_week = start_of_week + timedelta(days=6)
-    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
     # Fetch logs for display
+    week_start_dt, week_end_dt = local_day_bounds(start_of_week, end_of_week)
     logs = TimeLog.objects.filter(
         user=user,
-        time_in__date__gte=start_of_week,
-        time_in__date__lte=end_of_week,
+        time_in__gte=week_start_dt,
+        time_in__lt=week_end_dt,
         time_out__isnull=False
     ).order_by("time_in")
-
-    # Prepare daily summary
+    archived_logs = cold_logs(week_start_dt)
+    if archived_logs is not None:
+        logs = sorted(
+            [*logs, *archived_logs.filter(user=user, time_in__gte=week_start_dt, time_in__lt=week_end_dt)],
+            key=lambda log: log.time_in,
+        )
+
+    # Prepare daily summary (totals come from the precomputed hours rollup)
     daily_summary = {day: {"logs": [], "total_hours": Decimal('0.00')} for day in weekdays}
     calculated_total_hours = Decimal('0.00')
+    for day, hours in DailyHours.objects.filter(
+        user=user, day__gte=start_of_week, day__lte=end_of_week
+    ).values_list("day", "total_hours"):
+        daily_summary[weekdays[(day - start_of_week).days]]["total_hours"] = hours
+        calculated_total_hours += hours
 
     for log in logs:
-        log_day_index = (log.time_in.date() - start_of_week).days
+        local_in = localtime(log.time_in)
+        local_out = localtime(log.time_out)
+        log_day_index = (local_in.date() - start_of_week).days
         if 0 <= log_day_index < 7:
-            day_name = weekdays[log_day_index]
-            local_in = localtime(log.time_in)
-            local_out = localtime(log.time_out)
-
-            # Calculate hours as Decimal with 2 decimal places
-            hours = Decimal((local_out - local_in).total_seconds() / 3600).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-
-            daily_summary[day_name]["logs"].append({
+            daily_summary[weekdays[log_day_index]]["logs"].append({
                 "task": log.work_type_names,
                 "time_in": local_in.strftime("%I:%M %p"),
                 "time_out": local_out.strftime("%I:%M %p"),
             })
 
-            # Update daily and total hours
-            daily_summary[day_name]["total_hours"] = (daily_summary[day_name]["total_hours"] + hours).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            calculated_total_hours += hours
+    return daily_summary, calculated_total_hours
+
+
+@superuser_required
+def user_weekly_summary(request, user_id, week_start):
+    user = get_object_or_404(User, id=user_id)
+    start_of_week = datetime.strptime(week_start, "%Y-%m-%d").date()
+    end_of_week = start_of_week + timedelta(days=6)
+    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    # Cached per user and week until a log or payroll row in that week changes (see signals.py)
+    daily_summary, calculated_total_hours = caching.cached(
+        "user_weekly_summary",
+        lambda: _build_daily_summary(user, start_of_week, weekdays),
+        parts=[user.id, start_of_week],
+        scopes=[caching.week_scope(user.id, start_of_week)],
+    )
 
     # Get or create payroll
     payroll, created = WeeklyPayroll.objects.get_or_create(
@@ -0,0 +1,95 @@
+# admin_account/worktype_archive.py
+"""
+Archiving a WorkType as explicit, set-based steps instead of a post_save cascade.
+
+``affected_users`` previews who is clocked in on the work type with a single
+query. ``archive_work_type`` flips ``is_active`` with one UPDATE, then deletes
+the open logs in chunks of ``settings.WORKTYPE_ARCHIVE_CHUNK``. Each chunk is
+its own short write transaction, so the SQLite writer lock is never held for
+more than one chunk. The slowest chunk is reported in the result.
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, OuterRef, Q, Window
+
+from payroll_main.db import write_transaction
+from user_account.models import TimeLog, TimeLogWorkType
+from . import caching
+from .dropdowns import invalidate_work_type_options
+from .models import WorkAssignment, WorkType
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, "WORKTYPE_ARCHIVE_CHUNK", 200)
+PREVIEW_LIMIT = 50
+
+
+@dataclass
+class WorkTypeArchiveResult:
+    deleted: int
+    chunks: int
+    longest_chunk: float  # seconds the slowest chunk held the write lock
+
+
+def open_logs(work_type):
+    """Open logs clocked in on ``work_type`` (older logs without a work type: via their assignment)."""
+    # A subquery rather than a join over the assignment's work types, so each log appears once
+    assignments = WorkAssignment.work_types.through.objects.filter(worktype=work_type).values("workassignment_id")
+    return TimeLog.objects.filter(
+        Q(work_type=work_type) | Q(work_type__isnull=True, task__in=assignments),
+        time_out__isnull=True,
+    )
+
+
+def affected_users(work_type, limit=PREVIEW_LIMIT):
+    """Return ``(count, usernames)`` of users clocked in on ``work_type``; at most ``limit`` names, one query."""
+    rows = list(
+        User.objects.filter(Exists(open_logs(work_type).filter(user=OuterRef("pk"))))
+        .annotate(total=Window(Count("id")))
+        .order_by("username")
+        .values_list("username", "total")[:limit]
+    )
+    return (rows[0][1] if rows else 0), [username for username, _ in rows]
+
+
+def archive_work_type(work_type, chunk_size=CHUNK_SIZE):
+    """Deactivate ``work_type`` and delete its open logs, ``chunk_size`` per transaction."""
+    WorkType.objects.filter(pk=work_type.pk).update(is_active=False)
+    work_type.is_active = False
+    # update() sends no post_save, so refresh the cached dropdowns and clock-in lists here
+    invalidate_work_type_options()
+
+    deleted = chunks = 0
+    longest = 0.0
+    while True:
+        started = time.perf_counter()
+        count = _delete_open_logs(work_type, chunk_size)
+        if not count:
+            break
+        longest = max(longest, time.perf_counter() - started)
+        deleted += count
+        chunks += 1
+
+    logger.info(
+        "Archived work type %s: %d open logs deleted in %d chunks, longest %.1fms",
+        work_type.pk, deleted, chunks, longest * 1000,
+    )
+    return WorkTypeArchiveResult(deleted=deleted, chunks=chunks, longest_chunk=longest)
+
+
+@write_transaction
+def _delete_open_logs(work_type, chunk_size):
+    rows = list(open_logs(work_type).order_by("id").values_list("id", "user_id", "time_in")[:chunk_size])
+    if not rows:
+        return 0
+    ids = [log_id for log_id, _, _ in rows]
+    TimeLogWorkType.objects.filter(log_id__in=ids).delete()
+    # Open logs are not in the hours rollup, so nothing to discard there
+    TimeLog.objects.filter(id__in=ids).delete()
+    caching.bump_logs([(user_id, time_in) for _, user_id, time_in in rows])
+    return len(rows)
@@ -0,0 +1,87 @@
+"""
+SQLite connection tuning and lock-contention retries.
+
+``apply_sqlite_pragmas`` runs on every new connection (connected in
+``PayrollMainConfig.ready``) and applies ``settings.SQLITE_PRAGMAS``: WAL so
+readers do not block the writer, ``synchronous=NORMAL``, a busy timeout and
+larger page/mmap caches.
+
+``write_transaction`` wraps short write paths (clock in/out, kiosk batches,
+chunked archive/delete jobs) in a transaction that starts with ``BEGIN
+IMMEDIATE``, so they queue on the busy timeout instead of failing when a read
+lock is upgraded, and retries them with exponential backoff when the database
+is still locked after the busy timeout. Every other ``atomic()`` block keeps
+SQLite's default deferred mode and takes the write lock only when it writes.
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+logger = logging.getLogger("payroll_main.db")
+
+# Only meaningful for databases backed by a file
+FILE_ONLY_PRAGMAS = {"journal_mode", "mmap_size"}
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    in_memory = connection.is_in_memory_db()
+    # Straight on the sqlite3 connection, so pragmas never show up in query metrics
+    for name, value in pragmas.items():
+        if in_memory and name in FILE_ONLY_PRAGMAS:
+            continue
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def is_lock_error(exc):
+    return "database is locked" in str(exc) or "database table is locked" in str(exc)
+
+
+def immediate_atomic():
+    """
+    ``transaction.atomic()`` whose outermost block starts with ``BEGIN IMMEDIATE``
+    on SQLite; nested blocks are ordinary savepoints.
+    """
+    stack = ExitStack()
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        stack.enter_context(transaction.atomic())
+        return stack
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        stack.enter_context(transaction.atomic())
+    finally:
+        connection.transaction_mode = mode
+    return stack
+
+
+def write_transaction(func):
+    """
+    Run ``func`` in ``immediate_atomic()``, retrying up to
+    ``settings.SQLITE_WRITE_RETRIES`` times while the database is locked,
+    sleeping ``SQLITE_RETRY_BACKOFF * 2 ** attempt`` seconds (plus jitter).
+    Calls nested in an outer transaction are not retried.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = getattr(settings, "SQLITE_WRITE_RETRIES", 3)
+        backoff = getattr(settings, "SQLITE_RETRY_BACKOFF", 0.05)
+        for attempt in range(retries + 1):
+            try:
+                with immediate_atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == retries or not is_lock_error(exc) or connection.in_atomic_block:
+                    raise
+                delay = backoff * 2 ** attempt * (1 + random.random())
+                logger.warning("%s: database locked, retry %d in %.3fs", func.__name__, attempt + 1, delay)
+                time.sleep(delay)
+    return wrapper
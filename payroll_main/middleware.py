@@ -0,0 +1,111 @@
+"""
+Request metrics middleware.
+
+Records wall time, SQL query count and SQL time for every request and
+reports them as ``Server-Timing`` headers plus one structured log line.
+Views named in ``settings.QUERY_BUDGETS`` (or ``"<METHOD> <url name>"`` for a
+per-method budget) that run more queries than their budget log a warning, or raise ``QueryBudgetExceeded`` when
+``settings.QUERY_BUDGET_RAISE`` is on (as it is under the test runner).
+"""
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("payroll_main.requests")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryMetrics:
+    """``connection.execute_wrapper`` hook that only counts and times queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def _add_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def _remove_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+class RequestMetricsMiddleware:
+    # Async-capable, so async views (clock in/out) stay async end to end under ASGI
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = QueryMetrics()
+        started = time.perf_counter()
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = QueryMetrics()
+        started = time.perf_counter()
+        # The async ORM runs queries in the request's sync thread, whose connection
+        # is not the one visible from the event loop, so hook the wrapper in there
+        await sync_to_async(_add_wrapper)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_wrapper)(metrics)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    def finish(self, request, response, metrics, elapsed):
+        # Queries run while a StreamingHttpResponse is consumed happen after this point
+        response["Server-Timing"] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={metrics.duration * 1000:.1f};desc="{metrics.count} queries"'
+        )
+
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+        logger.info(
+            "request path=%s view=%s status=%s duration_ms=%.1f queries=%d db_ms=%.1f",
+            request.path, url_name, response.status_code,
+            elapsed * 1000, metrics.count, metrics.duration * 1000,
+            extra={
+                "path": request.path,
+                "url_name": url_name,
+                "status_code": response.status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+                "query_count": metrics.count,
+                "db_ms": round(metrics.duration * 1000, 1),
+            },
+        )
+
+        budgets = getattr(settings, "QUERY_BUDGETS", {})
+        budget = budgets.get(f"{request.method} {url_name}", budgets.get(url_name))
+        if budget is not None and metrics.count > budget:
+            message = f"{url_name} ran {metrics.count} queries (budget {budget}) for {request.path}"
+            if getattr(settings, "QUERY_BUDGET_RAISE", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
@@ -56,9 +56,11 @@ INSTALLED_APPS = [
     'accounts',
     'user_account',
     'admin_account.apps.AdminAccountConfig',
+    'payroll_main.apps.PayrollMainConfig',
 ]
 
 MIDDLEWARE = [
+    "payroll_main.middleware.RequestMetricsMiddleware",
     "django_browser_reload.middleware.BrowserReloadMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -71,6 +73,20 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'payroll_main.urls'
 
+# Per-request SQL query budgets, keyed by URL name or "<METHOD> <URL name>" (see payroll_main/middleware.py).
+# Exceeding a budget logs a warning; under "manage.py test" it raises instead.
+QUERY_BUDGETS = {
+    "task_list": 10,
+    "manage_users": 10,
+    "admin_user_detail": 10,
+    "POST admin_user_detail": 25,  # account and assignment actions
+    "user_week_list": 10,
+    "user_weekly_summary": 15,
+    "timelog_list": 10,
+    "timelog_create": 10,
+}
+QUERY_BUDGET_RAISE = False  # payroll_main.testing turns it on for the test run
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -96,10 +112,87 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests (seconds; 0 closes after each request)
+        'CONN_MAX_AGE': int(os.environ.get('PAYROLL_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        # A file-backed test database, so threaded tests wait on SQLite's
+        # real locks instead of failing on the shared in-memory cache
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# SQLite tuning, applied to every new connection (see payroll_main/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',           # readers no longer block the writer
+    'synchronous': 'NORMAL',         # fsync at checkpoints only; durable enough with WAL
+    'busy_timeout': 5000,            # ms to wait for a lock before "database is locked"
+    'cache_size': -20000,            # ~20 MB page cache per connection
+    'mmap_size': 128 * 1024 * 1024,  # bytes
+    'temp_store': 'MEMORY',
+}
+# Writes wrapped in payroll_main.db.write_transaction are retried this many
+# times when still locked, sleeping SQLITE_RETRY_BACKOFF * 2**attempt seconds
+SQLITE_WRITE_RETRIES = 3
+SQLITE_RETRY_BACKOFF = 0.05
+
+
+# Cache
+# "file" (default) is shared by every worker process on the host, so an
+# invalidation in one worker is seen by all. "locmem" keeps a separate cache
+# per process and only suits a single-process server; other workers never see
+# its invalidations, so entries are kept for a few seconds only. Tests use
+# their own locmem cache (payroll_main.testing.TestRunner). Dashboard entries
+# are versioned and invalidated from model signals (see admin_account/caching.py).
+
+CACHE_BACKEND = os.environ.get("PAYROLL_CACHE_BACKEND", "file")
+
+if CACHE_BACKEND == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "xjgpayroll",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+    DASHBOARD_CACHE_TIMEOUT = 5  # seconds
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("PAYROLL_CACHE_DIR", str(BASE_DIR / "cache")),
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+    DASHBOARD_CACHE_TIMEOUT = 60 * 60  # seconds
+# Lifetime of the version keys; entries never outlive them
+DASHBOARD_CACHE_VERSION_TIMEOUT = 24 * 60 * 60  # seconds
+
+TEST_RUNNER = "payroll_main.testing.TestRunner"
+
+# Closed logs from paid weeks older than this move to the archive table (manage.py archive_timelogs)
+TIMELOG_ARCHIVE_AFTER_DAYS = int(os.environ.get("TIMELOG_ARCHIVE_AFTER_DAYS", 180))
+
+# Kiosk punches older than this are rejected as "too old" (so are punches in already paid weeks)
+KIOSK_MAX_EVENT_AGE_DAYS = int(os.environ.get("KIOSK_MAX_EVENT_AGE_DAYS", 7))
+
+# Open logs deleted per write transaction when a work type is archived (bounds the writer lock)
+WORKTYPE_ARCHIVE_CHUNK = 200
+
+# Account deactivation/deletion jobs (admin_account/account_jobs.py): rows per write
+# transaction, and the pause between chunks that lets waiting clock-ins take the lock
+ACCOUNT_JOB_CHUNK = 200
+ACCOUNT_JOB_PAUSE = 0.05  # seconds
+# A running job without a chunk for this long is treated as interrupted (manage.py resume_account_jobs)
+ACCOUNT_JOB_STALE_AFTER = 60  # seconds
+# Jobs run in a background thread (payroll_main.testing runs them in the test thread, on commit)
+ACCOUNT_JOBS_IN_BACKGROUND = True
+# Slowest acceptable clock-in while an account job runs (checked by AccountJobTest)
+CLOCK_IN_LATENCY_BUDGET = 0.5  # seconds
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
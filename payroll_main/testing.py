@@ -0,0 +1,155 @@
+"""
+Test runner and query-complexity contract helpers for tests.
+
+``TestRunner`` (settings.TEST_RUNNER) swaps in the settings that only make
+sense under test, e.g. a per-process locmem cache instead of the shared one.
+
+``QueryContractMixin.assertConstantQueries`` renders a set of URLs, grows
+the data set, renders them again and asserts every URL ran the same number
+of SQL queries. On failure it prints the statements whose counts changed,
+grouped by normalized SQL template, which points straight at the N+1.
+"""
+import re
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+User = get_user_model()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"IN \((?:\s*(?:\?|%s)\s*,?)+\)")
+
+
+# Settings applied for the whole test run
+TEST_SETTINGS = {
+    # Never read or clear the shared dashboard cache of a running server
+    "CACHES": {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "xjgpayroll-tests",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    },
+    # Over-budget views fail the test instead of only logging a warning
+    "QUERY_BUDGET_RAISE": True,
+    # Account jobs run in the test thread, on commit, instead of a background thread
+    "ACCOUNT_JOBS_IN_BACKGROUND": False,
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**TEST_SETTINGS)
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN lists so repeated statements share one template."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def add_logs(assignments, count, work_types, end=None, leave_open=True):
+    """
+    Bulk-create ``count`` daily logs ending at ``end`` for every assignment's
+    user, cycling through ``work_types``; the newest one is left open when
+    ``leave_open`` is set. Tags and the hours rollup are kept in sync.
+    """
+    from user_account.models import TimeLog, TimeLogWorkType
+
+    end = end or timezone.now()
+    logs = []
+    for assignment in assignments:
+        for i in range(count):
+            work_type = work_types[i % len(work_types)]
+            time_in = end - timedelta(days=count - i)
+            is_open = leave_open and i == count - 1
+            logs.append(TimeLog(
+                user_id=assignment.user_id,
+                task=assignment,
+                work_type=work_type,
+                work_type_names=work_type.name,
+                time_in=time_in,
+                time_out=None if is_open else time_in + timedelta(hours=4),
+            ))
+    logs = TimeLog.objects.bulk_create(logs, batch_size=2000)
+    TimeLogWorkType.objects.bulk_create(
+        [TimeLogWorkType(log_id=log.id, user_id=log.user_id, work_type_id=log.work_type_id, name=log.work_type_names)
+         for log in logs],
+        batch_size=2000,
+    )
+    # bulk_create skips TimeLog.save()
+    call_command("rebuild_hours_rollup", stdout=StringIO())
+    return logs
+
+
+def seed_history(users, logs_per_user, work_types, prefix):
+    """Bulk-create ``users`` workers, each assigned ``work_types`` and given ``logs_per_user`` logs."""
+    from admin_account.models import WorkAssignment
+
+    password = make_password(None)
+    created = User.objects.bulk_create(
+        [User(username=f"{prefix}_{i:05d}", password=password) for i in range(users)]
+    )
+    assignments = WorkAssignment.objects.bulk_create([WorkAssignment(user=user) for user in created])
+    through = WorkAssignment.work_types.through
+    through.objects.bulk_create([
+        through(workassignment_id=assignment.id, worktype_id=wt.id)
+        for assignment in assignments
+        for wt in work_types
+    ])
+    add_logs(assignments, logs_per_user, work_types)
+    return created
+
+
+class QueryContractMixin:
+    """Mixin for ``TestCase`` classes asserting that views run a constant number of queries."""
+
+    def capture_queries(self, client, url):
+        cache.clear()  # measure the uncached path
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 500, f"{url} failed with {response.status_code}")
+        return [query["sql"] for query in ctx.captured_queries]
+
+    def assertConstantQueries(self, cases, grow):
+        """
+        ``cases`` maps a label to ``(client, url)``. Every case is rendered,
+        ``grow()`` is called once to enlarge the data set, and every case is
+        rendered again; each must run the same number of queries both times.
+        """
+        small = {label: self.capture_queries(client, url) for label, (client, url) in cases.items()}
+        grow()
+        large = {label: self.capture_queries(client, url) for label, (client, url) in cases.items()}
+
+        for label in cases:
+            with self.subTest(view=label):
+                if len(small[label]) != len(large[label]):
+                    self.fail(self._describe_growth(label, small[label], large[label]))
+
+    def _describe_growth(self, label, small, large):
+        before = Counter(normalize_sql(sql) for sql in small)
+        after = Counter(normalize_sql(sql) for sql in large)
+        lines = [f"{label}: {len(small)} queries before growing the data, {len(large)} after."]
+        for template in sorted(set(before) | set(after), key=lambda t: after[t] - before[t], reverse=True):
+            if before[template] != after[template]:
+                lines.append(f"  {before[template]} -> {after[template]}x  {template}")
+        return "\n".join(lines)
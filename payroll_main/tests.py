@@ -0,0 +1,181 @@
+import os
+import tempfile
+import time
+from threading import Barrier, Thread
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from admin_account.models import WorkType
+from payroll_main.db import apply_sqlite_pragmas, write_transaction
+from payroll_main.middleware import QueryBudgetExceeded
+from payroll_main.testing import QueryContractMixin, normalize_sql
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username="admin_tester", password="admin123", email="admin@example.com")
+        self.client.login(username="admin_tester", password="admin123")
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("task_list"))
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_structured_log_line(self):
+        with self.assertLogs("payroll_main.requests", level="INFO") as logs:
+            self.client.get(reverse("task_list"))
+        record = logs.records[0]
+        self.assertEqual(record.url_name, "task_list")
+        self.assertEqual(record.status_code, 200)
+        self.assertGreater(record.query_count, 0)
+
+    async def test_async_views_are_measured(self):
+        worker = await User.objects.acreate(username="async_metrics")
+        await self.async_client.aforce_login(worker)
+        response = await self.async_client.get(reverse("timelog_status"))
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    @override_settings(QUERY_BUDGETS={"task_list": 1}, QUERY_BUDGET_RAISE=False)
+    def test_budget_overrun_logs_warning(self):
+        with self.assertLogs("payroll_main.requests", level="WARNING") as logs:
+            response = self.client.get(reverse("task_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("task_list ran", logs.output[-1])
+
+    @override_settings(QUERY_BUDGETS={"task_list": 1}, QUERY_BUDGET_RAISE=True)
+    def test_budget_overrun_raises_in_tests(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse("task_list"))
+
+    @override_settings(QUERY_BUDGETS={"task_list": 100, "GET task_list": 1}, QUERY_BUDGET_RAISE=True)
+    def test_method_budget_overrides_view_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse("task_list"))
+
+
+class QueryContractHarnessTest(QueryContractMixin, TestCase):
+    def test_normalize_sql_groups_repeated_statements(self):
+        self.assertEqual(
+            normalize_sql("SELECT 1 FROM t WHERE id = 42 AND name = 'it''s' AND x IN (%s, %s, %s)"),
+            "SELECT ? FROM t WHERE id = ? AND name = ? AND x IN (...)",
+        )
+
+    def test_describe_growth_lists_changed_templates(self):
+        small = ["SELECT a FROM t", "SELECT b FROM u WHERE id = 1"]
+        large = small + ["SELECT b FROM u WHERE id = 2", "SELECT b FROM u WHERE id = 3"]
+        report = self._describe_growth("view", small, large)
+        self.assertIn("2 queries before growing the data, 4 after", report)
+        self.assertIn("1 -> 3x  SELECT b FROM u WHERE id = ?", report)
+        self.assertNotIn("SELECT a FROM t", report)
+
+
+def hammer(write, threads=8, writes=10):
+    """Run ``write(thread_index)`` from parallel threads; return how many raised a lock error."""
+    barrier = Barrier(threads)
+    errors = []
+
+    def worker(index):
+        barrier.wait()
+        for _ in range(writes):
+            try:
+                write(index)
+            except OperationalError:
+                errors.append(index)
+        connections.close_all()
+
+    pool = [Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return len(errors)
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite tuning only")
+class SqliteTuningTest(TransactionTestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    @override_settings(SQLITE_RETRY_BACKOFF=0)
+    def test_write_transaction_retries_lock_errors(self):
+        calls = []
+
+        @write_transaction
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("database is locked")
+            return "done"
+
+        with self.assertLogs("payroll_main.db", level="WARNING") as logs:
+            self.assertEqual(flaky(), "done")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(logs.records), 2)
+
+    def test_only_write_transactions_begin_immediate(self):
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            with transaction.atomic():
+                WorkType.objects.count()
+            write_transaction(WorkType.objects.count)()
+        self.assertEqual([sql for sql in statements if sql.startswith("BEGIN")], ["BEGIN", "BEGIN IMMEDIATE"])
+
+    def _baseline_errors(self, path):
+        """Lock errors for the same workload on an out-of-the-box Django SQLite database."""
+        connections.settings["baseline"] = connections.configure_settings({
+            "default": connections.settings["default"],
+            "baseline": {"ENGINE": "django.db.backends.sqlite3", "NAME": path},
+        })["baseline"]
+        # Default Django: rollback journal, 5s timeout, deferred transactions, no retries
+        connection_created.disconnect(dispatch_uid="payroll_main.sqlite_pragmas")
+        # Let the writer threads open the throwaway database
+        type(self).databases = {"default", "baseline"}
+        try:
+            with connections["baseline"].schema_editor() as editor:
+                editor.create_model(WorkType)
+
+            def baseline_write(index):
+                with transaction.atomic(using="baseline"):
+                    WorkType.objects.using("baseline").count()
+                    time.sleep(0.001)
+                    WorkType.objects.using("baseline").create(name=f"w{index}")
+
+            return hammer(baseline_write)
+        finally:
+            type(self).databases = {"default"}
+            connections["baseline"].close()
+            connection_created.connect(apply_sqlite_pragmas, dispatch_uid="payroll_main.sqlite_pragmas")
+            del connections.settings["baseline"]
+
+    def test_parallel_writers_stress(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline_errors = self._baseline_errors(os.path.join(tmp, "baseline.sqlite3"))
+
+        # After: WAL, busy_timeout, BEGIN IMMEDIATE and retries
+        @write_transaction
+        def tuned_write(index):
+            WorkType.objects.count()
+            time.sleep(0.001)
+            WorkType.objects.create(name=f"w{index}")
+
+        tuned_errors = hammer(tuned_write)
+
+        self.assertEqual(tuned_errors, 0)
+        self.assertGreater(baseline_errors, tuned_errors)
+        self.assertEqual(WorkType.objects.count(), 80)
@@ -0,0 +1,133 @@
+# user_account/archive.py
+"""
+Hot/cold split of TimeLog history.
+
+Closed logs older than ``settings.TIMELOG_ARCHIVE_AFTER_DAYS`` whose week has
+been paid (a WeeklyPayroll row with pay) are moved to ``ArchivedTimeLog`` by
+the ``archive_timelogs`` command. Unpaid weeks stay hot so they can still be
+corrected before payroll runs. The hours rollup is left alone: archived logs
+keep counting towards DailyHours/WeeklyHours. Their work type tags move with
+them to ``ArchivedTimeLogWorkType``, so both tables filter on
+``work_type_tags__name`` alike.
+
+History views read the hot table and union the archive only when the
+requested range reaches it, i.e. starts on or before the newest archived
+``time_in`` (``archived_through()``, cached until the next archive chunk).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from admin_account import caching
+from admin_account.dates import local_day_bounds
+from admin_account.models import WeeklyPayroll
+from admin_account.rollup import bucket_for
+from payroll_main.db import write_transaction
+from .models import ArchivedTimeLog, ArchivedTimeLogWorkType, TimeLog, TimeLogWorkType
+
+ARCHIVE_AFTER_DAYS = getattr(settings, "TIMELOG_ARCHIVE_AFTER_DAYS", 180)
+ARCHIVE_SCOPE = ("archive", "all")
+CHUNK_SIZE = 1000
+
+
+def horizon(days=ARCHIVE_AFTER_DAYS, today=None):
+    """Monday of the oldest week that always stays hot, and its local midnight."""
+    day = (today or timezone.localdate()) - timedelta(days=days)
+    week_start = day - timedelta(days=day.weekday())
+    return week_start, local_day_bounds(week_start)[0]
+
+
+def archived_through():
+    """Newest archived ``time_in``, or None while the archive is empty."""
+    # Wrapped in a tuple so an empty archive is cached too
+    return caching.cached(
+        "timelog_archive_bounds",
+        lambda: (ArchivedTimeLog.objects.aggregate(newest=Max("time_in"))["newest"],),
+        scopes=[ARCHIVE_SCOPE],
+    )[0]
+
+
+def cold_logs(start=None):
+    """
+    ``ArchivedTimeLog`` queryset for a range starting at ``start`` (None for
+    all history), or None when the range cannot reach the archive.
+    """
+    newest = archived_through()
+    if newest is None or (start is not None and start > newest):
+        return None
+    return ArchivedTimeLog.objects.all()
+
+
+def paid_weeks(before_week):
+    """``(user_id, week_start)`` of every paid week starting before ``before_week``."""
+    return set(
+        WeeklyPayroll.objects.filter(week_start__lt=before_week, total_pay__gt=0)
+        .values_list("user_id", "week_start")
+    )
+
+
+def archive_logs(days=ARCHIVE_AFTER_DAYS, chunk_size=CHUNK_SIZE, after_id=0, progress=None):
+    """
+    Move eligible logs to the archive in id order, committing one chunk at a
+    time. An interrupted run loses nothing: rerun it (optionally with
+    ``after_id`` = the last id reported) and it carries on where it stopped.
+    ``progress(scanned, archived, last_id)`` is called after every chunk.
+    Returns ``(scanned, archived, last_id)``.
+    """
+    before_week, before = horizon(days)
+    paid = paid_weeks(before_week)
+    scanned = archived = 0
+    last_id = after_id
+    while True:
+        rows = list(
+            TimeLog.objects.filter(id__gt=last_id, time_in__lt=before, time_out__isnull=False)
+            .order_by("id")
+            .values_list("id", "user_id", "time_in")[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        scanned += len(rows)
+        ids = [log_id for log_id, user_id, time_in in rows if (user_id, bucket_for(time_in)[1]) in paid]
+        if ids:
+            archived += _move(ids)
+            caching.bump([ARCHIVE_SCOPE])
+        if progress:
+            progress(scanned, archived, last_id)
+    return scanned, archived, last_id
+
+
+@write_transaction
+def _move(ids):
+    logs = list(TimeLog.objects.filter(id__in=ids, time_out__isnull=False))
+    ArchivedTimeLog.objects.bulk_create(
+        [
+            ArchivedTimeLog(
+                id=log.id,
+                user_id=log.user_id,
+                task_id=log.task_id,
+                work_type_id=log.work_type_id,
+                time_in=log.time_in,
+                time_out=log.time_out,
+                notes=log.notes,
+                work_type_names=log.work_type_names,
+            )
+            for log in logs
+        ],
+        batch_size=500,
+    )
+    moved = [log.id for log in logs]
+    tags = TimeLogWorkType.objects.filter(log_id__in=moved)
+    ArchivedTimeLogWorkType.objects.bulk_create(
+        [
+            ArchivedTimeLogWorkType(log_id=tag.log_id, user_id=tag.user_id, work_type_id=tag.work_type_id, name=tag.name)
+            for tag in tags
+        ],
+        batch_size=500,
+    )
+    tags.delete()
+    # A queryset delete skips TimeLog.delete(), so the rollup keeps these hours
+    TimeLog.objects.filter(id__in=moved).delete()
+    return len(moved)
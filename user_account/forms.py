@@ -2,6 +2,7 @@ from django.contrib.auth.models import User
 from django import forms
 from .models import TimeLog
 from accounts.models import Profile 
+from accounts.forms import account_number_validator
 
 class TimeLogForm(forms.ModelForm):
     class Meta:
@@ -24,6 +25,9 @@ class UserForm(forms.ModelForm):
         fields = ["username", "email"]
 
 class ProfileForm(forms.ModelForm):
+    gcash_number = forms.CharField(max_length=20, label="GCash Number", validators=[account_number_validator])
+    bank_number = forms.CharField(max_length=30, label="Bank Number", validators=[account_number_validator])
+
     class Meta:
         model = Profile
         fields = ["full_name", "gcash_number", "gcash_name", "bank_name", "bank_number"]
@@ -0,0 +1,248 @@
+# user_account/kiosk.py
+"""
+Batch processing of signed punch events from shared clock-in kiosks.
+
+A kiosk buffers punches while offline and posts them in one batch when it
+reconnects. Each event carries an idempotency key and an HMAC-SHA256
+signature (made with the kiosk's secret) over ``signing_payload``. The whole
+batch is applied in one write transaction with bulk inserts/updates; every
+signed event is recorded as a ``PunchEvent`` so replays return the original
+result instead of punching twice. Punches older than ``MAX_EVENT_AGE`` or
+falling in a week that payroll has already been run for are rejected as
+"too old": they would change hours that were already paid.
+"""
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.utils import timezone
+
+from admin_account import caching, dropdowns, rollup
+from admin_account.models import WeeklyPayroll, WorkAssignment, WorkType
+from admin_account.payroll import week_start_for
+from payroll_main.db import write_transaction
+from .models import PunchEvent, TimeLog, TimeLogWorkType
+
+MAX_BATCH = getattr(settings, "KIOSK_MAX_BATCH", 500)
+# Kiosk clocks drift; punches further ahead of the server clock are refused
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+# Oldest punch a kiosk may still deliver
+MAX_EVENT_AGE = timedelta(days=getattr(settings, "KIOSK_MAX_EVENT_AGE_DAYS", 7))
+
+
+class BatchError(Exception):
+    """The batch as a whole is malformed (bad JSON shape, too many events)."""
+
+
+def signing_payload(key, user_id, kind, work_type_id, timestamp):
+    return f"{key}|{user_id}|{kind}|{work_type_id or ''}|{timestamp}"
+
+
+def sign(secret, key, user_id, kind, work_type_id, timestamp):
+    """Signature a kiosk must send for one event (also used by tests and kiosk tooling)."""
+    payload = signing_payload(key, user_id, kind, work_type_id, timestamp)
+    return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def _parse(kiosk, raw):
+    """Validate one raw event; return (event dict, None) or (None, rejection detail)."""
+    try:
+        key = str(raw["key"])
+        user_id = int(raw["user"])
+        kind = raw["type"]
+        work_type_id = int(raw["work_type"]) if raw.get("work_type") not in (None, "") else None
+        timestamp = str(raw["timestamp"])
+        signature = str(raw["signature"])
+    except (KeyError, TypeError, ValueError):
+        return None, "malformed event"
+    if not key or len(key) > 64:
+        return None, "invalid key"
+    if kind not in (PunchEvent.IN, PunchEvent.OUT):
+        return None, "unknown type"
+    expected = sign(kiosk.secret, key, user_id, kind, work_type_id, timestamp)
+    if not hmac.compare_digest(expected, signature):
+        return None, "bad signature"
+    try:
+        punched_at = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None, "invalid timestamp"
+    if timezone.is_naive(punched_at):
+        punched_at = timezone.make_aware(punched_at)
+    if punched_at > timezone.now() + MAX_CLOCK_SKEW:
+        return None, "timestamp in the future"
+    if punched_at < timezone.now() - MAX_EVENT_AGE:
+        return None, "too old"
+    if kind == PunchEvent.IN and work_type_id is None:
+        return None, "work type required"
+    return {
+        "key": key,
+        "user_id": user_id,
+        "kind": kind,
+        "work_type_id": work_type_id,
+        "punched_at": punched_at,
+    }, None
+
+
+def process_batch(kiosk, raw_events):
+    """
+    Apply a kiosk's events and return one result dict per event, in input order:
+    ``{"key", "status": "applied" | "duplicate" | "rejected", "detail", "log"}``.
+    """
+    if not isinstance(raw_events, list):
+        raise BatchError("events must be a list")
+    if len(raw_events) > MAX_BATCH:
+        raise BatchError(f"at most {MAX_BATCH} events per batch")
+
+    results = [None] * len(raw_events)
+    events = []
+    seen = set()
+    for index, raw in enumerate(raw_events):
+        event, error = _parse(kiosk, raw) if isinstance(raw, dict) else (None, "malformed event")
+        key = raw.get("key") if isinstance(raw, dict) else None
+        if error:
+            results[index] = {"key": key, "status": "rejected", "detail": error, "log": None}
+        elif event["key"] in seen:
+            results[index] = {"key": key, "status": "duplicate", "detail": "repeated in batch", "log": None}
+        else:
+            seen.add(event["key"])
+            event["index"] = index
+            events.append(event)
+
+    for index, result in _apply(kiosk, events).items():
+        results[index] = result
+    return results
+
+
+@write_transaction
+def _apply(kiosk, events):
+    """Apply parsed events inside one (BEGIN IMMEDIATE) transaction; return results keyed by input index."""
+    results = {}
+
+    # Replays of events this kiosk already sent
+    previous = {
+        punch.idempotency_key: punch
+        for punch in PunchEvent.objects.filter(kiosk=kiosk, idempotency_key__in=[e["key"] for e in events])
+    }
+    fresh = []
+    for event in events:
+        punch = previous.get(event["key"])
+        if punch:
+            results[event["index"]] = {
+                "key": event["key"], "status": "duplicate",
+                "detail": punch.status if not punch.detail else f"{punch.status}: {punch.detail}",
+                "log": punch.log_id,
+            }
+        else:
+            fresh.append(event)
+    if not fresh:
+        return results
+
+    user_ids = {e["user_id"] for e in fresh}
+    is_active = dict(User.objects.filter(id__in=user_ids).values_list("id", "is_active"))
+    work_types = {
+        wt.id: wt for wt in WorkType.objects.filter(id__in={e["work_type_id"] for e in fresh}, is_active=True)
+    }
+    # (user, work type) -> the newest assignment that grants it, from one join over the through table
+    assignment_for = {}
+    for assignment_id, user_id, work_type_id in (
+        WorkAssignment.work_types.through.objects
+        .filter(workassignment__user_id__in=user_ids, worktype_id__in=list(work_types))
+        .order_by("workassignment_id")
+        .values_list("workassignment_id", "workassignment__user_id", "worktype_id")
+    ):
+        assignment_for[user_id, work_type_id] = assignment_id
+    open_logs = {log.user_id: log for log in TimeLog.objects.filter(user_id__in=user_ids, time_out__isnull=True)}
+    # Last week payroll was run for, per user; punches in or before it are too old
+    paid_through = dict(
+        WeeklyPayroll.objects.filter(user_id__in=user_ids)
+        .values("user_id").annotate(last_week=Max("week_start"))
+        .values_list("user_id", "last_week")
+    )
+
+    new_logs, closed_logs, punches = [], [], []
+    rollup_rows = []
+
+    def outcome(event, status, detail="", log=None):
+        punches.append((event, status, detail, log))
+
+    # Replay each user's punches in the order they happened
+    for event in sorted(fresh, key=lambda e: (e["punched_at"], e["index"])):
+        user_id, at = event["user_id"], event["punched_at"]
+        if not is_active.get(user_id):
+            outcome(event, PunchEvent.REJECTED, "unknown or inactive user")
+            continue
+        if user_id in paid_through and week_start_for(timezone.localdate(at)) <= paid_through[user_id]:
+            outcome(event, PunchEvent.REJECTED, "too old: week already paid")
+            continue
+        current = open_logs.get(user_id)
+
+        if event["kind"] == PunchEvent.IN:
+            work_type = work_types.get(event["work_type_id"])
+            if current is not None:
+                outcome(event, PunchEvent.REJECTED, "already clocked in", current)
+            elif work_type is None or (user_id, work_type.id) not in assignment_for:
+                outcome(event, PunchEvent.REJECTED, "work type not assigned")
+            else:
+                log = TimeLog(
+                    user_id=user_id,
+                    task_id=assignment_for[user_id, work_type.id],
+                    work_type=work_type,
+                    work_type_names=work_type.name,
+                    time_in=at,
+                )
+                new_logs.append(log)
+                open_logs[user_id] = log
+                outcome(event, PunchEvent.APPLIED, "", log)
+        else:
+            if current is None:
+                outcome(event, PunchEvent.REJECTED, "not clocked in")
+            elif current.time_in and at < current.time_in:
+                outcome(event, PunchEvent.REJECTED, "time out before time in", current)
+            else:
+                current.time_out = at
+                if current.pk:
+                    closed_logs.append(current)
+                del open_logs[user_id]
+                rollup_rows.append((user_id, current.time_in, at))
+                outcome(event, PunchEvent.APPLIED, "", current)
+
+    # Close before inserting, so an out-then-in pair never holds two open logs at once
+    TimeLog.objects.bulk_update(closed_logs, ["time_out"], batch_size=500)
+    TimeLog.objects.bulk_create(new_logs, batch_size=500)
+    TimeLogWorkType.objects.bulk_create(
+        [TimeLogWorkType(log=log, user_id=log.user_id, work_type=log.work_type, name=log.work_type_names)
+         for log in new_logs],
+        batch_size=500,
+    )
+    # Bulk writes skip TimeLog.save() and signals
+    rollup.record_logs(rollup_rows)
+    caching.bump_logs(
+        [(log.user_id, log.time_in) for log in new_logs] + [(user_id, time_in) for user_id, time_in, _ in rollup_rows]
+    )
+    for log in new_logs:
+        dropdowns.note_work_type_name(log.user_id, log.work_type_names)
+
+    PunchEvent.objects.bulk_create([
+        PunchEvent(
+            kiosk=kiosk,
+            idempotency_key=event["key"],
+            user_id=event["user_id"],
+            kind=event["kind"],
+            work_type_id=event["work_type_id"] if event["work_type_id"] in work_types else None,
+            punched_at=event["punched_at"],
+            status=status,
+            detail=detail,
+            log=log,
+        )
+        for event, status, detail, log in punches
+        if event["user_id"] in is_active  # unknown users cannot be stored; replays are rejected again
+    ], batch_size=500)
+
+    for event, status, detail, log in punches:
+        results[event["index"]] = {
+            "key": event["key"], "status": status, "detail": detail, "log": log.pk if log else None,
+        }
+    return results
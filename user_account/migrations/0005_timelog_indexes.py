@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_account', '0004_hours_rollup'),
+        ('user_account', '0004_timelog_work_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timelog',
+            index=models.Index(fields=['user', 'time_in'], name='timelog_user_time_in_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelog',
+            index=models.Index(fields=['time_in', 'id'], name='timelog_time_in_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelog',
+            index=models.Index(condition=models.Q(('time_out__isnull', True)), fields=['user', 'time_in'], name='timelog_user_open_idx'),
+        ),
+    ]
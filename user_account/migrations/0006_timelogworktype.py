@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:47
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from user_account.tags import snapshot_tags
+
+
+def backfill_work_type_tags(apps, schema_editor):
+    """Create TimeLogWorkType rows for existing logs from the WorkType rows they were created with."""
+    TimeLog = apps.get_model("user_account", "TimeLog")
+    TimeLogWorkType = apps.get_model("user_account", "TimeLogWorkType")
+    WorkType = apps.get_model("admin_account", "WorkType")
+    WorkAssignment = apps.get_model("admin_account", "WorkAssignment")
+
+    work_type_names = dict(WorkType.objects.values_list("id", "name"))
+    task_work_types = defaultdict(list)
+    for task_id, work_type_id in WorkAssignment.work_types.through.objects.order_by("id").values_list(
+        "workassignment_id", "worktype_id"
+    ):
+        task_work_types[task_id].append((work_type_id, work_type_names[work_type_id]))
+
+    batch = []
+    rows = TimeLog.objects.values_list("id", "user_id", "task_id", "work_type_id", "work_type_names")
+    for log_id, user_id, task_id, work_type_id, names in rows.iterator(chunk_size=2000):
+        work_type = (work_type_id, work_type_names[work_type_id]) if work_type_id in work_type_names else None
+        for tag_work_type_id, name in snapshot_tags(names, work_type, task_work_types.get(task_id, ())):
+            batch.append(TimeLogWorkType(log_id=log_id, user_id=user_id, work_type_id=tag_work_type_id, name=name))
+        if len(batch) >= 2000:
+            TimeLogWorkType.objects.bulk_create(batch)
+            batch = []
+    TimeLogWorkType.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_account', '0004_hours_rollup'),
+        ('user_account', '0005_timelog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeLogWorkType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='timelogworktype',
+            name='log',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_type_tags', to='user_account.timelog'),
+        ),
+        migrations.AddField(
+            model_name='timelogworktype',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='timelogworktype',
+            name='work_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admin_account.worktype'),
+        ),
+        migrations.AddIndex(
+            model_name='timelogworktype',
+            index=models.Index(fields=['name', 'log'], name='timelog_wt_name_log_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelogworktype',
+            index=models.Index(fields=['user', 'name'], name='timelog_wt_user_name_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelogworktype',
+            constraint=models.UniqueConstraint(fields=('log', 'name'), name='timelog_work_type_unique_name'),
+        ),
+        migrations.RunPython(backfill_work_type_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:04
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def refuse_duplicate_open_logs(apps, schema_editor):
+    """
+    The constraint cannot be added while a user has more than one open log.
+    Closing them changes paid hours, so list them for review instead of guessing.
+    """
+    TimeLog = apps.get_model("user_account", "TimeLog")
+
+    users = (
+        TimeLog.objects.filter(time_out__isnull=True)
+        .values("user_id").annotate(open_logs=Count("id")).filter(open_logs__gt=1)
+        .values_list("user_id", flat=True)
+    )
+    duplicates = defaultdict(list)
+    for user_id, log_id in (
+        TimeLog.objects.filter(user_id__in=users, time_out__isnull=True)
+        .order_by("user_id", "id").values_list("user_id", "id")
+    ):
+        duplicates[user_id].append(str(log_id))
+    if duplicates:
+        listing = "; ".join(f"user {user_id}: logs {', '.join(ids)}" for user_id, ids in duplicates.items())
+        raise RuntimeError(
+            f"Users with more than one open time log: {listing}. Review them with "
+            "`manage.py duplicate_open_logs`, close them (`--close`, or by hand) and migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_account', '0004_hours_rollup'),
+        ('user_account', '0006_timelogworktype'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(refuse_duplicate_open_logs, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='timelog',
+            name='timelog_user_open_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='timelog',
+            constraint=models.UniqueConstraint(condition=models.Q(('time_out__isnull', True)), fields=('user',), name='timelog_one_open_per_user', violation_error_message='You already have an active task.'),
+        ),
+    ]
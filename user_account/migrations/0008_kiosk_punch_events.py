@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_account', '0004_hours_rollup'),
+        ('user_account', '0007_timelog_one_open_per_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Kiosk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('secret', models.CharField(max_length=64)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PunchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('in', 'Time In'), ('out', 'Time Out')], max_length=3)),
+                ('punched_at', models.DateTimeField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('rejected', 'Rejected')], max_length=10)),
+                ('detail', models.CharField(blank=True, max_length=100)),
+                ('kiosk', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punches', to='user_account.kiosk')),
+                ('log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='user_account.timelog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('work_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admin_account.worktype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kiosk', 'idempotency_key'), name='punch_event_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_account', '0004_hours_rollup'),
+        ('user_account', '0008_kiosk_punch_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTimeLog',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('time_in', models.DateTimeField()),
+                ('time_out', models.DateTimeField()),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('work_type_names', models.TextField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admin_account.workassignment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_timelogs', to=settings.AUTH_USER_MODEL)),
+                ('work_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admin_account.worktype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'time_in'], name='archived_log_user_time_in_idx'), models.Index(fields=['time_in', 'id'], name='archived_log_time_in_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:23
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from user_account.tags import snapshot_tags
+
+
+def backfill_archived_tags(apps, schema_editor):
+    """Create ArchivedTimeLogWorkType rows for logs archived before archived tags were kept."""
+    ArchivedTimeLog = apps.get_model("user_account", "ArchivedTimeLog")
+    ArchivedTimeLogWorkType = apps.get_model("user_account", "ArchivedTimeLogWorkType")
+    WorkType = apps.get_model("admin_account", "WorkType")
+    WorkAssignment = apps.get_model("admin_account", "WorkAssignment")
+
+    work_type_names = dict(WorkType.objects.values_list("id", "name"))
+    task_work_types = defaultdict(list)
+    for task_id, work_type_id in WorkAssignment.work_types.through.objects.order_by("id").values_list(
+        "workassignment_id", "worktype_id"
+    ):
+        task_work_types[task_id].append((work_type_id, work_type_names[work_type_id]))
+
+    batch = []
+    rows = ArchivedTimeLog.objects.values_list("id", "user_id", "task_id", "work_type_id", "work_type_names")
+    for log_id, user_id, task_id, work_type_id, names in rows.iterator(chunk_size=2000):
+        work_type = (work_type_id, work_type_names[work_type_id]) if work_type_id in work_type_names else None
+        for tag_work_type_id, name in snapshot_tags(names, work_type, task_work_types.get(task_id, ())):
+            batch.append(
+                ArchivedTimeLogWorkType(log_id=log_id, user_id=user_id, work_type_id=tag_work_type_id, name=name)
+            )
+        if len(batch) >= 2000:
+            ArchivedTimeLogWorkType.objects.bulk_create(batch)
+            batch = []
+    ArchivedTimeLogWorkType.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_account', '0004_hours_rollup'),
+        ('user_account', '0009_timelog_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTimeLogWorkType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_type_tags', to='user_account.archivedtimelog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('work_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admin_account.worktype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'log'], name='archived_log_wt_name_log_idx'), models.Index(fields=['user', 'name'], name='archived_log_wt_user_name_idx')],
+                'constraints': [models.UniqueConstraint(fields=('log', 'name'), name='archived_log_wt_unique_name')],
+            },
+        ),
+        migrations.RunPython(backfill_archived_tags, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from admin_account.models import WorkAssignment, WorkType
+from admin_account import dropdowns, rollup
+from .tags import snapshot_tags
 
 
 class TimeLog(models.Model):
@@ -25,11 +27,73 @@ class TimeLog(models.Model):
     # ✅ New field to store work types at the time of creation
     work_type_names = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Per-user history and date ranges (timelog_list, admin_user_detail, weekly summary)
+            models.Index(fields=["user", "time_in"], name="timelog_user_time_in_idx"),
+            # Global date ranges and keyset pagination on (time_in, id) in task_list
+            models.Index(fields=["time_in", "id"], name="timelog_time_in_id_idx"),
+        ]
+        constraints = [
+            # A worker can only be clocked in to one thing at a time; the partial
+            # unique index also serves the "does this user have an open log?" checks
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(time_out__isnull=True),
+                name="timelog_one_open_per_user",
+                violation_error_message="You already have an active task.",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored bounds so save()/delete() can keep the hours rollup in sync
+        if not instance.get_deferred_fields() & {"user_id", "time_in", "time_out"}:
+            instance._saved_bounds = (instance.user_id, instance.time_in, instance.time_out)
+        return instance
+
     def save(self, *args, **kwargs):
         # If log is new or work_type_names is empty, store current work types
         if self.task and (not self.work_type_names):
             self.work_type_names = " / ".join([wt.name for wt in self.task.work_types.all()])
-        super().save(*args, **kwargs)
+
+        adding = self._state.adding
+        saved_bounds = getattr(self, "_saved_bounds", None)
+        bounds = (self.user_id, self.time_in, self.time_out)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                tags = self._snapshot_tags()
+                TimeLogWorkType.objects.bulk_create(tags)
+            if saved_bounds != bounds:
+                if saved_bounds:
+                    rollup.discard_logs([saved_bounds])
+                rollup.record_logs([bounds])
+        self._saved_bounds = bounds
+
+        if adding:
+            for tag in tags:
+                dropdowns.note_work_type_name(self.user_id, tag.name)
+
+    def _snapshot_tags(self):
+        """One TimeLogWorkType row per work type captured on this log."""
+        work_type = (self.work_type_id, self.work_type.name) if self.work_type_id else None
+        task_work_types = ()
+        # Clock-ins snapshot exactly their own work type; only look at the assignment otherwise
+        if self.task_id and not (work_type and self.work_type_names == work_type[1]):
+            task_work_types = self.task.work_types.values_list("id", "name")
+        return [
+            TimeLogWorkType(log=self, user_id=self.user_id, work_type_id=work_type_id, name=name)
+            for work_type_id, name in snapshot_tags(self.work_type_names, work_type, task_work_types)
+        ]
+
+    def delete(self, *args, **kwargs):
+        saved_bounds = getattr(self, "_saved_bounds", None)
+        with transaction.atomic():
+            if saved_bounds:
+                rollup.discard_logs([saved_bounds])
+            return super().delete(*args, **kwargs)
 
     @property
     def completed_date(self):
@@ -49,3 +113,114 @@ class TimeLog(models.Model):
     def __str__(self):
         status = "Ongoing" if not self.time_out else self.time_out.strftime("%Y-%m-%d %H:%M")
         return f"{self.user.username} | {self.time_in.strftime('%Y-%m-%d %H:%M')} - {status}"
+
+
+class TimeLogWorkType(models.Model):
+    """Work type name captured when a log was created (normalized form of work_type_names)."""
+    log = models.ForeignKey(TimeLog, on_delete=models.CASCADE, related_name="work_type_tags")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")  # copied from log for per-user lookups
+    work_type = models.ForeignKey(WorkType, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["log", "name"], name="timelog_work_type_unique_name"),
+        ]
+        indexes = [
+            # Equality filters on a work type name, and DISTINCT names for dropdowns
+            models.Index(fields=["name", "log"], name="timelog_wt_name_log_idx"),
+            models.Index(fields=["user", "name"], name="timelog_wt_user_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.log_id} | {self.name}"
+
+
+class ArchivedTimeLog(models.Model):
+    """
+    A closed TimeLog from a paid week older than the archive horizon, moved
+    out of the hot table by ``archive_timelogs``. It keeps the original id,
+    and its hours stay in the DailyHours/WeeklyHours rollup.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_timelogs")
+    task = models.ForeignKey(WorkAssignment, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    work_type = models.ForeignKey(WorkType, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    time_in = models.DateTimeField()
+    time_out = models.DateTimeField()
+    notes = models.TextField(blank=True, null=True)
+    work_type_names = models.TextField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "time_in"], name="archived_log_user_time_in_idx"),
+            models.Index(fields=["time_in", "id"], name="archived_log_time_in_id_idx"),
+        ]
+
+    total_hours = TimeLog.total_hours
+    completed_date = TimeLog.completed_date
+
+    def __str__(self):
+        return f"{self.user.username} | {self.time_in.strftime('%Y-%m-%d %H:%M')} - archived"
+
+
+class ArchivedTimeLogWorkType(models.Model):
+    """The TimeLogWorkType rows of an archived log, moved along with it."""
+    log = models.ForeignKey(ArchivedTimeLog, on_delete=models.CASCADE, related_name="work_type_tags")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    work_type = models.ForeignKey(WorkType, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["log", "name"], name="archived_log_wt_unique_name"),
+        ]
+        indexes = [
+            models.Index(fields=["name", "log"], name="archived_log_wt_name_log_idx"),
+            models.Index(fields=["user", "name"], name="archived_log_wt_user_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.log_id} | {self.name}"
+
+
+class Kiosk(models.Model):
+    """A shared clock-in tablet; it signs punch events with ``secret`` (HMAC-SHA256)."""
+    name = models.CharField(max_length=100, unique=True)
+    secret = models.CharField(max_length=64)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PunchEvent(models.Model):
+    """A processed kiosk punch, kept so replayed events return their original result."""
+    IN = "in"
+    OUT = "out"
+    KIND_CHOICES = [(IN, "Time In"), (OUT, "Time Out")]
+
+    APPLIED = "applied"
+    REJECTED = "rejected"
+    STATUS_CHOICES = [(APPLIED, "Applied"), (REJECTED, "Rejected")]
+
+    kiosk = models.ForeignKey(Kiosk, on_delete=models.CASCADE, related_name="punches")
+    idempotency_key = models.CharField(max_length=64)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=3, choices=KIND_CHOICES)
+    work_type = models.ForeignKey(WorkType, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    punched_at = models.DateTimeField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    detail = models.CharField(max_length=100, blank=True)
+    log = models.ForeignKey(TimeLog, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kiosk", "idempotency_key"], name="punch_event_unique_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.kiosk_id} | {self.idempotency_key} | {self.status}"
@@ -0,0 +1,52 @@
+# user_account/tags.py
+"""
+Work type tags of a time log, as ``(work_type_id, name)`` pairs.
+
+``work_type_names`` is a display snapshot: the names of the work types a
+log was created with, joined by " / ". Names may themselves contain " / ",
+so tags are read from the actual WorkType rows (the log's own work type,
+then its assignment's) by matching whole names against the snapshot.
+Splitting on " / " is only the fallback for legacy snapshots that no longer
+match any WorkType row. Pure functions, so migrations can use them too.
+"""
+SEPARATOR = " / "
+
+
+def split_work_type_names(work_type_names):
+    """Split a " / "-joined work_type_names snapshot into unique names, keeping order."""
+    names = [name.strip() for name in (work_type_names or "").split(SEPARATOR)]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _match(snapshot, names):
+    """The snapshot as a sequence of whole ``names``, or None when it is not made of them."""
+    by_length = sorted(names, key=len, reverse=True)
+    matched, pos = [], 0
+    while pos < len(snapshot):
+        for name in by_length:
+            end = pos + len(name)
+            if snapshot.startswith(name, pos) and (end == len(snapshot) or snapshot.startswith(SEPARATOR, end)):
+                matched.append(name)
+                pos = end + len(SEPARATOR)
+                break
+        else:
+            return None
+    return matched
+
+
+def snapshot_tags(work_type_names, work_type=None, task_work_types=()):
+    """
+    Tags for a log with snapshot ``work_type_names``. ``work_type`` is the
+    log's own ``(id, name)`` (or None) and ``task_work_types`` the ``(id, name)``
+    pairs of its assignment. Without a snapshot only the log's own work type
+    counts.
+    """
+    if not work_type_names:
+        return [work_type] if work_type else []
+
+    ids = {}
+    for work_type_id, name in ([work_type] if work_type else []) + list(task_work_types):
+        if name:
+            ids.setdefault(name, work_type_id)
+    names = _match(work_type_names, ids) or split_work_type_names(work_type_names)
+    return [(ids.get(name), name) for name in dict.fromkeys(names)]
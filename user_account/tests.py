@@ -1,9 +1,23 @@
-from django.test import TestCase
+from io import StringIO
+from threading import Barrier, Thread
+from unittest import mock, skipUnless
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.db import IntegrityError, connection, transaction
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from datetime import timedelta
-from user_account.models import TimeLog
+from datetime import date, datetime, timedelta
+from admin_account.dates import local_day_bounds
+from user_account.models import Kiosk, PunchEvent, TimeLog
+from user_account.kiosk import sign
+from admin_account.models import DailyHours, WeeklyPayroll
 from admin_account.models import WorkAssignment, WorkType
+from accounts.models import Profile
+from payroll_main.testing import QueryContractMixin, add_logs, seed_history
+from user_account import urls as user_urls
+from user_account.forms import ProfileForm
 
 User = get_user_model()
 
@@ -42,3 +56,370 @@ class TimeLogMidnightTest(TestCase):
         print(f"\n[DEBUG] Time In: {log.time_in}, Time Out: {log.time_out}, Hours: {total_hours}")
 
         self.assertEqual(total_hours, 2.0, f"Expected 2.0 hours, got {total_hours}")
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class TimeLogIndexUsageTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="indexuser")
+        self.start, self.end = local_day_bounds(date(2025, 1, 6))
+
+    def test_open_log_check_uses_partial_unique_index(self):
+        plan = TimeLog.objects.filter(user=self.user, time_out__isnull=True).explain()
+        self.assertIn("timelog_one_open_per_user", plan)
+
+    def test_user_date_range_uses_composite_index(self):
+        plan = TimeLog.objects.filter(
+            user=self.user, time_in__gte=self.start, time_in__lt=self.end
+        ).explain()
+        self.assertIn("timelog_user_time_in_idx", plan)
+        self.assertIn("time_in>?", plan)
+
+    def test_global_date_range_uses_time_in_index(self):
+        plan = TimeLog.objects.filter(
+            time_in__gte=self.start, time_in__lt=self.end
+        ).order_by("-time_in", "-id").explain()
+        self.assertIn("timelog_time_in_id_idx", plan)
+
+
+class ProfileFormTest(TestCase):
+    def test_account_numbers_are_digits_with_an_optional_plus(self):
+        data = {"full_name": "Gina", "gcash_name": "Gina G", "bank_name": "BDO", "bank_number": "001122"}
+        self.assertTrue(ProfileForm({**data, "gcash_number": "+639171234567"}).is_valid())
+        form = ProfileForm({**data, "gcash_number": "=HYPERLINK(1)", "bank_number": "12 34"})
+        self.assertEqual(set(form.errors), {"gcash_number", "bank_number"})
+
+
+class TimeLogDateFilterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="filteruser", password="test123")
+        self.client.login(username="filteruser", password="test123")
+
+    def test_date_filter_uses_local_day(self):
+        # 07:00 in Manila is still the previous day in UTC
+        local_tz = timezone.get_current_timezone()
+        early = timezone.make_aware(datetime(2025, 1, 6, 7, 0), local_tz)
+        TimeLog.objects.create(user=self.user, time_in=early, time_out=early + timedelta(hours=1))
+        TimeLog.objects.create(user=self.user, time_in=early - timedelta(hours=8))
+
+        response = self.client.get(reverse("timelog_list"), {"date_filter": "2025-01-06"})
+        self.assertEqual(len(response.context["page_obj"].object_list), 1)
+
+
+class QueryComplexityContractTest(QueryContractMixin, TestCase):
+    """Every worker view must run the same number of queries with 5 logs as with 300+."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="contract_worker", password="test123")
+        self.client.login(username="contract_worker", password="test123")
+        Profile.objects.create(user=self.user, full_name="Contract Worker")
+        self.work_types = [WorkType.objects.create(name="Sorting"), WorkType.objects.create(name="Packing")]
+        self.assignment = WorkAssignment.objects.create(user=self.user)
+        self.assignment.work_types.set(self.work_types)
+        self.logs = add_logs([self.assignment], 5, self.work_types)
+
+    def _grow(self):
+        add_logs([self.assignment], 300, self.work_types, end=self.logs[0].time_in, leave_open=False)
+        for i in range(5):
+            extra = WorkAssignment.objects.create(user=self.user)
+            extra.work_types.set([WorkType.objects.create(name=f"Extra {i}"), *self.work_types])
+        seed_history(10, 50, self.work_types, prefix="other")
+
+    def _cases(self):
+        # The open log makes time-in a no-op, and time-out of a closed log changes nothing
+        return {
+            "user_menu": reverse("user_menu"),
+            "user_profile": reverse("user_profile"),
+            "edit_profile": reverse("edit_profile"),
+            "timelog_list": reverse("timelog_list"),
+            "timelog_create": reverse("timelog_create"),
+            "timelog_timein": reverse("timelog_timein", args=[self.assignment.id, self.work_types[0].id]),
+            "timelog_timeout": reverse("timelog_timeout", args=[self.logs[0].id]),
+            "timelog_status": reverse("timelog_status"),
+            # GET is refused before any batch work; the POST path is covered by KioskPunchSyncTest
+            "kiosk_punch_sync": reverse("kiosk_punch_sync"),
+        }
+
+    def test_every_url_is_covered(self):
+        names = {pattern.name for pattern in user_urls.urlpatterns}
+        self.assertEqual(names, set(self._cases()))
+
+    def test_query_counts_do_not_grow_with_data(self):
+        cases = {label: (self.client, url) for label, url in self._cases().items()}
+        self.assertConstantQueries(cases, self._grow)
+
+
+class TimeLogCreateTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="clockin", password="test123")
+        self.client.login(username="clockin", password="test123")
+        self.sorting = WorkType.objects.create(name="Sorting")
+        self.packing = WorkType.objects.create(name="Packing")
+        self.archived = WorkType.objects.create(name="Old", is_active=False)
+        self.first = WorkAssignment.objects.create(user=self.user)
+        self.first.work_types.set([self.sorting, self.archived])
+        self.second = WorkAssignment.objects.create(user=self.user)
+        self.second.work_types.set([self.packing, self.sorting])
+
+    def _items(self):
+        response = self.client.get(reverse("timelog_create"))
+        return [(item["task"].id, item["work_type"].name) for item in response.context["assigned_work_items"]]
+
+    def test_lists_active_work_types_of_every_assignment(self):
+        self.assertCountEqual(self._items(), [
+            (self.first.id, "Sorting"), (self.second.id, "Packing"), (self.second.id, "Sorting"),
+        ])
+
+    def test_time_in_and_out_refresh_the_cached_page(self):
+        self._items()
+        self.client.post(reverse("timelog_timein", args=[self.second.id, self.packing.id]))
+        self.assertCountEqual(self._items(), [(self.first.id, "Sorting"), (self.second.id, "Sorting")])
+
+        log = TimeLog.objects.get(user=self.user, time_out__isnull=True)
+        self.client.post(reverse("timelog_timeout", args=[log.id]))
+        response = self.client.get(reverse("timelog_create"))
+        self.assertEqual(list(response.context["active_logs"]), [])
+        self.assertEqual(len(response.context["assigned_work_items"]), 3)
+
+    def test_assignment_changes_refresh_the_cached_page(self):
+        self._items()
+        self.first.work_types.remove(self.sorting)
+        self.assertCountEqual(self._items(), [(self.second.id, "Packing"), (self.second.id, "Sorting")])
+        self.packing.is_active = False
+        self.packing.save()
+        self.assertEqual(self._items(), [(self.second.id, "Sorting")])
+
+    def test_second_time_in_is_refused(self):
+        self.client.post(reverse("timelog_timein", args=[self.second.id, self.packing.id]))
+        response = self.client.post(reverse("timelog_timein", args=[self.first.id, self.sorting.id]), follow=True)
+        self.assertIn("You already have an active task", " ".join(str(m) for m in response.context["messages"]))
+        self.assertEqual(TimeLog.objects.filter(user=self.user).count(), 1)
+
+    def test_other_integrity_errors_are_not_reported_as_active_task(self):
+        with mock.patch("user_account.views._open_log", side_effect=IntegrityError("FOREIGN KEY constraint failed")):
+            with self.assertRaises(IntegrityError):
+                self.client.post(reverse("timelog_timein", args=[self.second.id, self.packing.id]))
+
+    def test_duplicate_open_logs_report(self):
+        out = StringIO()
+        call_command("duplicate_open_logs", stdout=out)
+        self.assertIn("No user has more than one open time log", out.getvalue())
+
+    def test_cached_page_runs_no_extra_queries(self):
+        self._items()
+        with self.assertNumQueries(2):  # session and user only
+            self._items()
+
+
+class ClockInRaceTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="racer", password="test123")
+        self.work_type = WorkType.objects.create(name="Sorting")
+        self.task = WorkAssignment.objects.create(user=self.user)
+        self.task.work_types.add(self.work_type)
+
+    def test_constraint_rejects_second_open_log(self):
+        TimeLog.objects.create(user=self.user, task=self.task, time_in=timezone.now())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TimeLog.objects.create(user=self.user, task=self.task, time_in=timezone.now())
+
+    def test_repeated_clock_in_shows_message(self):
+        client = Client()
+        client.force_login(self.user)
+        url = reverse("timelog_timein", args=[self.task.id, self.work_type.id])
+        client.post(url)
+        response = client.post(url, follow=True)
+        self.assertIn("⚠️ You already have an active task. Please finish it first.",
+                      [str(message) for message in response.context["messages"]])
+        self.assertEqual(TimeLog.objects.filter(user=self.user).count(), 1)
+
+    def test_parallel_clock_ins_open_one_log(self):
+        url = reverse("timelog_timein", args=[self.task.id, self.work_type.id])
+        clients = []
+        for _ in range(8):
+            client = Client()
+            client.force_login(self.user)
+            clients.append(client)
+        barrier = Barrier(len(clients))
+        statuses = []
+
+        def tap(client):
+            try:
+                barrier.wait()
+                statuses.append(client.post(url).status_code)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=tap, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [302] * len(clients))
+        self.assertEqual(TimeLog.objects.filter(user=self.user, time_out__isnull=True).count(), 1)
+
+
+class AsyncClockInTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="async_worker")
+        self.work_type = WorkType.objects.create(name="Sorting")
+        self.task = WorkAssignment.objects.create(user=self.user)
+        self.task.work_types.add(self.work_type)
+
+    async def test_clock_in_status_and_clock_out(self):
+        await self.async_client.aforce_login(self.user)
+        status_url = reverse("timelog_status")
+
+        response = await self.async_client.get(status_url)
+        self.assertEqual(response.json()["clocked_in"], False)
+
+        response = await self.async_client.post(reverse("timelog_timein", args=[self.task.id, self.work_type.id]))
+        self.assertRedirects(response, reverse("timelog_create"), fetch_redirect_response=False)
+        status = (await self.async_client.get(status_url)).json()
+        self.assertEqual(status["clocked_in"], True)
+        self.assertEqual(status["log"]["work_type"], "Sorting")
+
+        await self.async_client.post(reverse("timelog_timeout", args=[status["log"]["id"]]))
+        self.assertEqual((await self.async_client.get(status_url)).json()["clocked_in"], False)
+        self.assertEqual(await TimeLog.objects.filter(user=self.user, time_out__isnull=False).acount(), 1)
+
+    async def test_other_users_task_is_404(self):
+        other = await User.objects.acreate(username="someone_else")
+        await self.async_client.aforce_login(other)
+        response = await self.async_client.post(reverse("timelog_timein", args=[self.task.id, self.work_type.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class KioskPunchSyncTest(TestCase):
+    def setUp(self):
+        self.kiosk = Kiosk.objects.create(name="gate-1", secret="kiosk-secret")
+        self.work_type = WorkType.objects.create(name="Sorting")
+        self.users = [User.objects.create_user(username=f"kiosk_worker{i}") for i in range(3)]
+        self.tasks = []
+        for user in self.users:
+            task = WorkAssignment.objects.create(user=user)
+            task.work_types.add(self.work_type)
+            self.tasks.append(task)
+        # Yesterday morning, so every test shift lands on one local day
+        self.start = timezone.localtime().replace(hour=8, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        self.url = reverse("kiosk_punch_sync")
+
+    def event(self, key, user, kind, minutes, work_type=None, secret="kiosk-secret"):
+        work_type_id = (work_type or self.work_type).id if kind == "in" else None
+        timestamp = (self.start + timedelta(minutes=minutes)).isoformat()
+        return {
+            "key": key, "user": user.id, "type": kind, "work_type": work_type_id, "timestamp": timestamp,
+            "signature": sign(secret, key, user.id, kind, work_type_id, timestamp),
+        }
+
+    def sync(self, events, kiosk="gate-1"):
+        return self.client.post(self.url, {"kiosk": kiosk, "events": events}, content_type="application/json")
+
+    def test_offline_shift_is_applied_with_rollup(self):
+        user = self.users[0]
+        response = self.sync([self.event("a-out", user, "out", 120), self.event("a-in", user, "in", 0)])
+
+        body = response.json()
+        self.assertEqual((body["applied"], body["duplicates"], body["rejected"]), (2, 0, 0))
+        # Results come back in input order, both pointing at the same log
+        self.assertEqual([r["key"] for r in body["results"]], ["a-out", "a-in"])
+        log = TimeLog.objects.get(user=user)
+        self.assertEqual({r["log"] for r in body["results"]}, {log.id})
+        self.assertEqual(log.time_out - log.time_in, timedelta(hours=2))
+        self.assertEqual(log.work_type_tags.get().name, "Sorting")
+        self.assertEqual(DailyHours.objects.get(user=user).total_hours, 2)
+
+    def test_replayed_batch_is_reported_as_duplicate(self):
+        events = [self.event("b-in", self.users[0], "in", 0)]
+        first = self.sync(events).json()["results"][0]
+        replay = self.sync(events).json()
+
+        self.assertEqual(replay["duplicates"], 1)
+        self.assertEqual(replay["results"][0]["log"], first["log"])
+        self.assertEqual(TimeLog.objects.filter(user=self.users[0]).count(), 1)
+        self.assertEqual(PunchEvent.objects.filter(kiosk=self.kiosk).count(), 1)
+
+    def test_invalid_events_are_rejected_individually(self):
+        other_type = WorkType.objects.create(name="Unassigned")
+        user = self.users[1]
+        body = self.sync([
+            self.event("c-forged", user, "in", 0, secret="wrong"),
+            self.event("c-in", user, "in", 10),
+            self.event("c-again", user, "in", 20),
+            self.event("c-other", self.users[2], "in", 20, work_type=other_type),
+            self.event("c-out", self.users[2], "out", 30),
+        ]).json()
+
+        self.assertEqual(
+            [(r["status"], r["detail"]) for r in body["results"]],
+            [
+                ("rejected", "bad signature"),
+                ("applied", ""),
+                ("rejected", "already clocked in"),
+                ("rejected", "work type not assigned"),
+                ("rejected", "not clocked in"),
+            ],
+        )
+        self.assertEqual(TimeLog.objects.filter(time_out__isnull=True).count(), 1)
+
+    def test_old_punches_and_paid_weeks_are_too_old(self):
+        user, other = self.users[0], self.users[1]
+        WeeklyPayroll.objects.create(
+            user=user, week_start=self.start.date() - timedelta(days=self.start.weekday()), rate=100
+        )
+        body = self.sync([
+            self.event("d-stale", other, "in", -8 * 24 * 60),
+            self.event("d-paid", user, "in", 0),
+            self.event("d-fresh", other, "in", 0),
+        ]).json()
+
+        self.assertEqual(
+            [(r["status"], r["detail"]) for r in body["results"]],
+            [("rejected", "too old"), ("rejected", "too old: week already paid"), ("applied", "")],
+        )
+        self.assertFalse(TimeLog.objects.filter(user=user).exists())
+
+    def test_create_kiosk_shows_the_secret_once(self):
+        out = StringIO()
+        call_command("create_kiosk", "gate-2", stdout=out)
+        secret = Kiosk.objects.get(name="gate-2").secret
+        self.assertIn(secret, out.getvalue())
+
+        out = StringIO()
+        call_command("create_kiosk", "gate-2", stdout=out)
+        self.assertNotIn(secret, out.getvalue())
+
+        out = StringIO()
+        call_command("create_kiosk", "gate-2", "--rotate", stdout=out)
+        rotated = Kiosk.objects.get(name="gate-2").secret
+        self.assertNotEqual(rotated, secret)
+        self.assertIn(rotated, out.getvalue())
+
+    def test_unknown_kiosk_and_malformed_batch(self):
+        self.assertEqual(self.sync([], kiosk="nowhere").status_code, 403)
+        self.assertEqual(self.client.post(self.url, "not json", content_type="application/json").status_code, 400)
+        self.assertEqual(self.sync({"key": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_batch_query_count_does_not_grow_with_events(self):
+        # Rollup buckets are bumped once per (user, day); the events themselves cost no extra queries
+        def shifts(prefix, users, per_user):
+            events = []
+            for user in users:
+                for n in range(per_user):
+                    events += [
+                        self.event(f"{prefix}{user.id}-{n}-in", user, "in", n * 60),
+                        self.event(f"{prefix}{user.id}-{n}-out", user, "out", n * 60 + 30),
+                    ]
+            return events
+
+        more_users = [User.objects.create_user(username=f"kiosk_extra{i}") for i in range(3)]
+        for user in more_users:
+            WorkAssignment.objects.create(user=user).work_types.add(self.work_type)
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.sync(shifts("s", self.users, 1)).json()["applied"], 6)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.sync(shifts("l", more_users, 4)).json()["applied"], 24)
+        self.assertEqual(len(large), len(small))
@@ -9,5 +9,7 @@ urlpatterns = [
     path("logs/new/", views.timelog_create, name="timelog_create"),
     path("logs/timein/<int:task_id>/<int:worktype_id>/", views.timelog_timein, name="timelog_timein"),
     path("logs/timeout/<int:timelog_id>/", views.timelog_timeout, name="timelog_timeout"),
+    path("logs/status/", views.timelog_status, name="timelog_status"),
+    path("kiosk/punches/", views.kiosk_punch_sync, name="kiosk_punch_sync"),
     
 ]
@@ -1,16 +1,34 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import json
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, aget_object_or_404
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from django.db import IntegrityError
+from django.db.models import F
+from django.db.models.functions import TruncDate
+from payroll_main.db import write_transaction
 from datetime import datetime
-from .models import TimeLog
+from .models import Kiosk, TimeLog
+from .kiosk import BatchError, process_batch
+from .archive import cold_logs
 from admin_account.models import WorkAssignment
 from admin_account.models import WorkType
+from admin_account.dates import local_day_bounds
+from admin_account import caching
+from admin_account.dropdowns import WORKTYPE_SCOPE, work_type_options
 from django.shortcuts import render
 from accounts.models import Profile
 from .forms import UserForm, ProfileForm
 from django.contrib import messages
 from django.core.paginator import Paginator
 
+CLOCK_IN_CACHE_TIMEOUT = 60  # seconds
+
 
 @login_required
 def menu(request):
@@ -25,39 +43,55 @@ def timelog_list(request):
     work_type_filter = request.GET.get("work_type_filter")
 
     # Base queryset
-    logs = TimeLog.objects.filter(user=request.user).select_related("task", "work_type").order_by("-time_in")
+    log_columns = ("id", "time_in", "time_out", "work_type_names", "work_type__name")
+    logs = TimeLog.objects.filter(user=request.user)
+    # Archived (cold) history, only read when the requested range reaches it
+    archived_logs = None
 
     if date_filter:
         try:
             # Ensure string is in YYYY-MM-DD format
             parsed_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-            logs = logs.filter(time_in__date=parsed_date)
+            start_dt, end_dt = local_day_bounds(parsed_date)
+            logs = logs.filter(time_in__gte=start_dt, time_in__lt=end_dt)
+            archived_logs = cold_logs(start_dt)
+            if archived_logs is not None:
+                archived_logs = archived_logs.filter(time_in__gte=start_dt, time_in__lt=end_dt)
         except ValueError:
             logs = logs.none()  # or just ignore filter
+    else:
+        archived_logs = cold_logs()
 
     # Apply work type filter if provided
     if work_type_filter:
-        logs = logs.filter(work_type_names__icontains=work_type_filter)
+        logs = logs.filter(work_type_tags__name=work_type_filter)
+        if archived_logs is not None:
+            archived_logs = archived_logs.filter(work_type_tags__name=work_type_filter)
+
+    # Unique local dates for the filter dropdown (DISTINCT in SQL)
+    dates = logs.filter(time_in__isnull=False).annotate(day=TruncDate("time_in")).values_list("day", flat=True)
+    logs = logs.values(*log_columns)
+    if archived_logs is not None:
+        archived_logs = archived_logs.filter(user=request.user)
+        dates = dates.union(archived_logs.annotate(day=TruncDate("time_in")).values_list("day", flat=True))
+        logs = logs.union(archived_logs.values(*log_columns), all=True)
+    else:
+        dates = dates.distinct()
 
-    # Prepare timelogs for display
-    timelogs = []
-    all_timelogs_dates = set()
-    all_work_types = set()
+    # Pagination -- COUNT + LIMIT/OFFSET in SQL, newest first, logs without a time_in last
+    paginator = Paginator(logs.order_by(F("time_in").desc(nulls_last=True), F("id").desc()), 10)  # 10 logs per page
+    page_number = request.GET.get("page")
+    page_obj = paginator.get_page(page_number)
 
-    for log in logs:
-        local_in = timezone.localtime(log.time_in) if log.time_in else None
-        local_out = timezone.localtime(log.time_out) if log.time_out else None
+    # Prepare timelogs for display (visible page only)
+    timelogs = []
 
-        # Track unique dates and work types for filter dropdowns
-        if local_in:
-            all_timelogs_dates.add(local_in.date())
-        if log.work_type_names:
-            all_work_types.add(log.work_type_names)
-        elif log.work_type:
-            all_work_types.add(log.work_type.name)
+    for log in page_obj:
+        local_in = timezone.localtime(log["time_in"]) if log["time_in"] else None
+        local_out = timezone.localtime(log["time_out"]) if log["time_out"] else None
 
         # Work types
-        work_types = log.work_type_names if log.time_out else (log.work_type.name if log.work_type else "—")
+        work_types = log["work_type_names"] if local_out else (log["work_type__name"] or "—")
 
         # Hours calculation
         if local_in and local_out:
@@ -69,24 +103,20 @@ def timelog_list(request):
             total_hours = "-"
 
         timelogs.append({
-            "id": log.id,
+            "id": log["id"],
             "date": local_in.date() if local_in else None,
-            "completed_date": log.completed_date,
+            "completed_date": log["time_out"].date() if log["time_out"] else None,
             "time_in": local_in.time() if local_in else None,
             "time_out": local_out.time() if local_out else None,
             "total_hours": total_hours,
             "work_types": work_types,
         })
-
-    # Pagination
-    paginator = Paginator(timelogs, 10)  # 10 logs per page
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = timelogs
 
     context = {
         "page_obj": page_obj,
-        "all_timelogs_dates": sorted(all_timelogs_dates, reverse=True),
-        "all_work_types": sorted(all_work_types),
+        "all_timelogs_dates": list(dates.order_by("-day")),
+        "all_work_types": work_type_options(request.user.id),
         "request": request,  # to preserve filter values in template
     }
 
@@ -96,25 +126,14 @@ def timelog_list(request):
 @login_required
 def timelog_create(request):
     user = request.user
-
-    # 1️⃣ Active logs (time_in without time_out)
-    active_logs = TimeLog.objects.filter(
-        user=user,
-        time_out__isnull=True
-    ).select_related("task", "work_type")
-
-    active_worktype_ids = active_logs.values_list("work_type_id", flat=True)
-
-    # 2️⃣ Assigned work items (exclude active ones to avoid redundancy)
-    assigned_work_items = []
-    tasks = WorkAssignment.objects.filter(user=user)
-
-    for task in tasks:
-        for wt in task.work_types.filter(is_active=True).exclude(id__in=active_worktype_ids):
-            assigned_work_items.append({
-                "task": task,
-                "work_type": wt
-            })
+    # Cached briefly per user; time in/out and assignment changes bump the user's version
+    active_logs, assigned_work_items = caching.cached(
+        "timelog_create",
+        lambda: _clock_in_items(user.id),
+        parts=[user.id],
+        scopes=[("user", user.id), WORKTYPE_SCOPE],
+        timeout=CLOCK_IN_CACHE_TIMEOUT,
+    )
 
     return render(request, "user_account/timelog_form.html", {
         "active_logs": active_logs,
@@ -122,38 +141,97 @@ def timelog_create(request):
     })
 
 
-@login_required
-def timelog_timein(request, task_id, worktype_id):
-    task = get_object_or_404(WorkAssignment, id=task_id, user=request.user)
-    work_type = get_object_or_404(WorkType, id=worktype_id)
+def _clock_in_items(user_id):
+    """The user's open logs and the (task, work type) pairs they can still time in to."""
+    # 1️⃣ Active logs (time_in without time_out), fetched once
+    active_logs = list(
+        TimeLog.objects.filter(user_id=user_id, time_out__isnull=True).select_related("task", "work_type")
+    )
+    active_worktype_ids = {log.work_type_id for log in active_logs}
+
+    # 2️⃣ Assigned work items from one join over the assignment/work type table
+    # (exclude active ones to avoid redundancy)
+    links = (
+        WorkAssignment.work_types.through.objects
+        .filter(workassignment__user_id=user_id, worktype__is_active=True)
+        .exclude(worktype_id__in=active_worktype_ids)
+        .select_related("workassignment", "worktype")
+        .order_by("workassignment_id", "id")
+    )
+    assigned_work_items = [{"task": link.workassignment, "work_type": link.worktype} for link in links]
+    return active_logs, assigned_work_items
+
 
-    # 🚨 Server-side safeguard
-    if TimeLog.objects.filter(user=request.user, time_out__isnull=True).exists():
+@login_required
+async def timelog_timein(request, task_id, worktype_id):
+    user = await request.auser()
+    task = await aget_object_or_404(WorkAssignment, id=task_id, user=user)
+    work_type = await aget_object_or_404(WorkType, id=worktype_id)
+
+    # 🚨 Server-side safeguard: the "one open log per user" constraint rejects
+    # the insert, so double taps cannot both get through a check-then-create
+    try:
+        await sync_to_async(_open_log)(user, task, work_type)
+    except IntegrityError:
+        # SQLite names the column, not the constraint, so check for the open log itself
+        if not await TimeLog.objects.filter(user=user, time_out__isnull=True).aexists():
+            raise
         messages.error(request, "⚠️ You already have an active task. Please finish it first.")
         return redirect("timelog_create")
 
-    # ✅ Safe to create new log
-    TimeLog.objects.create(
-        user=request.user,
+    # ✅ Clocked in
+    messages.success(request, f"✅ Time In for {work_type.name}")
+    return redirect("timelog_create")
+
+
+# TimeLog.save() keeps the hours rollup, tags and caches in sync, so writes go
+# through it in one thread hop instead of the async ORM's per-query hops
+@write_transaction
+def _open_log(user, task, work_type):
+    return TimeLog.objects.create(
+        user=user,
         task=task,
         work_type=work_type,
         work_type_names=work_type.name,
         time_in=timezone.now()
     )
-    messages.success(request, f"✅ Time In for {work_type.name}")
-    return redirect("timelog_create")
-
 
 
 @login_required
-def timelog_timeout(request, timelog_id):
+async def timelog_timeout(request, timelog_id):
     """Time Out for a single work type log."""
-    timelog = get_object_or_404(TimeLog, id=timelog_id, user=request.user)
+    user = await request.auser()
+    timelog = await aget_object_or_404(TimeLog, id=timelog_id, user=user)
     if timelog.time_out is None:
-        timelog.time_out = timezone.now()
-        timelog.save()
+        await sync_to_async(_close_log)(timelog)
     return redirect("timelog_list")
 
+
+@login_required
+async def timelog_status(request):
+    """Current clock-in state as JSON, for polling clients."""
+    user = await request.auser()
+    log = await (
+        TimeLog.objects.filter(user=user, time_out__isnull=True)
+        .values("id", "work_type_names", "time_in")
+        .afirst()
+    )
+    return JsonResponse({
+        "clocked_in": log is not None,
+        "log": log and {
+            "id": log["id"],
+            "work_type": log["work_type_names"],
+            "time_in": log["time_in"].isoformat() if log["time_in"] else None,
+        },
+        "server_time": timezone.now().isoformat(),
+    })
+
+
+@write_transaction
+def _close_log(timelog):
+    timelog.time_out = timezone.now()
+    timelog.save()
+
 @login_required
 def user_profile(request):
     # Get the profile linked to the current user
@@ -191,3 +269,27 @@ def edit_profile(request):
         {"user_form": user_form, "profile_form": profile_form},
     )
 
+
+@csrf_exempt
+@require_POST
+def kiosk_punch_sync(request):
+    """
+    Batch punch endpoint for shared kiosks. Authenticated by the per-event
+    HMAC signatures instead of a login session, hence csrf_exempt.
+    """
+    try:
+        payload = json.loads(request.body)
+        kiosk = Kiosk.objects.get(name=payload["kiosk"], is_active=True)
+        results = process_batch(kiosk, payload["events"])
+    except (ValueError, KeyError, TypeError, BatchError) as exc:
+        return JsonResponse({"error": str(exc) or "malformed request"}, status=400)
+    except Kiosk.DoesNotExist:
+        return JsonResponse({"error": "unknown kiosk"}, status=403)
+
+    counts = Counter(result["status"] for result in results)
+    return JsonResponse({
+        "results": results,
+        "applied": counts["applied"],
+        "duplicates": counts["duplicate"],
+        "rejected": counts["rejected"],
+    })